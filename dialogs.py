@@ -22,6 +22,7 @@ from sequential_mh.bpp_dsc.tree import (
     BinNode, Tree, solution_efficiency
 )
 from sequential_mh.bpp_dsc.support import dfs
+from sequential_mh.bpp_dsc.progress import DialogProgress
 from gui import (
     ui_add_article_dialog, ui_add_detail_dialog,
     ui_add_order_dialog, ui_add_ingot_dialog, ui_full_screen,
@@ -1038,12 +1039,13 @@ class IngotAssignmentDialog(QDialog):
         fusion_id = self.fusions[fusion_name]
         material = Material(fusion_name, 2.2, 1.)
 
-        progress = QProgressDialog('OCI', 'Отмена', 0, 100, self)
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setWindowTitle('Рассчет')
-        progress.forceShow()
+        dialog = QProgressDialog('OCI', 'Отмена', 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setWindowTitle('Рассчет')
+        dialog.forceShow()
+        progress = DialogProgress(dialog)
         order_name = 'НОВЫЙ ЗАКАЗ'
-        progress.setLabelText('Процесс расчета слитка под ПЗ...')
+        progress.message('Процесс расчета слитка под ПЗ...')
 
         details = self.parent().get_all_blanks()
         if material.name not in details:
@@ -1051,7 +1053,7 @@ class IngotAssignmentDialog(QDialog):
                 self, 'Добавление слитка', 'Слитки такого сплава не найдены.',
                 QMessageBox.Ok
             )
-            progress.close()
+            dialog.close()
             return
         details = self.parent().create_details_kit(
             details[material.name], material
@@ -1116,7 +1118,7 @@ class IngotAssignmentDialog(QDialog):
             })
             self.ui.ingots_view.selectionModel().select(self.proxy_model.index(0, 0, QModelIndex()), QItemSelectionModel.SelectionFlag.SelectCurrent)
             self.predicted_ingots[fusion_id] = {'tree': tree, 'efficiency': round(efficiency, 2)}
-        progress.close()
+        dialog.close()
 
     def predict_size(self, material: Material, kit: Kit, progress=None):
         max_size = self.ingot_settings['max_size']
@@ -1,5 +1,5 @@
 """Модуль пользовательских исключений"""
 
-
-class ForcedTermination(Exception):
-    """Принудительное завершение операции"""
+# Прерывание построения сообщается флагом отмены библиотеки
+# (sequential_mh.bpp_dsc.progress), поэтому используется ее исключение
+from sequential_mh.bpp_dsc.exception import ForcedTermination
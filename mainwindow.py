@@ -1,17 +1,15 @@
 """Модуль главного окна"""
 
-import copy
 from operator import itemgetter
 import sys
 import pickle
 import logging
 import time
 import math
-from typing import Any, Dict, Optional, Sequence, Union, List, Tuple
+from typing import Dict, Optional, Sequence, Union, List, Tuple
 from itertools import chain
-from functools import partial
 from contextlib import suppress
-from collections import Counter, deque, namedtuple
+from collections import Counter, namedtuple
 from pathlib import Path
 
 from PyQt5.QtCore import (
@@ -49,19 +47,18 @@ from exceptions import ForcedTermination
 from log import setup_logging, timeit, log_operation_info
 
 from sequential_mh.bpp_dsc.rectangle import (
-    BinType, Direction, Material, Blank, Kit, Bin, Rectangle3d
+    Direction, Material, Blank, Kit, Bin
 )
 from sequential_mh.bpp_dsc.tree import (
-    BinNode, CuttingChartNode, Tree, get_unplaced_before, solution_efficiency,
-    is_defective_tree, is_cc_node, get_all_residuals, get_residuals
+    BinNode, CuttingChartNode, Tree, solution_efficiency
 )
 from sequential_mh.bpp_dsc.exception import BPPError
 from sequential_mh.bpp_dsc.support import dfs
-from sequential_mh.bpp_dsc.choice import choose_tree
-from sequential_mh.bpp_dsc.stm import (
-    _pack, _create_insert_template, predicate, is_empty_tree, is_empty_node
+from sequential_mh.bpp_dsc.progress import DialogProgress, Progress
+from sequential_mh.bpp_dsc.ingots import IngotTask, create_kit, solve_ingots
+from sequential_mh.bpp_dsc.solver import (
+    Solver, filtration_residues, is_suitable_sizes
 )
-from sequential_mh.tsh.rect import RectangleType
 
 
 Number = Union[int, float]
@@ -103,6 +100,7 @@ class OCIMainWindow(QMainWindow):
         self.length_small = 700            # Длина пластины < 1
         self.width_small = 280             # Ширина пластины < 1
         self.aspect_ratio = 10
+        self.speculative_cut = False       # Спекулятивный раскрой слитков одного сплава
 
         self.clean_roll_height = 3         # Толщина чистового проката
         self.admissible_deformation = 70   # Допустимая деформация проката (%)
@@ -660,25 +658,41 @@ class OCIMainWindow(QMainWindow):
 
         # сортируем по объему в порядке неубывания
         ingots.sort(key=lambda item: math.prod(item[1]['size']))
+        # слитки разных сплавов раскраиваются параллельно,
+        # слитки одного сплава -- по порядку на остатке заготовок
+        tasks = [
+            IngotTask(key, tuple(ingot['size']), material)
+            for key, (_, ingot, material) in enumerate(ingots)
+            if material.name in all_blanks
+        ]
+        if not tasks:
+            return
 
-        for index, ingot, material in ingots:
-            if material.name not in placed_blanks:
-                placed_blanks[material.name] = Counter()
-
-            kit = self.create_details_kit(
-                all_blanks[material.name], material, placed_blanks[material.name]
-            )
-            if kit.is_empty():
-                break
-
-            ef_res = self.create_tree(
-                order, ingot, material, kit
+        dialog = QProgressDialog('OCI', 'Закрыть', 0, len(tasks), self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setWindowTitle('Раскрой')
+        dialog.forceShow()
+        progress = DialogProgress(dialog)
+        _id = int(order['id'])
+        alloys = ', '.join(dict.fromkeys(task.material.name for task in tasks))
+        log_operation_info(
+            'create_cut', {'name': order['name'], 'alloy': alloys},
+            identifier=_id
+        )
+        errors = []
+        try:
+            results = solve_ingots(
+                tasks, all_blanks, self.general_settings(order),
+                self.solver(), placed=placed_blanks,
+                speculative=self.speculative_cut, progress=progress,
+                checkpoint=get_abs_path(str(order['id']), 'schemes/checkpoints')
             )
-            if ef_res:
-                for leave in self._tree.root.cc_leaves:
-                    placed_blanks[material.name] += Counter(
-                        b.name for b in leave.placed)
-
+            for result in results:
+                index, ingot, material = ingots[result.key]
+                if result.error:
+                    errors.append(result.error)
+                    continue
+                ef_res = round(result.efficiency, 2)
                 # Если раскрой дерева для слитка успешен, то обовляем его
                 self.ingot_model.setData(
                     index, {'efficiency': ef_res}, Qt.EditRole
@@ -688,19 +702,35 @@ class OCIMainWindow(QMainWindow):
                 )
                 # Также необходимо сохранить дерево этого слитка и обновить
                 # модель с комплектами и их статусами
+                self._tree = result.tree
                 self.update_complect_statuses(order['id'], ingot['fusion_id'])
                 self.save_tree(order, ingot)
                 self.possible_change_status()
+        except ForcedTermination:
+            log_operation_info(
+                'user_inter_cut', {'name': order['name'], 'alloy': alloys},
+                identifier=_id
+            )
+            message_box_info('Процесс раскроя был прерван!', self)
+        except Exception as exception:
+            QMessageBox.critical(
+                self, 'Раскрой завершился с неизвестной ошибкой', f'{exception}', QMessageBox.Ok
+            )
+        else:
+            dialog.close()
+        for error in dict.fromkeys(errors):
+            message_box_error(error, parent=self)
         self.change_efficiency(order_index)
         self.refresh_orders_view(order_index)
 
     def create_tree(self, order: Dict, ingot: Dict, material: Material,
                     kit: Kit) -> Optional[Tuple[float, float]]:
         # Отображение прогресса раскроя
-        progress = QProgressDialog('OCI', 'Закрыть', 0, 100, self)
-        progress.setWindowModality(Qt.WindowModal)
-        progress.setWindowTitle('Раскрой')
-        progress.forceShow()
+        dialog = QProgressDialog('OCI', 'Закрыть', 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setWindowTitle('Раскрой')
+        dialog.forceShow()
+        progress = DialogProgress(dialog)
         order_name = order['name']
         size = ingot['size']
         _id = int(order['id'])
@@ -708,7 +738,7 @@ class OCIMainWindow(QMainWindow):
             'create_cut', {'name': order_name, 'alloy': material.name},
             identifier=_id
         )
-        progress.setLabelText('Процесс раскроя...')
+        progress.message('Процесс раскроя...')
         try:
             log_operation_info(
                 'cut_info',
@@ -718,7 +748,12 @@ class OCIMainWindow(QMainWindow):
                     'blanks': kit.qty(), 'heights': len(kit.keys())
                 }, identifier=_id
             )
-            efficiency = self.create_cut(size, kit, material, progress=progress)
+            checkpoint = get_abs_path(
+                f"{order['id']}_{ingot['id']}", 'schemes/checkpoints'
+            )
+            efficiency = self.create_cut(
+                size, kit, material, progress=progress, checkpoint=checkpoint
+            )
         except ForcedTermination:
             log_operation_info(
                 'user_inter_cut', {'name': order_name, 'alloy': material.name},
@@ -735,8 +770,8 @@ class OCIMainWindow(QMainWindow):
             )
             return
         else:
-            progress.setLabelText('Завершение раскроя...')
-            progress.close()
+            progress.message('Завершение раскроя...')
+            dialog.close()
             return round(efficiency, 2)
 
     def get_all_blanks(self) -> Dict:
@@ -792,23 +827,13 @@ class OCIMainWindow(QMainWindow):
         :param material: Материал
         :type material: Material
         :param exclude: Набор заготовок, которые нужно исключить.
-                        Формат: {имя_заготовки: количество}, defaults to None
+                        Формат: {имя_заготовки: количество}, где имя
+                        как у Blank.name (с толщиной), defaults to None
         :type exclude: dict, optional
         :return: Набор заготовок
         :rtype: Kit
         """
-        kit_: List[Blank] = []
-        if exclude is None:
-            exclude = {}
-        for detail in blanks:
-            number = detail[-1]
-            for _ in range(number - exclude.get(detail[-2], 0)):
-                blank = Blank(*detail[:4], direction=detail[4], material=material)
-                blank.name = detail[-2]
-                kit_.append(blank)
-        kit: Kit = Kit(kit_)
-        kit.sort('width')
-        return kit
+        return create_kit(blanks, material, exclude)
 
     def get_details_kit(self, material: Material) -> Kit:
         """Формирование набора заготовок
@@ -846,18 +871,18 @@ class OCIMainWindow(QMainWindow):
                 direction_id = int(model.data(model.index(sub_row, 10, parent), Qt.DisplayRole))
                 direction_code = 3 if direction_id == 0 else 2
                 direction = Direction(direction_code)
-                # Создаём заготовки из полученных данных
-                for _ in range(amount):
-                    blank = Blank(*sizes, priority, direction=direction, material=material)
-                    blank.name = parent_name + '_' + name
-                    details.append(blank)
+                # Создаём заготовку с количеством из полученных данных
+                blank = Blank(*sizes, priority, direction=direction, material=material)
+                blank.name = parent_name + '_' + name
+                details.append((blank, amount))
         # Пакуем набор и сортируем по толщине
-        kit = Kit(details)
+        kit = Kit.from_counts(details)
         kit.sort('width')
         return kit
 
     def create_cut(self, ingot_size: Sizes, kit: Kit, material: Material,
-                   progress: QProgressDialog = None) -> float:
+                   progress: Progress = None,
+                   checkpoint: Path = None) -> float:
         """Метод запуска алоритма раскроя.
 
         :param ingot_size: Размер слитка в формате (длина, ширина, толщина)
@@ -866,12 +891,21 @@ class OCIMainWindow(QMainWindow):
         :type kit: Kit
         :param material: Материал
         :type material: Material
+        :param progress: Прогресс раскроя, defaults to None
+        :type progress: Progress, optional
+        :param checkpoint: Каталог контрольных точек раскроя (прерванный
+                           раскрой той же задачи продолжается с точки),
+                           defaults to None
+        :type checkpoint: Path, optional
         """
         order = self.ui.orders_view.currentIndex().data(Qt.DisplayRole)
         settings = self.general_settings(order)
         ingot_bin = Bin(*ingot_size, material=material)
         tree = Tree(BinNode(ingot_bin, kit=kit))
-        tree = self.stmh_idrd(tree, restrictions=settings, progress=progress)
+        tree = self.stmh_idrd(
+            tree, restrictions=settings, progress=progress,
+            checkpoint=checkpoint
+        )
         self._tree = tree
 
         # NOTE: своя визуализация для отладки
@@ -900,390 +934,37 @@ class OCIMainWindow(QMainWindow):
         # self.recalculation(tree, [(node_2, (150, 180, 3.2)), (node_1, (500, 180, 3.2))], settings)
         return efficiency
 
+    def solver(self) -> Solver:
+        """Решатель с текущими настройками"""
+        return Solver(
+            aspect_ratio=self.aspect_ratio,
+            min_size=(self.minimum_plate_length, self.minimum_plate_width)
+        )
+
     @timeit
     def stmh_idrd(self, tree: Tree, with_filter: bool = True,
-                  restrictions: dict = None, progress: QProgressDialog = None,
-                  level_subtree: int = 0, with_priority: bool = True):
-        is_main = True
-        doubling = False
-        start_step, steps = 0, 0
-        if restrictions:
-            cut_thickness = restrictions.get('cutting_thickness')
-            if cut_thickness and cut_thickness >= max(tree.root.kit.keys()):
-                doubling = True
-            else:
-                # cut_thickness = max(tree.root.kit.keys())
-                restrictions['cutting_thickness'] = max(tree.root.kit.keys())
-            # doubling = cut_thickness >= max(tree.root.kit.keys())
-        if progress:
-            steps = number_of_steps(len(tree.root.kit.keys()), doubling=doubling)
-            # Костыль. Умножение на константу для учета одинаковых веток
-            # print(f'Рассчитанное кол-во шагов: {steps}')
-            steps = int(4 * steps)
-            progress.setRange(0, steps)
-        # if level_subtree == 1:
-        trees_vertical = self._stmh_idrd(
-            tree, restrictions=restrictions, local=not is_main,
-            with_filter=with_filter, progress=progress, end_progress=False,
-            direction=1, steps=steps, level_subtree=level_subtree, with_priority=with_priority
-        )
-        if progress:
-            start_step = progress.value()
-        trees_horizontal = self._stmh_idrd(
-            tree, restrictions=restrictions, local=not is_main,
-            with_filter=with_filter, progress=progress, direction=2,
-            start_step=start_step, steps=steps, level_subtree=level_subtree, with_priority=with_priority
+                  restrictions: dict = None, progress: Progress = None,
+                  level_subtree: int = 0, with_priority: bool = True,
+                  checkpoint: Path = None) -> Optional[Tree]:
+        """Построение дерева раскроя (см. Solver.stmh_idrd)"""
+        return self.solver().stmh_idrd(
+            tree, with_filter=with_filter, restrictions=restrictions,
+            progress=progress, level_subtree=level_subtree,
+            with_priority=with_priority, checkpoint=checkpoint
         )
-        trees = [*trees_vertical, *trees_horizontal]
-        # else:
-        #     trees_horizontal = self._stmh_idrd(
-        #         tree, restrictions=restrictions, local=not is_main,
-        #         with_filter=with_filter, progress=progress, direction=3,
-        #         start_step=start_step, steps=steps, level_subtree=level_subtree, with_priority=with_priority
-        #     )
-        #     trees = trees_horizontal
-
-        if restrictions:
-            max_size = restrictions.get('max_size')
-        else:
-            max_size = None
-        if progress:
-            progress.setLabelText('Фильтрация решений...')
-        if with_filter:
-            trees = [
-                item for item in trees if not is_defective_tree(item, max_size)
-            ]
-
-        if not trees and level_subtree == 0:
-            raise BPPError(
-                'Не удалось получить раскрой.\n'
-                'Измените приоритеты, толщину реза или ограничения на максимальные размеры'
-            )
-        elif not trees:
-            return
-
-        print(f'Годных деревьев: {len(trees)}')
-        # for t in trees:
-        #     ef = solution_efficiency(
-        #         t.root, list(dfs(t.root)), t.main_kit, nd=True, is_p=True
-        #     )
-        #     print(f'Узлов проката: {foo(t.root)}; эффективность: {ef:.6f}')
-        if progress:
-            progress.setLabelText('Выбор оптимального решения...')
-
-        best, _ = choose_tree(trees, self.aspect_ratio)
-
-        for node in best.root.cc_leaves:
-            print(node.bin.height, node._id)
-        get_all_residuals(best)
-        return best
-
-    def _stmh_idrd(self, tree: Tree, local: bool = False,
-                   with_filter: bool = True, restrictions: dict = None,
-                   progress: QProgressDialog = None, end_progress: bool = True,
-                   direction: int = 1, start_step: int = 0, steps: int = 0,
-                   level_subtree: int = 0, with_priority: bool = True) -> List[Tree]:
-        """Последовательная древовидная метаэвристика.
-
-        Построение деревьев растроя.
-
-        :param tree: Начальное дерево
-        :type tree: Tree
-        :param local: Флаг локальной оптимизации, defaults to False
-        :type local: bool, optional
-        :param with_filter: Флаг фильтрации деревьев
-                            на соответствие ограничениям, defaults to True
-        :type with_filter: bool, optional
-        :param restrictions: Словарь ограничений, defaults to None
-        :type restrictions: dict, optional
-        :param progress: Прогресс бар, defaults to None
-        :type progress: QProgressDialog, optional
-        :raises ForcedTermination: Исключение принудительного завершения
-        :return: Набор построенных деревьев раскроя
-        :rtype: list[Tree]
-        """
-        level = deque([tree])
-        result = []
-        step = start_step
-        point_counter = 2
-
-        if restrictions:
-            max_size = restrictions.get('max_size')
-        else:
-            max_size = None
-
-        while level:
-            step += 1
-            new_level: deque = deque([])
-            for _, tree_ in enumerate(level):
-                # Костыль для небольшого увеличения прогресса
-                # в случае, когда он переполняется
-                if step >= steps and progress:
-                    steps = int(step * 1.1)
-                    progress.setRange(0, steps)
-                if with_filter and is_defective_tree(tree_, max_size=max_size):
-                    # Додумать на сколько уменьшать
-                    # min_height = min(map(lambda item: item.bin.height, tree_.root.cc_leaves))
-                    # steps -= number_of_steps(len([x for x in tree.root.kit.keys() if x < min_height]), doubling=False)
-                    # steps -= 1
-                    # progress.setRange(0, steps)
-                    # progress.setValue(step - 1)
-                    continue
-                if is_empty_tree(tree_):
-                    result.append(tree_)
-                else:
-                    new_level.append(tree_)
-            level = deque(new_level)
-            if not level:
-                break
-
-            tree = level.popleft()
-            nodes_: List[Any] = [
-                node for node in tree.root.leaves() if not is_empty_node(node)
-            ]
-            nodes: deque = deque(sorted(nodes_, key=predicate))
-            node = nodes[0]
-            if is_cc_node(node):
-                _pack(node, level, restrictions, with_priority=with_priority)
-                # контролируем уровень построения поддеревьев
-                # FIXME: раскоментировать для учета остатков
-                if tree._type == 0:
-                    level_subtree = 0
-                if level_subtree < 1:
-                    level_subtree += 1
-                    self.create_subtree(node, restrictions, level_subtree)
-                    level_subtree -= 1
-                if is_empty_tree(tree):
-                    result.append(tree)
-                else:
-                    level.append(tree)
-            else:
-                print(f'{level_subtree} - {node.current_id = }')
-                _create_insert_template(
-                    node, level, tree, local, restrictions,
-                    direction=direction
-                )
-            # print(f'{step = }; {len(level)}')
-            if progress:
-                progress.setValue(step)
-                progress.setLabelText('Процесс раскроя.' + '.' * point_counter + ' ' * (2 - point_counter))
-                point_counter = (point_counter + 1) % 3
-                # print(f'{progress.wasCanceled() = }')
-                if progress.wasCanceled():
-                    raise ForcedTermination('Процесс раскроя был прерван')
-        print(f'Кол-во шагов для {len(tree.root.kit.keys())} толщин: {step} ({steps})')
-        # костыль для завершения прогресса
-        if end_progress and step < steps and progress:
-            progress.setValue(steps)
-
-        return result
-
-    def create_subtree(self, node: CuttingChartNode, restrictions: Dict,
-                       level_subtree: int) -> None:
-        """Создание поддерева для остатка
-
-        :param node: Узел, содержащий остатки
-        :type node: CuttingChartNode
-        :param restrictions: Ограничения
-        :type restrictions: dict
-        :param level_subtree: Уровень поддерева, ограничивает
-                              рекурсивное построение деревьев
-        :type level_subtree: int
-        """
-        min_size = self.minimum_plate_length, self.minimum_plate_width
-        tailings = get_residuals(node)
-        tailings = filtration_residues(node.result.tailings, min_size=min_size)
-        suitable_residues = [
-            t for t in tailings
-            if incoming_rectangles(t, node.bin.height, node.result.unplaced)
-        ]
-        # если нет прямоугольников для размещения текущей
-        # толщины пробуем упаковать другие
-        adjacent_branch = node.adjacent_branch()
-        if adjacent_branch:
-            adj_node = adjacent_branch.adj_leaves[0]
-        else:
-            return
-        if not suitable_residues and not adj_node.kit.is_empty():
-            # получить неупакованные элементы из соседней ветки
-            # построить дерево для остатков
-            for tailing in tailings:
-                new_root = BinNode(
-                    Bin(
-                        tailing.length, tailing.width, node.bin.height,
-                        material=node.bin.material
-                    ),
-                    copy.deepcopy(adj_node.kit)
-                )
-                new_tree = Tree(new_root)
-                new_tree._type = 1
-                try:
-                    new_tree = self.stmh_idrd(
-                        new_tree, restrictions=restrictions,
-                        level_subtree=level_subtree, with_priority=False
-                    )
-                except BPPError:
-                    print(f'\tОстаток {tailing.length, tailing.width, node.bin.height} из {node.bin}: {adj_node.kit.keys()}')
-                else:
-                    if new_tree is None:
-                        continue
-                    if new_tree.root.children:
-                        tailing.rtype = RectangleType.USED_RESIDUAL
-                        node.subtree.append(new_tree)
-                    # как быть если есть приоритет? когда частичная упаковка текущей толщины
-                    # получить упакованные элементы
-                    # удалить упакованные элементы из соседней ветки
-                    for subnode in new_tree.root.cc_leaves:
-                        blanks = [r.rectangle for r in chain.from_iterable(subnode.result.blanks.values())]
-                        adj_node.kit.delete_items(list(blanks), subnode.bin.height)
-                if adj_node.kit.is_empty():
-                    break
 
     @timeit
     def optimal_ingot_size(self, main_tree: Tree, min_size: Sizes,
                            max_size: Sizes, restrictions: Dict,
-                           progress: QProgressDialog = None) -> Tree:
-        """Определение размеров слитка
-
-        :param main_tree: Основное дерево, содержащее слиток максимальных размеров
-        :type main_tree: Tree
-        :param min_size: Минимальные размеры слитка, (длина, ширина, высота)
-        :type min_size: tuple[number, number, number]
-        :param max_size: Максимальные размеры слитка, (длина, ширина, высота)
-        :type max_size: tuple[number, number, number]
-        :param restrictions: Ограничения
-        :type restrictions: dict
-        :raises ValueError: если построено некорректное дерево
-        :return: Дерево раскроя для полученного слитка
-        :rtype: Tree
-        """
-        min_length, min_width, min_height = min_size
-
-        doubling = False
-        start_step, steps = 0, 0
-        if restrictions:
-            cut_thickness = restrictions.get('cutting_thickness')
-            if cut_thickness and cut_thickness >= max(main_tree.root.kit.keys()):
-                doubling = True
-            else:
-                restrictions['cutting_thickness'] = max(main_tree.root.kit.keys())
-        if progress:
-            steps = number_of_steps(len(main_tree.root.kit.keys()), doubling=doubling)
-            # Костыль. Умножение на константу для учета одинаковых веток
-            # print(f'Рассчитанное кол-во шагов: {steps}')
-            steps = int(6 * steps)
-            progress.setRange(0, steps)
-
-        trees_vertical = self._stmh_idrd(
-            main_tree, restrictions=restrictions, local=False,
-            with_filter=False, progress=progress, end_progress=False,
-            direction=1, steps=steps
-        )
-        if progress:
-            start_step = progress.value()
-        trees_horizontal = self._stmh_idrd(
-            main_tree, restrictions=restrictions, local=False,
-            with_filter=False, progress=progress, direction=2,
-            start_step=start_step, steps=steps
+                           progress: Progress = None) -> Tree:
+        """Определение размеров слитка (см. Solver.optimal_ingot_size)"""
+        return self.solver().optimal_ingot_size(
+            main_tree, min_size, max_size, restrictions, progress=progress
         )
-        trees = [*trees_vertical, *trees_horizontal]
-
-        print(f'До фильтрации: {len(trees)}')
-
-        for tree in trees:
-            # Получение смежного остатка
-            if len(tree.root.adj_leaves) > 1:
-                raise ValueError('Смежных остатков более 1!')
-            adj_node = tree.root.adj_leaves[0]
-            # Обнуление размеров смежного остатка
-            adj_node.bin.length = 0
-            adj_node.bin.width = 0
-            # Обновление размеров вышестоящих узлов:
-            # Когда дошли до промежуточного узла:
-            # обновлять размеры с учетом ограничений на размеры
-            adj_node.upward_size_update(min_size=min_size, max_size=max_size)
-            root_size = tree.root.bin.size
-            if root_size[0] < min_length:
-                tree.root.bin.length = min_length
-            if root_size[1] < min_width:
-                tree.root.bin.width = min_width
-            if root_size[2] < min_height:
-                tree.root.bin.height = min_height
-            # TODO: Проблема в том, что тип разреза не обновляется
-            # может случиться так, что резать нужно будет по другому! (в 7 примере)
-            tree.root.update_size()
-
-        if restrictions:
-            max_leaf_size = restrictions.get('max_size')
-        else:
-            max_leaf_size = None
-        trees = [
-            item for item in trees if not is_defective_tree(item, max_leaf_size)
-        ]
-        print(f'После фильтрации: {len(trees)}')
-        if not trees:
-            raise BPPError(
-                'Не удалось получить раскрой.\n'
-                'Измените приоритеты, толщину реза или ограничения на максимальные размеры'
-            )
-        # best = max(
-        #     trees,
-        #     key=lambda item: solution_efficiency(
-        #         item.root, list(dfs(item.root)), item.main_kit, nd=True, is_p=True
-        #     )
-        # )
-        best, _ = choose_tree(trees, self.aspect_ratio)
-        get_all_residuals(best)
-
-        # NOTE: своя визуализация для отладки
-        # debug_graph_tree(best)
-        # for node in best.root.cc_leaves:
-        #     debug_visualize(node, 'Основной')
-        #     if node.subtree:
-        #         for subtree in node.subtree:
-        #             for subnode in subtree.root.cc_leaves:
-        #                 debug_visualize(subnode, f'Остаток от {node.bin.height} мм')
-        return best
 
     def recalculation(self, tree, updatable_nodes, restrictions):
-        """Перерасчет дерева
-        tree - исходное дерево
-        nodes - список пар из узлов и новых размеров
-        restrictions - ограничения
-        """
-        node = updatable_nodes[0][0]
-        unplaced = get_unplaced_before(node.parent, tree.main_kit)
-
-        for node, new_size in updatable_nodes:
-            ingot_bin = Bin(*new_size, material=node.bin.material)
-            # создать новое дерево
-            new_tree = Tree(BinNode(ingot_bin, kit=Kit(unplaced)))
-            new_tree = self.stmh_idrd(new_tree, restrictions=restrictions)
-            # удалить размещенные заготовки
-            for cc_node in new_tree.root.cc_leaves:
-                for packed_rectangle in chain.from_iterable(cc_node.result.blanks.values()):
-                    blank = packed_rectangle.rectangle
-                    unplaced.remove(blank)
-
-            # меняем поддерево
-            parent = node.parent
-            print(f'{node.bin.bin_type = }')
-            print(f'{node.parent = }')
-
-            new_tree.root.bin.bin_type = node.bin.bin_type
-            new_tree.root.parent = parent
-            parent.delete(node)
-            parent.add(new_tree.root)
-
-            # NOTE: своя визуализация для отладки
-            # debug_graph_tree(tree, name=f'tree_{i}')
-            # for node in tree.root.cc_leaves:
-            #     debug_visualize(node, 'Основной')
-            #     if node.subtree:
-            #         for subtree in node.subtree:
-            #             for subnode in subtree.root.cc_leaves:
-            #                 debug_visualize(subnode, f'Остаток от {node.bin.height} мм')
-
+        """Перерасчет дерева (см. Solver.recalculation)"""
+        self.solver().recalculation(tree, updatable_nodes, restrictions)
 
     def save_residuals(self, ingot: Dict, order: Dict) -> Sequence[Tuple]:
         """Сохранение остатков в БД"""
@@ -1558,6 +1239,8 @@ class OCIMainWindow(QMainWindow):
             'rolling/deformation', defaultValue=0.7, type=float)
         self.admissible_deformation = self.settings.value(
             'rolling/aspect_ratio', defaultValue=10, type=int)
+        self.speculative_cut = self.settings.value(
+            'cutting/speculative', defaultValue=False, type=bool)
         self.ingot_min_length = self.settings.value(
             'forging/min_forge_length', defaultValue=70, type=int)
         self.ingot_min_width = self.settings.value(
@@ -1583,6 +1266,7 @@ class OCIMainWindow(QMainWindow):
         self.settings.setValue('cutting/min_width', self.minimum_plate_width)
         self.settings.setValue('cutting/min_length', self.minimum_plate_length)
         self.settings.setValue('cutting/cutting_thickness', self.cutting_thickness)
+        self.settings.setValue('cutting/speculative', self.speculative_cut)
 
         self.settings.setValue('rolling/length_large', self.length_large)
         self.settings.setValue('rolling/width_large', self.width_large)
@@ -1688,71 +1372,6 @@ def get_abs_path(file_name: str, path=None) -> Path:
     return abs_path
 
 
-def number_of_steps(num_of_heights, doubling=True):
-    """Количество шагов алгоритма
-
-    :param num_of_heights: Количество толщин
-    :type num_of_heights: int
-    :param doubling: Использование удвоения, когда используется толщина
-                     реза, defaults to True
-    :type doubling: bool, optional
-    :return: Количество операций в алгоритме
-    :rtype: int
-    """
-    # изначальная формула
-    number_of_trees = 4 * (4 ** num_of_heights - 1) / 3
-    # экспериментально подобранная
-    number_of_trees = 4 * (2 ** num_of_heights - 1) / 2
-    if doubling:
-        number_of_trees *= 2
-        number = (2 ** num_of_heights * 2 - 2) / 2 + 1
-    else:
-        number = (2 ** num_of_heights - 1) / 2 + 1
-    return int(number_of_trees + number)
-
-
-def create_bins_residues(items, height: Number,
-                         rolldir: Direction, material=None) -> List[Bin]:
-    """Создание контейнеров из остатков
-
-    :param items: список прямоуголников-остатков
-    :type items: list[Rectangle]
-    :param height: толщина
-    :type height: Number
-    :param rolldir: [description]
-    :type rolldir: Direction
-    :param material: материал, defaults to None
-    :type material: Material, optional
-    :return: Список контейнеров-остатков
-    :rtype: list[Bin]
-    """
-    args = (height, rolldir, material, BinType.residue)
-    return [Bin(item.length, item.width, *args) for item in items]
-
-
-def incoming_rectangles(rect, height: float, kit: List[Any]):
-    """Прямоугольники входящие в rect"""
-    return [Rectangle3d(rect.length, rect.width, height).is_subrectangle(b, b.is_rotatable) for b in kit]
-
-
-def filtration_residues(items: List, min_size: Tuple[Number, Number] = None, key=None):
-    """Фильтрация остатков
-
-    :param items: список прямоугольников
-    :type items: list[Rectangle]
-    :param min_size: минимальные размеры, defaults to None
-    :type min_size: Optional[tuple[Number, Number]], optional
-    :return: остатки с подходящими размерами
-    :rtype: list[Rectangle]
-    """
-    key = key or (lambda x: x)
-    residues = filter(lambda item: is_residual(key(item)), items)
-    p_is_suitable_sizes = partial(is_suitable_sizes, min_size=min_size)
-    if min_size:
-        residues = filter(lambda item: p_is_suitable_sizes(key(item)), residues)
-    return list(residues)
-
-
 def debug_visualize(node, name):
     # NOTE: своя визуализация для отладки
     from sequential_mh.tsh import rect
@@ -1795,37 +1414,6 @@ def debug_graph_tree(tree, name=''):
     print(f'Количество поддеревьев: {k}')
 
 
-def is_residual(item) -> bool:
-    """Проверка на остаток
-
-    :param item: Прямоугольник тип которого проверяется
-    :type item: Rectangle
-    :return: True если остаток и False в противном случае
-    :rtype: bool
-    """
-    return isinstance(item, Bin) or item.rtype == RectangleType.RESIDUAL
-
-
-def is_suitable_sizes(item, min_size: Tuple[Number, Number]) -> bool:
-    """Проверка минимальных размеров
-
-    :param item: Прямоугольник
-    :type item: Rectangle
-    :param min_size: Минимальные размеры в формате (length, width)
-    :type min_size: tuple[Number, Number]
-    :return: True если прямоугольник удовлетворяет минимальным размерам
-             и False в противном случае
-    :rtype: bool
-    """
-    if isinstance(item, Bin):
-        min_side = min(item.size[:2])
-        max_side = max(item.size[:2])
-    else:
-        min_side = item.min_side
-        max_side = item.max_side
-    return min_side >= min(min_size) and max_side >= max(min_size)
-
-
 def save_tailing(length, width, height, material, batch):
     fusions = CatalogDataService.fusions_list()
     fusion = fusions[material.name]
@@ -0,0 +1,291 @@
+"""Пакетный раскрой: решение задач из каталога JSON-файлов
+
+Запуск::
+
+    python -m sequential_mh.bpp_dsc.batch problems/ -o solutions/ -j 8
+
+Каждая задача решается в отдельном процессе (:class:`solver.Solver`),
+поэтому время решения набора задач уменьшается пропорционально
+количеству процессоров. Для каждой задачи записываются файлы решения
+``<имя>.json`` (карты раскроя) и ``<имя>.oci`` (дерево в формате
+приложения), а для всего набора -- таблица ``summary.csv``
+с эффективностью и временем решения.
+
+Формат задачи::
+
+    {
+        "name": "Заказ 1",
+        "ingot": [180, 160, 28],
+        "material": {"name": "Сплав 1", "density": 2.2, "extension": 1},
+        "blanks": [
+            {"length": 77, "width": 180, "height": 3.3, "priority": 1,
+             "direction": "P", "name": "1", "amount": 2}
+        ],
+        "restrictions": {
+            "max_size": [[[3, null], [1200, 380]], [[0, 3], [1200, 400]]],
+            "cutting_length": 1200, "cutting_thickness": 4.2,
+            "hem_until_3": 4, "hem_after_3": 2, "allowance": 2,
+            "end": 0.02, "min_size": [50, 100]
+        },
+        "aspect_ratio": 10
+    }
+
+Ограничения имеют тот же вид, что и в приложении. Исключение --
+``max_size``: словарь с диапазонами толщин записывается списком пар
+(диапазон, размеры), а null в диапазоне означает бесконечность.
+Направление заготовки задается именем или кодом
+:class:`rectangle.Direction` и по умолчанию любое. Поля ``name``,
+``amount`` и ``aspect_ratio`` необязательны.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import argparse
+import csv
+import json
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain
+from pathlib import Path
+from time import perf_counter
+
+from .choice import number_rolling
+from .exception import BPPError
+from .rectangle import Bin, BinType, Blank, Direction, Kit, Material
+from .solver import Solver
+from .support import dfs
+from .tree import BinNode, Tree, solution_efficiency
+
+
+# Столбцы таблицы summary.csv
+SUMMARY_FIELDS = (
+    'name', 'status', 'efficiency', 'rollings', 'placed', 'blanks', 'time',
+    'message'
+)
+
+
+def load_problem(path):
+    """Чтение задачи
+
+    :param path: Путь к JSON-файлу задачи
+    :type path: str или Path
+    :raises ValueError: если в задаче нет обязательных полей
+    :return: Имя задачи, начальное дерево, ограничения и решатель
+    :rtype: tuple[str, Tree, dict, Solver]
+    """
+    path = Path(path)
+    with path.open(encoding='utf-8') as file:
+        data = json.load(file)
+    try:
+        material = Material(**data['material'])
+        blanks = []
+        n_blanks = 0
+        for item in data['blanks']:
+            blank = Blank(
+                item['length'], item['width'], item['height'],
+                item['priority'],
+                direction=_direction(item.get('direction')),
+                material=material
+            )
+            blank.name = str(item.get('name', n_blanks + 1))
+            blanks.append((blank, item.get('amount', 1)))
+            n_blanks += item.get('amount', 1)
+        ingot = Bin(*data['ingot'], material=material, bin_type=BinType.ingot)
+        restrictions = _restrictions(data.get('restrictions') or {})
+    except (KeyError, TypeError) as error:
+        raise ValueError(f'Некорректная задача {path.name}: {error!r}') from None
+    kit = Kit.from_counts(blanks)
+    kit.sort('width')
+    solver = Solver(
+        aspect_ratio=data.get('aspect_ratio', 10),
+        min_size=restrictions.get('min_size')
+    )
+    name = str(data.get('name', path.stem))
+    return name, Tree(BinNode(ingot, kit=kit)), restrictions, solver
+
+
+def solve_problem(path, output):
+    """Решение одной задачи с записью файлов решения
+
+    :param path: Путь к JSON-файлу задачи
+    :type path: str или Path
+    :param output: Каталог для файлов решения
+    :type output: str или Path
+    :return: Строка таблицы summary.csv
+    :rtype: dict
+    """
+    path, output = Path(path), Path(output)
+    row = dict.fromkeys(SUMMARY_FIELDS, '')
+    row['name'] = path.stem
+    start = perf_counter()
+    try:
+        name, tree, restrictions, solver = load_problem(path)
+        row['name'] = name
+        n_blanks = tree.root.kit.qty()
+        best = solver.stmh_idrd(tree, restrictions=restrictions)
+    except (BPPError, ValueError) as error:
+        row.update(status='error', message=str(error).replace('\n', ' '))
+        row['time'] = round(perf_counter() - start, 3)
+        return row
+    elapsed = perf_counter() - start
+    efficiency = solution_efficiency(
+        best.root, list(dfs(best.root)), best.main_kit, is_total=True
+    )
+    solution = {
+        'name': name,
+        'ingot': list(best.root.bin.size),
+        'efficiency': efficiency,
+        'rollings': number_rolling(best.root),
+        'time': elapsed,
+        'charts': charts(best),
+    }
+    placed = sum(len(chart['blanks']) for chart in solution['charts'])
+    output.mkdir(parents=True, exist_ok=True)
+    with (output / f'{path.stem}.json').open('w', encoding='utf-8') as file:
+        json.dump(solution, file, ensure_ascii=False, indent=2)
+    with (output / f'{path.stem}.oci').open('wb') as file:
+        pickle.dump(best, file)
+    row.update(
+        status='ok', efficiency=round(efficiency, 6),
+        rollings=solution['rollings'], placed=placed, blanks=n_blanks,
+        time=round(elapsed, 3)
+    )
+    return row
+
+
+def charts(tree):
+    """Карты раскроя дерева (включая карты поддеревьев остатков)
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :return: Размеры карт и размещенные на них заготовки
+    :rtype: list[dict]
+    """
+    result = []
+    for node in tree.root.cc_leaves:
+        result.append({
+            'length': node.bin.length,
+            'width': node.bin.width,
+            'height': node.bin.height,
+            'blanks': [
+                {
+                    'name': getattr(item.rectangle, 'name', None),
+                    'x': item.x, 'y': item.y,
+                    'length': item.rectangle.length,
+                    'width': item.rectangle.width,
+                }
+                for item in chain.from_iterable(node.result.blanks.values())
+            ],
+        })
+        for subtree in node.subtree:
+            result.extend(charts(subtree))
+    return result
+
+
+def solve_all(source, output, workers=None, progress=None):
+    """Решение всех задач каталога
+
+    :param source: Каталог с JSON-файлами задач
+    :type source: str или Path
+    :param output: Каталог для файлов решения и summary.csv
+    :type output: str или Path
+    :param workers: Количество процессов, defaults to None (по
+                    количеству процессоров)
+    :type workers: int, optional
+    :param progress: Функция, принимающая строку таблицы после
+                     решения очередной задачи, defaults to None
+    :type progress: Callable[[dict], None], optional
+    :return: Строки таблицы summary.csv в порядке имен файлов
+    :rtype: list[dict]
+    """
+    output = Path(output)
+    paths = sorted(Path(source).glob('*.json'))
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(solve_problem, path, output): path
+            for path in paths
+        }
+        for future in as_completed(futures):
+            row = rows[futures[future]] = future.result()
+            if progress:
+                progress(row)
+    rows = [rows[path] for path in paths]
+    output.mkdir(parents=True, exist_ok=True)
+    with (output / 'summary.csv').open('w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def main(argv=None):
+    """Точка входа командной строки
+
+    :return: Код возврата (1, если хотя бы одна задача не решена)
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m sequential_mh.bpp_dsc.batch',
+        description='Пакетный раскрой слитков'
+    )
+    parser.add_argument('source', type=Path, help='каталог с задачами (*.json)')
+    parser.add_argument(
+        '-o', '--output', type=Path, default=None,
+        help='каталог для решений (по умолчанию <source>/solutions)'
+    )
+    parser.add_argument(
+        '-j', '--workers', type=int, default=None,
+        help='количество процессов (по умолчанию по числу процессоров)'
+    )
+    args = parser.parse_args(argv)
+    output = args.output or args.source / 'solutions'
+
+    def report(row):
+        if row['status'] == 'ok':
+            print(
+                f"{row['name']}: {row['efficiency']:.4f} "
+                f"({row['placed']}/{row['blanks']}, {row['time']:.1f} с)"
+            )
+        else:
+            print(f"{row['name']}: ошибка -- {row['message']}")
+
+    start = perf_counter()
+    rows = solve_all(args.source, output, workers=args.workers, progress=report)
+    print(
+        f'Решено задач: {sum(row["status"] == "ok" for row in rows)} '
+        f'из {len(rows)} за {perf_counter() - start:.1f} с'
+    )
+    return int(any(row['status'] != 'ok' for row in rows))
+
+
+def _direction(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return Direction[value]
+    return Direction(value)
+
+
+def _restrictions(data):
+    restrictions = dict(data)
+    max_size = restrictions.get('max_size')
+    if isinstance(max_size, list) and max_size and \
+            isinstance(max_size[0][0], list):
+        restrictions['max_size'] = {
+            (low, float('inf') if high is None else high): tuple(size)
+            for (low, high), size in max_size
+        }
+    elif max_size is not None:
+        restrictions['max_size'] = tuple(max_size)
+    if restrictions.get('min_size') is not None:
+        restrictions['min_size'] = tuple(restrictions['min_size'])
+    return restrictions
+
+
+if __name__ == '__main__':
+    sys.exit(main())
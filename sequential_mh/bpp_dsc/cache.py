@@ -0,0 +1,309 @@
+"""Кэширование результатов подзадач раскроя
+
+Одни и те же подзадачи упаковки встречаются во многих деревьях
+построения, которые отличаются в других ветках. Результаты таких
+подзадач сохраняются в кэшах с вытеснением давно не использованных
+значений (:class:`LRUCache`), размер кэшей ограничен количеством
+значений и их объемом.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import pickle
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
+
+from .ph import ph_bpp
+from ..tsh.bpp_ts import bpp_ts
+from ..tsh.ph import ph_bpp as tsh_ph_bpp
+
+
+CacheInfo = namedtuple(
+    'CacheInfo', ('hits', 'misses', 'maxsize', 'currsize', 'maxbytes', 'nbytes')
+)
+
+
+class LRUCache:
+    """Кэш с вытеснением давно не использованных значений
+
+    :param maxsize: Максимальное количество значений, defaults to 128
+    :type maxsize: int, optional
+    :param maxbytes: Максимальный объем значений в байтах (объем
+                     значения передается при сохранении),
+                     defaults to None (без ограничения)
+    :type maxbytes: int, optional
+    """
+    def __init__(self, maxsize=128, maxbytes=None) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        """Значение по ключу (с учетом попаданий и промахов)"""
+        try:
+            value, _ = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, nbytes=0) -> None:
+        """Сохранение значения
+
+        :param nbytes: Объем значения в байтах, defaults to 0
+        :type nbytes: int, optional
+        """
+        if key in self._data:
+            self.nbytes -= self._data[key][1]
+        self._data[key] = value, nbytes
+        self._data.move_to_end(key)
+        self.nbytes += nbytes
+        while self._data and (
+            len(self._data) > self.maxsize
+            or self.maxbytes is not None and self.nbytes > self.maxbytes
+        ):
+            _, (_, size) = self._data.popitem(last=False)
+            self.nbytes -= size
+
+    def clear(self) -> None:
+        """Очистка кэша и счетчиков"""
+        self._data.clear()
+        self.hits = self.misses = self.nbytes = 0
+
+    def info(self) -> CacheInfo:
+        """Статистика кэша"""
+        return CacheInfo(
+            self.hits, self.misses, self.maxsize, len(self._data),
+            self.maxbytes, self.nbytes
+        )
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Результаты bpp_ts для карт раскроя с изменяемыми размерами
+BPP_TS_CACHE = LRUCache(maxsize=2048, maxbytes=64 * 2 ** 20)
+# Результаты ph_bpp для карт раскроя с фиксированными размерами
+PH_BPP_CACHE = LRUCache(maxsize=2048, maxbytes=16 * 2 ** 20)
+# Результаты ph_bpp (tsh) для заполнения пустых областей в bpp_ts
+TSH_PH_BPP_CACHE = LRUCache(maxsize=4096, maxbytes=16 * 2 ** 20)
+
+
+def _items(rectangles):
+    """Последовательность заготовок набора для ключа кэша
+
+    Для каждой заготовки: приоритет, размеры, направление и номер
+    класса одинаковых имен (сами имена в ключ не входят).
+    """
+    names = {}
+    return tuple(
+        (
+            priority, blank.length, blank.width,
+            getattr(blank, 'height', None),
+            getattr(getattr(blank, 'direction', None), 'value', None),
+            names.setdefault(getattr(blank, 'name', None), len(names))
+        )
+        for priority, group in rectangles.items() for blank in group
+    )
+
+
+def _has_duplicates(blanks):
+    return len({id(blank) for blank in blanks}) != len(blanks)
+
+
+def _cached_packing(cache, packing, params, length, width, rectangles,
+                    **kwargs):
+    """Вызов алгоритма приоритетной эвристики с кэшированием
+
+    Алгоритм размещает сами заготовки набора (не копии), удаляет их
+    из набора, сортирует и поворачивает заготовки. При попадании
+    в кэш эти изменения повторяются для заготовок переданного набора.
+
+    :param cache: Кэш
+    :type cache: LRUCache
+    :param packing: Функция ph_bpp
+    :type packing: Callable
+    :param params: Параметры упаковки для ключа кэша
+    :type params: tuple
+    """
+    blanks = [blank for group in rectangles.values() for blank in group]
+    if not blanks or _has_duplicates(blanks):
+        return packing(length, width, rectangles, **kwargs)
+    key = (length, width, params, _items(rectangles))
+    entry = cache.get(key)
+    if entry is None:
+        packed = result, total_len, total_width, tailings = packing(
+            length, width, rectangles, **kwargs
+        )
+        indexes = {id(blank): index for index, blank in enumerate(blanks)}
+        placed = [
+            (
+                priority,
+                [
+                    (type(item), indexes.get(id(item.rectangle)), item.x, item.y)
+                    for item in items
+                ]
+            )
+            for priority, items in result.items()
+        ]
+        remaining = {
+            priority: [indexes.get(id(blank)) for blank in group]
+            for priority, group in rectangles.items()
+        }
+        if any(index is None for _, items in placed for _, index, *_ in items) \
+                or any(None in group for group in remaining.values()):
+            # результат нельзя связать с заготовками набора
+            return packed
+        states = [
+            (b.length, b.width, getattr(b, 'direction', None)) for b in blanks
+        ]
+        entry = (
+            placed, total_len, total_width, deepcopy(tailings), remaining,
+            states
+        )
+        cache.put(key, entry, nbytes=len(pickle.dumps(entry)))
+        return packed
+
+    placed, total_len, total_width, tailings, remaining, states = entry
+    for blank, state in zip(blanks, states):
+        if (blank.length, blank.width, getattr(blank, 'direction', None)) != state:
+            blank.rotate()
+    result = {
+        priority: [cls(blanks[index], x, y) for cls, index, x, y in items]
+        for priority, items in placed
+    }
+    for priority, group in rectangles.items():
+        group[:] = [blanks[index] for index in remaining[priority]]
+    return result, total_len, total_width, deepcopy(tailings)
+
+
+def cached_ph_bpp(length, width, rectangles, x0=0., y0=0.,
+                  first_priority=False, allowance=0):
+    """Алгоритм приоритетной эвристики с кэшированием результатов
+
+    Параметры и результат такие же, как у :func:`ph.ph_bpp`. Ключ
+    кэша -- размеры контейнера, начальные координаты, параметры
+    упаковки и последовательность заготовок набора (как
+    в :func:`cached_bpp_ts`).
+    """
+    return _cached_packing(
+        PH_BPP_CACHE, ph_bpp, (x0, y0, first_priority, allowance),
+        length, width, rectangles, x0=x0, y0=y0,
+        first_priority=first_priority, allowance=allowance
+    )
+
+
+def cached_tsh_ph_bpp(length, width, rectangles, x0=0., y0=0., allowance=0,
+                      first_priority=False, sorting='width', soft_type=None,
+                      k=0):
+    """Алгоритм приоритетной эвристики (tsh) с кэшированием результатов
+
+    Параметры и результат такие же, как у :func:`tsh.ph.ph_bpp`.
+    Используется в :func:`cached_bpp_ts` для заполнения пустых областей.
+    """
+    return _cached_packing(
+        TSH_PH_BPP_CACHE, tsh_ph_bpp,
+        (x0, y0, allowance, first_priority, sorting, soft_type, k),
+        length, width, rectangles, x0=x0, y0=y0, allowance=allowance,
+        first_priority=first_priority, sorting=sorting, soft_type=soft_type,
+        k=k
+    )
+
+
+def cached_bpp_ts(length, width, height, g_height, rectangles,
+                  last_rolldir=None, first_priority=False, x_hem=(0, 0),
+                  y_hem=(0, 0), allowance=0, max_size=None,
+                  is_visualize=False):
+    """Алгоритм раскроя в две стороны с кэшированием результатов
+
+    Параметры и результат такие же, как у :func:`tsh.bpp_ts.bpp_ts`,
+    в том числе изменение набора ``rectangles`` (поворот заготовок,
+    порядок и удаление размещенных). Ключ кэша -- размеры листа,
+    толщины, параметры раскроя и последовательность заготовок набора
+    (размеры, направление, приоритет). Имена заготовок в ключ
+    не входят: учитывается только то, какие из заготовок имеют
+    одинаковые имена. Порядок заготовок входит в ключ, так как
+    от него зависит выбор среди заготовок с равными диагоналями.
+
+    При попадании в кэш возвращается копия сохраненного результата,
+    в которой размещенные заготовки заменены копиями заготовок
+    переданного набора.
+    """
+    blanks = [blank for group in rectangles.values() for blank in group]
+    # набор может содержать один и тот же объект несколько раз, такой
+    # результат нельзя связать с заготовками другого набора
+    if is_visualize or not blanks or _has_duplicates(blanks):
+        return bpp_ts(
+            length, width, height, g_height, rectangles, last_rolldir,
+            first_priority=first_priority, x_hem=x_hem, y_hem=y_hem,
+            allowance=allowance, max_size=max_size,
+            is_visualize=is_visualize
+        )
+    key = (
+        length, width, height, g_height, _items(rectangles),
+        getattr(last_rolldir, 'value', last_rolldir), first_priority,
+        tuple(x_hem), tuple(y_hem), allowance,
+        tuple(max_size) if max_size is not None else None
+    )
+    entry = BPP_TS_CACHE.get(key)
+    if entry is None:
+        # размещенные заготовки -- копии заготовок набора, индекс
+        # копируется вместе с заготовкой
+        for index, blank in enumerate(blanks):
+            blank._cache_index = index
+        try:
+            src_rect, main_region, min_rect, result, unplaced, tailings = bpp_ts(
+                length, width, height, g_height, rectangles, last_rolldir,
+                first_priority=first_priority, x_hem=x_hem, y_hem=y_hem,
+                allowance=allowance, max_size=max_size,
+                packing=cached_tsh_ph_bpp
+            )
+        finally:
+            for blank in blanks:
+                del blank._cache_index
+        placed = [
+            item.rectangle.__dict__.pop('_cache_index', None) for item in result
+        ]
+        indexes = {id(blank): index for index, blank in enumerate(blanks)}
+        unplaced_index = [indexes.get(id(blank)) for blank in unplaced]
+        remaining = {
+            priority: [indexes.get(id(blank)) for blank in group]
+            for priority, group in rectangles.items()
+        }
+        if None in placed or None in unplaced_index or any(
+                None in group for group in remaining.values()):
+            # результат нельзя связать с заготовками набора
+            return src_rect, main_region, min_rect, result, unplaced, tailings
+        states = [(b.length, b.width, b.direction) for b in blanks]
+        outputs = deepcopy((src_rect, main_region, min_rect, result, tailings))
+        entry = outputs, placed, unplaced_index, remaining, states
+        BPP_TS_CACHE.put(key, entry, nbytes=len(pickle.dumps(entry)))
+        return src_rect, main_region, min_rect, result, unplaced, tailings
+
+    outputs, placed, unplaced_index, remaining, states = entry
+    for blank, (length, width, direction) in zip(blanks, states):
+        if (blank.length, blank.width, blank.direction) != (length, width, direction):
+            blank.rotate()
+    src_rect, main_region, min_rect, result, tailings = deepcopy(outputs)
+    for item, index in zip(result, placed):
+        rectangle = deepcopy(blanks[index])
+        if (rectangle.length, rectangle.width, rectangle.direction) != (
+                item.rectangle.length, item.rectangle.width,
+                item.rectangle.direction):
+            rectangle.rotate()
+        item.rectangle = rectangle
+    unplaced = [blanks[index] for index in unplaced_index]
+    for priority, group in rectangles.items():
+        group[:] = [blanks[index] for index in remaining[priority]]
+    return src_rect, main_region, min_rect, result, unplaced, tailings
@@ -0,0 +1,222 @@
+"""Контрольные точки построения деревьев раскроя
+
+Контрольная точка -- каталог с файлами:
+
+* ``version.txt`` -- версия формата точки (:func:`format_version`);
+* ``state.bin`` -- параметры и состояние построения (счетчики,
+  состояние генератора случайных чисел, счетчик ID узлов);
+* ``frontier.bin`` -- частично построенные деревья в порядке раскрытия;
+* ``shared.bin`` -- общие для деревьев объекты (см.
+  :class:`serialize.SharedObjects`).
+
+Построенные деревья дописываются по мере построения в файл
+``<каталог>.results`` рядом с каталогом точки (:func:`add_result`),
+а в состоянии хранится их количество на момент записи точки.
+
+Деревья записываются по одному (:mod:`serialize`), поэтому для записи
+и чтения контрольной точки не нужно держать в памяти весь уровень,
+выгруженный на диск (:class:`frontier.FrontierStore`), и построенные
+деревья.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import marshal
+import shutil
+import struct
+import sys
+import zlib
+from hashlib import blake2b
+from pathlib import Path
+
+from .frontier import read_records, write_records
+from .serialize import CLASSES, FORMAT_VERSION, SharedObjects, dumps, loads
+
+
+# Версия формата контрольной точки (изменяется при изменении состава
+# файлов или состояния построения)
+CHECKPOINT_VERSION = 2
+
+VERSION = 'version.txt'
+STATE = 'state.bin'
+FRONTIER = 'frontier.bin'
+SHARED = 'shared.bin'
+RESULTS_SUFFIX = '.results'
+
+
+# Ошибки при восстановлении записей, записанных другой версией или
+# поврежденных
+_DECODE_ERRORS = (
+    ValueError, TypeError, KeyError, IndexError, EOFError, struct.error,
+    zlib.error
+)
+
+
+class CheckpointError(ValueError):
+    """Контрольная точка повреждена или записана другой версией"""
+
+
+def format_version() -> str:
+    """Версия формата контрольной точки
+
+    Включает версии форматов точки и сериализации, версию marshal
+    (формат marshal не переносим между версиями Python), версию Python
+    и таблицу классов :data:`serialize.CLASSES`.
+
+    :rtype: str
+    """
+    classes = ','.join(
+        f'{cls.__module__}.{cls.__qualname__}' for cls in CLASSES
+    )
+    digest = blake2b(classes.encode(), digest_size=8).hexdigest()
+    return '.'.join(map(str, (
+        CHECKPOINT_VERSION, FORMAT_VERSION, marshal.version,
+        *sys.version_info[:2], digest
+    )))
+
+
+def save(path, state, frontier) -> None:
+    """Запись контрольной точки
+
+    Точка сначала записывается во временный каталог, который затем
+    заменяет предыдущую точку, поэтому прерванная запись не портит
+    ее.
+
+    :param path: Каталог контрольной точки
+    :type path: str или Path
+    :param state: Состояние построения (без деревьев), в том числе
+                  количество построенных деревьев, добавленных
+                  :func:`add_result` (``state['results']``)
+    :type state: dict
+    :param frontier: Частично построенные деревья
+    :type frontier: FrontierStore или Iterable[Tree]
+    """
+    path = Path(path)
+    temp = path.with_name(path.name + '.tmp')
+    old = path.with_name(path.name + '.old')
+    if temp.exists():
+        shutil.rmtree(temp)
+    temp.mkdir(parents=True)
+    (temp / VERSION).write_text(format_version())
+    shared = SharedObjects()
+    # деревья, выгруженные на диск, восстанавливаются по одному
+    write_records(temp / FRONTIER, (_dumps(tree, shared) for tree in frontier))
+    (temp / STATE).write_bytes(dumps(state))
+    # реестр пополняется при записи деревьев, поэтому пишется последним
+    (temp / SHARED).write_bytes(dumps(list(shared)))
+    if path.exists():
+        if old.exists():
+            shutil.rmtree(old)
+        path.rename(old)
+    temp.rename(path)
+    if old.exists():
+        shutil.rmtree(old)
+
+
+def add_result(path, tree) -> None:
+    """Добавление построенного дерева к контрольной точке
+
+    Дерево дописывается в файл построенных деревьев без реестра общих
+    объектов, поэтому в памяти не остается ничего.
+
+    :param path: Каталог контрольной точки
+    :type path: str или Path
+    :param tree: Построенное дерево
+    :type tree: Tree
+    """
+    results = _results(Path(path))
+    results.parent.mkdir(parents=True, exist_ok=True)
+    write_records(results, [dumps(tree)], append=True)
+
+
+def load(path):
+    """Чтение контрольной точки
+
+    Построенные деревья, добавленные после записи точки, удаляются
+    из файла: они будут построены заново.
+
+    :param path: Каталог контрольной точки
+    :type path: str или Path
+    :raises FileNotFoundError: если контрольной точки нет
+    :raises CheckpointError: если точка записана другой версией или
+                             повреждена (для деревьев -- при их
+                             восстановлении)
+    :return: Состояние построения, частично построенные деревья
+             и построенные деревья (восстанавливаются по мере перебора)
+    :rtype: tuple[dict, Iterator[Tree], Iterator[Tree]]
+    """
+    results_path = _results(Path(path))
+    path = _existing(Path(path))
+    version = None
+    if (path / VERSION).exists():
+        version = (path / VERSION).read_text()
+    if version != format_version():
+        raise CheckpointError(
+            f'Контрольная точка {path} записана другой версией ({version})'
+        )
+    try:
+        shared = SharedObjects()
+        for obj in loads((path / SHARED).read_bytes()):
+            shared.add(obj)
+        state = loads((path / STATE).read_bytes())
+        count = state['results']
+        records = read_records(results_path)[:count] if count else []
+        if len(records) != count:
+            raise CheckpointError(
+                f'Файл построенных деревьев {results_path} неполон'
+            )
+        frontier = read_records(path / FRONTIER)
+    except (FileNotFoundError, *_DECODE_ERRORS) as error:
+        raise CheckpointError(f'Контрольная точка {path} повреждена') from error
+    write_records(results_path, records)
+    return state, _decode(frontier, shared, path), _decode(records, None, path)
+
+
+def exists(path) -> bool:
+    """Есть ли контрольная точка"""
+    try:
+        _existing(Path(path))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def remove(path) -> None:
+    """Удаление контрольной точки"""
+    path = Path(path)
+    for item in (path, path.with_name(path.name + '.old'),
+                 path.with_name(path.name + '.tmp')):
+        if item.exists():
+            shutil.rmtree(item)
+    _results(path).unlink(missing_ok=True)
+
+
+def _existing(path):
+    # запись могла прерваться между заменой каталогов
+    for item in (path, path.with_name(path.name + '.old')):
+        if (item / SHARED).exists():
+            return item
+    raise FileNotFoundError(f'Контрольная точка {path} не найдена')
+
+
+def _decode(records, shared, path):
+    for data in records:
+        try:
+            tree = loads(data, shared)
+        except _DECODE_ERRORS as error:
+            raise CheckpointError(
+                f'Контрольная точка {path} повреждена'
+            ) from error
+        yield tree
+
+
+def _results(path):
+    return path.with_name(path.name + RESULTS_SUFFIX)
+
+
+def _dumps(tree, shared):
+    shared.add_tree(tree)
+    return dumps(tree, shared)
@@ -1,5 +1,5 @@
 from operator import itemgetter
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 
 from .support import dfs
 from .tree import Operations, Tree, is_cc_node, is_rolling_node, solution_efficiency
@@ -65,6 +65,92 @@ def choose_tree(trees: List[Tree], aspect_ratio=10) -> Tuple[Tree, float]:
     return best
 
 
+class TreeSelector:
+    """Потоковый выбор дерева по критериям :func:`choose_tree`
+
+    Деревья добавляются по одному, а хранятся только те, которые еще
+    могут быть выбраны: для каждого количества прокатов -- самое
+    эффективное дерево, если нет дерева с меньшим (или тем же)
+    количеством прокатов и не меньшей эффективностью, и если его
+    эффективность не ниже максимальной более чем на ``tolerance``.
+    Поэтому объем памяти ограничен количеством различных значений
+    количества прокатов, а выбор совпадает с :func:`choose_tree` для
+    тех же деревьев в том же порядке.
+
+    :param aspect_ratio: Максимальное соотношение сторон, defaults to 10
+    :type aspect_ratio: float, optional
+    :param tolerance: Допуск по эффективности, defaults to 0.02
+    :type tolerance: float, optional
+    """
+
+    def __init__(self, aspect_ratio=10, tolerance=0.02) -> None:
+        self.aspect_ratio = aspect_ratio
+        self.tolerance = tolerance
+        self.count = 0
+        self.max_efficiency = None
+        # (количество прокатов, эффективность, дерево) по возрастанию
+        # количества прокатов и эффективности
+        self._front = []
+
+    def add(self, tree: Tree) -> None:
+        """Добавление построенного дерева"""
+        efficiency = solution_efficiency(
+            tree.root, list(dfs(tree.root)), tree.main_kit,
+            max_aspect_ratio=self.aspect_ratio, nd=True, is_p=True
+        )
+        self.count += 1
+        if self.max_efficiency is None or efficiency > self.max_efficiency:
+            self.max_efficiency = efficiency
+        threshold = self.max_efficiency - self.tolerance
+        rolling = number_rolling(tree.root)
+        if efficiency >= threshold and not any(
+            item[0] <= rolling and item[1] >= efficiency
+            for item in self._front
+        ):
+            self._front = [
+                item for item in self._front
+                if not (item[0] >= rolling and item[1] <= efficiency)
+            ]
+            self._front.append((rolling, efficiency, tree))
+            self._front.sort(key=itemgetter(0))
+        self._front = [
+            item for item in self._front if item[1] >= threshold
+        ]
+
+    def update(self, other: 'TreeSelector') -> None:
+        """Добавление деревьев другого выбора
+
+        Отброшенные в нем деревья не могут быть выбраны и среди
+        деревьев обоих выборов, поэтому результат совпадает
+        с добавлением всех деревьев по одному.
+        """
+        count = self.count + other.count
+        for _, _, tree in other._front:
+            self.add(tree)
+        self.count = count
+
+    def __len__(self) -> int:
+        return len(self._front)
+
+    def best(self) -> Tuple[Tree, float]:
+        """Выбранное дерево и его эффективность
+
+        :raises ValueError: если не добавлено ни одного дерева
+        """
+        if not self._front:
+            raise ValueError('Нет деревьев для выбора')
+        _, efficiency, tree = self._front[0]
+        return tree, efficiency
+
+
+def choose_tree_iter(trees: Iterable[Tree], aspect_ratio=10) -> Tuple[Tree, float]:
+    """Выбор дерева из потока деревьев (см. :class:`TreeSelector`)"""
+    selector = TreeSelector(aspect_ratio=aspect_ratio)
+    for tree in trees:
+        selector.add(tree)
+    return selector.best()
+
+
 def number_rolling(root) -> int:
     """Количество прокатов"""
     number = 0
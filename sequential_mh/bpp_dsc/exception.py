@@ -43,3 +43,7 @@ class KitError(BPPError):
 
 class DirectionError(BPPError):
     """Ошибки направлений"""
+
+
+class ForcedTermination(BPPError):
+    """Принудительное завершение построения"""
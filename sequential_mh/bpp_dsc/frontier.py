@@ -0,0 +1,171 @@
+"""Очередь частично построенных деревьев с выгрузкой на диск
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import os
+import struct
+from collections import deque
+from tempfile import TemporaryDirectory
+
+from .serialize import SharedObjects, dumps, loads
+
+
+_LENGTH = struct.Struct('<I')
+
+
+def write_records(path, records, append=False) -> None:
+    """Запись последовательности записей (bytes) в файл
+
+    :param append: Дописать записи в конец файла, defaults to False
+    :type append: bool, optional
+    """
+    with open(path, 'ab' if append else 'wb') as file:
+        for data in records:
+            file.write(_LENGTH.pack(len(data)))
+            file.write(data)
+
+
+def read_records(path):
+    """Чтение записей, записанных :func:`write_records`
+
+    :return: Записи в порядке записи
+    :rtype: list[bytes]
+    """
+    with open(path, 'rb') as file:
+        content = file.read()
+    records = []
+    offset = 0
+    while offset < len(content):
+        (size,) = _LENGTH.unpack_from(content, offset)
+        offset += _LENGTH.size
+        records.append(content[offset:offset + size])
+        offset += size
+    return records
+
+
+class FrontierStore:
+    """Очередь деревьев (FIFO), выгружающая деревья на диск
+
+    Пока в памяти меньше ``max_in_memory`` деревьев, они хранятся
+    как есть. После этого новые деревья сериализуются
+    (:mod:`serialize`) и записываются во временный каталог файлами
+    по ``chunk_size`` деревьев. Когда деревья в памяти заканчиваются,
+    в память загружается самый старый файл, поэтому порядок выдачи
+    деревьев совпадает с порядком добавления.
+
+    Разделяемые между копиями части деревьев (см. Tree.__copy__)
+    не записываются, а остаются в памяти в реестре
+    :class:`serialize.SharedObjects`. У каждого файла свой реестр,
+    который удаляется после загрузки файла, поэтому извлеченные
+    деревья не удерживаются очередью.
+
+    :param max_in_memory: Максимальное количество деревьев в памяти,
+                          defaults to 1000
+    :type max_in_memory: int, optional
+    :param chunk_size: Количество деревьев в одном файле,
+                       defaults to 100
+    :type chunk_size: int, optional
+    :param directory: Каталог для временных файлов, defaults to None
+                      (системный временный каталог)
+    :type directory: str, optional
+    """
+    def __init__(self, max_in_memory=1000, chunk_size=100,
+                 directory=None) -> None:
+        if max_in_memory < 1 or chunk_size < 1:
+            raise ValueError('Размеры очереди должны быть положительными')
+        self.max_in_memory = max_in_memory
+        self.chunk_size = min(chunk_size, max_in_memory)
+        self.spilled = 0
+        self._head = deque()
+        # записи еще не выгруженного файла и их реестр
+        self._tail = []
+        self._tail_shared = SharedObjects()
+        # выгруженные файлы и их реестры
+        self._chunks = deque()
+        self._n_chunks = 0
+        self._length = 0
+        self._directory = TemporaryDirectory(prefix='frontier_', dir=directory)
+
+    def append(self, tree) -> None:
+        """Добавление дерева в конец очереди"""
+        self._length += 1
+        if not self._chunks and not self._tail \
+                and len(self._head) < self.max_in_memory:
+            self._head.append(tree)
+            return
+        self._tail_shared.add_tree(tree)
+        self._tail.append(dumps(tree, self._tail_shared))
+        self.spilled += 1
+        if len(self._tail) >= self.chunk_size:
+            self._flush()
+
+    def popleft(self):
+        """Извлечение дерева из начала очереди
+
+        :raises IndexError: если очередь пуста
+        """
+        if not self._head:
+            self._load()
+        tree = self._head.popleft()
+        self._length -= 1
+        return tree
+
+    def __iter__(self):
+        """Деревья очереди в порядке выдачи (без извлечения)
+
+        Выгруженные деревья восстанавливаются по одному.
+
+        :rtype: Iterator[Tree]
+        """
+        yield from self._head
+        for path, shared in self._chunks:
+            for data in read_records(path):
+                yield loads(data, shared)
+        for data in self._tail:
+            yield loads(data, self._tail_shared)
+
+    def close(self) -> None:
+        """Удаление временных файлов"""
+        self._head.clear()
+        self._tail = []
+        self._tail_shared = SharedObjects()
+        self._chunks.clear()
+        self._length = 0
+        self._directory.cleanup()
+
+    def _flush(self) -> None:
+        path = os.path.join(
+            self._directory.name, f'{self._n_chunks:08d}.frontier'
+        )
+        write_records(path, self._tail)
+        self._chunks.append((path, self._tail_shared))
+        self._n_chunks += 1
+        self._tail = []
+        self._tail_shared = SharedObjects()
+
+    def _load(self) -> None:
+        if self._chunks:
+            path, shared = self._chunks.popleft()
+            records = read_records(path)
+            os.remove(path)
+        else:
+            records, shared = self._tail, self._tail_shared
+            self._tail = []
+            self._tail_shared = SharedObjects()
+        self._head.extend(loads(data, shared) for data in records)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
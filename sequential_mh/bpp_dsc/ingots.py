@@ -0,0 +1,329 @@
+"""Раскрой нескольких слитков заказа
+
+Слитки разных сплавов не зависят друг от друга и раскраиваются
+параллельно в отдельных процессах. Слитки одного сплава раскраиваются
+по очереди: набор заготовок очередного слитка -- это заготовки,
+не размещенные на предыдущих слитках.
+
+В спекулятивном режиме следующий слиток того же сплава раскраивается
+одновременно с текущим, а размещенные на текущем слитке заготовки
+предсказываются (:func:`predict_placed`). Если после раскроя текущего
+слитка набор размещенных заготовок совпал с предсказанным, результат
+следующего слитка принимается, иначе он отбрасывается и слиток
+раскраивается заново.
+
+Заготовки задаются списком кортежей (длина, ширина, толщина,
+приоритет, направление, имя, количество), сгруппированных по имени
+сплава, как в приложении.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import copy
+import math
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+
+from .exception import BPPError
+from .progress import CancelToken, Progress
+from .rectangle import Bin, Blank, Kit
+from .support import dfs
+from .tree import BinNode, Tree, solution_efficiency
+
+
+# Слиток: ключ (любой объект для сопоставления с результатом),
+# размеры (длина, ширина, толщина) и материал
+IngotTask = namedtuple('IngotTask', ('key', 'size', 'material'))
+# Результат раскроя слитка: дерево и эффективность (None, если раскрой
+# не получен, тогда в error сообщение об ошибке), размещенные заготовки
+# и признак подтвержденного спекулятивного раскроя
+IngotResult = namedtuple(
+    'IngotResult',
+    ('key', 'tree', 'efficiency', 'placed', 'error', 'speculative')
+)
+
+
+def create_kit(details, material, exclude=None):
+    """Создание набора заготовок
+
+    :param details: Заготовки в виде списка кортежей (length, width,
+                    height, priority, direction, name, amount)
+    :type details: list[tuple]
+    :param material: Материал
+    :type material: Material
+    :param exclude: Заготовки, которые нужно исключить, в формате
+                    {имя_заготовки: количество} (имена как у
+                    :class:`rectangle.Blank`, с толщиной),
+                    defaults to None
+    :type exclude: dict, optional
+    :return: Набор заготовок
+    :rtype: Kit
+    """
+    items = []
+    if exclude is None:
+        exclude = {}
+    for detail in details:
+        blank = Blank(*detail[:4], direction=detail[4], material=material)
+        blank.name = detail[-2]
+        items.append((blank, detail[-1] - exclude.get(blank_name(detail), 0)))
+    kit = Kit.from_counts(items)
+    kit.sort('width')
+    return kit
+
+
+def remaining(details, exclude=None):
+    """Количество заготовок, оставшихся после исключения
+
+    :param details: Заготовки в виде списка кортежей
+    :type details: list[tuple]
+    :param exclude: Исключаемые заготовки, defaults to None
+    :type exclude: dict, optional
+    :rtype: int
+    """
+    exclude = exclude or {}
+    return sum(
+        max(detail[-1] - exclude.get(blank_name(detail), 0), 0)
+        for detail in details
+    )
+
+
+def blank_name(detail):
+    """Имя заготовки с толщиной (см. :attr:`rectangle.Blank.name`)
+
+    :param detail: Заготовка в виде кортежа
+    :type detail: tuple
+    :rtype: str
+    """
+    return f'{detail[2]}_{detail[-2]}'
+
+
+def placed_blanks(tree):
+    """Размещенные на картах раскроя заготовки
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :return: Количество размещенных заготовок по именам
+    :rtype: Counter
+    """
+    return Counter(
+        blank.name for leave in tree.root.cc_leaves for blank in leave.placed
+    )
+
+
+def predict_placed(size, details, exclude=None, fill=0.8):
+    """Предсказание заготовок, которые будут размещены на слитке
+
+    Заготовки выбираются в порядке приоритета (внутри приоритета --
+    от больших к меньшим) до заполнения доли ``fill`` объема слитка.
+
+    :param size: Размеры слитка (длина, ширина, толщина)
+    :type size: tuple[number, number, number]
+    :param details: Заготовки в виде списка кортежей
+    :type details: list[tuple]
+    :param exclude: Уже размещенные заготовки, defaults to None
+    :type exclude: dict, optional
+    :param fill: Ожидаемая доля объема слитка, занятая заготовками,
+                 defaults to 0.8
+    :type fill: float, optional
+    :return: Количество размещенных заготовок по именам
+    :rtype: Counter
+    """
+    exclude = exclude or {}
+    free = math.prod(size) * fill
+    placed = Counter()
+    items = sorted(
+        details, key=lambda detail: (detail[3], -math.prod(detail[:3]))
+    )
+    for detail in items:
+        volume = math.prod(detail[:3])
+        name = blank_name(detail)
+        for _ in range(detail[-1] - exclude.get(name, 0)):
+            if volume > free:
+                break
+            free -= volume
+            placed[name] += 1
+    return placed
+
+
+def solve_ingot(solver, size, material, details, exclude=None,
+                restrictions=None, token=None, checkpoint=None):
+    """Раскрой одного слитка
+
+    :param solver: Решатель
+    :type solver: Solver
+    :param size: Размеры слитка (длина, ширина, толщина)
+    :type size: tuple[number, number, number]
+    :param material: Материал
+    :type material: Material
+    :param details: Заготовки в виде списка кортежей
+    :type details: list[tuple]
+    :param exclude: Заготовки, размещенные на других слитках,
+                    defaults to None
+    :type exclude: dict, optional
+    :param restrictions: Ограничения, defaults to None
+    :type restrictions: dict, optional
+    :param token: Флаг отмены, defaults to None
+    :type token: CancelToken, optional
+    :param checkpoint: Каталог контрольных точек, defaults to None
+    :type checkpoint: Path, optional
+    :raises BPPError: если раскрой не получен
+    :raises ForcedTermination: если раскрой был отменен
+    :return: Дерево раскроя и его эффективность
+    :rtype: tuple[Tree, float]
+    """
+    kit = create_kit(details, material, exclude)
+    tree = Tree(BinNode(Bin(*size, material=material), kit=kit))
+    progress = Progress(token=token) if token is not None else None
+    tree = solver.stmh_idrd(
+        tree, restrictions=restrictions, progress=progress,
+        checkpoint=checkpoint
+    )
+    efficiency = solution_efficiency(
+        tree.root, list(dfs(tree.root)), tree.main_kit, is_total=True
+    )
+    return tree, efficiency
+
+
+def solve_ingots(tasks, details, restrictions, solver, placed=None,
+                 workers=None, speculative=False, predict=predict_placed,
+                 progress=None, checkpoint=None):
+    """Раскрой слитков
+
+    Слитки одного сплава раскраиваются в порядке ``tasks``. Если для
+    очередного слитка не осталось заготовок, остальные слитки этого
+    сплава пропускаются (результаты для них не возвращаются).
+
+    :param tasks: Слитки
+    :type tasks: Iterable[IngotTask]
+    :param details: Заготовки по именам сплавов
+    :type details: dict[str, list[tuple]]
+    :param restrictions: Ограничения (копируются для каждого слитка)
+    :type restrictions: dict
+    :param solver: Решатель
+    :type solver: Solver
+    :param placed: Заготовки, уже размещенные на других слитках,
+                   по именам сплавов, defaults to None
+    :type placed: dict[str, Counter], optional
+    :param workers: Количество процессов, defaults to None (по
+                    количеству процессоров)
+    :type workers: int, optional
+    :param speculative: Раскраивать следующий слиток того же сплава
+                        одновременно с текущим, defaults to False
+    :type speculative: bool, optional
+    :param predict: Функция предсказания размещенных заготовок
+                    с параметрами (размеры слитка, заготовки,
+                    исключаемые заготовки), defaults to
+                    :func:`predict_placed`
+    :type predict: Callable, optional
+    :param progress: Прогресс (количество раскроенных слитков) и флаг
+                     отмены, defaults to None
+    :type progress: progress.Progress, optional
+    :param checkpoint: Каталог контрольных точек, defaults to None
+    :type checkpoint: Path, optional
+    :raises ForcedTermination: если раскрой был отменен
+    :return: Результаты раскроя слитков (по мере получения)
+    :rtype: Iterator[IngotResult]
+    """
+    groups = {}
+    for task in tasks:
+        groups.setdefault(task.material.name, []).append(task)
+    placed = {
+        name: +Counter((placed or {}).get(name, {})) for name in groups
+    }
+    if progress:
+        progress.set_total(sum(len(group) for group in groups.values()))
+        progress.message('Раскрой слитков...')
+
+    with Manager() as manager, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        token = CancelToken.shared(manager)
+
+        def submit(task, exclude, token_=token):
+            return executor.submit(
+                solve_ingot, solver, task.size, task.material,
+                details[task.material.name], exclude,
+                copy.deepcopy(restrictions), token_, checkpoint
+            )
+
+        def discard(future, token_):
+            # уже запущенный раскрой не отменяется через future,
+            # поэтому останавливается собственным флагом
+            future.cancel()
+            token_.cancel()
+
+        # для каждого сплава: индекс текущего слитка и его раскрой,
+        # спекулятивный раскрой следующего слитка с собственным
+        # флагом отмены
+        index = dict.fromkeys(groups, 0)
+        current = {}
+        ahead = {}
+
+        def start(name):
+            group, i = groups[name], index[name]
+            exclude = placed[name]
+            future, predicted, own = ahead.pop(name, (None, None, None))
+            if i >= len(group) or not remaining(details[name], exclude):
+                if future is not None:
+                    discard(future, own)
+                current.pop(name, None)
+                return
+            is_speculative = future is not None and predicted == exclude
+            if not is_speculative:
+                if future is not None:
+                    discard(future, own)
+                future = submit(group[i], exclude)
+            current[name] = future, is_speculative
+            if speculative and i + 1 < len(group):
+                predicted = exclude + predict(group[i].size, details[name], exclude)
+                if remaining(details[name], predicted):
+                    own = CancelToken.shared(manager, parent=token)
+                    ahead[name] = (
+                        submit(group[i + 1], predicted, own), predicted, own
+                    )
+
+        for name in groups:
+            start(name)
+        done = 0
+        try:
+            while current:
+                futures = {future: name for name, (future, _) in current.items()}
+                finished, _ = wait(
+                    futures, timeout=0.1 if progress else None,
+                    return_when=FIRST_COMPLETED
+                )
+                if progress:
+                    # окно прогресса опрашивается и во время ожидания
+                    progress.flush()
+                    progress.check()
+                for future in finished:
+                    name = futures[future]
+                    task = groups[name][index[name]]
+                    try:
+                        tree, efficiency = future.result()
+                    except BPPError as error:
+                        result = IngotResult(
+                            task.key, None, None, Counter(), str(error),
+                            current[name][1]
+                        )
+                    else:
+                        result = IngotResult(
+                            task.key, tree, efficiency, placed_blanks(tree),
+                            None, current[name][1]
+                        )
+                    placed[name] = +(placed[name] + result.placed)
+                    index[name] += 1
+                    start(name)
+                    done += 1
+                    if progress:
+                        progress.value = done
+                    yield result
+        finally:
+            token.cancel()
+            for future, _ in current.values():
+                future.cancel()
+            for future, _, own in ahead.values():
+                discard(future, own)
@@ -2,6 +2,7 @@ import sys
 from collections import namedtuple
 
 from .rectangle import PackedBlank
+from ..tsh.ph import place_strip, pop_rectangle
 
 # PackedBlank = namedtuple('PackedBlank', ('blank', 'x', 'y'))
 Tailing = namedtuple('Tailing', ('x', 'y', 'length', 'width'))
@@ -47,6 +48,32 @@ def ph_bpp(length, width, rectangles, x0=0., y0=0., first_priority=False,
 
 def recursive_packing(x, y, length, width, rectangles, result, tailings,
                       first_priority=False, allowance=0):
+    """Упаковка области
+
+    Области, на которые делится контейнер после размещения заготовок,
+    хранятся в стеке и упаковываются в том же порядке, что и при
+    рекурсивном обходе (глубина рекурсии не ограничивает количество
+    размещаемых заготовок).
+    """
+    stack = [(x, y, length, width, first_priority, allowance)]
+    while stack:
+        x, y, length, width, first_priority, allowance = stack.pop()
+        regions = pack_region(
+            x, y, length, width, rectangles, result, tailings,
+            first_priority=first_priority, allowance=allowance
+        )
+        # первая из областей должна оказаться на вершине стека
+        stack.extend(reversed(regions))
+
+
+def pack_region(x, y, length, width, rectangles, result, tailings,
+                first_priority=False, allowance=0):
+    """Размещение заготовки в области
+
+    :return: Оставшиеся области в порядке упаковки в виде кортежей
+             (x, y, length, width, first_priority, allowance)
+    :rtype: list[tuple]
+    """
     variant, best, priorities = [], [], []
     if first_priority:
         priorities.append(first_priority)
@@ -60,23 +87,33 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
             variant.append(v)
             best.append(b)
 
+    # припуск в следующие области не передается
+    regions = []
     for i, priority in enumerate(priorities):  # number_groups
         if variant[i] < 5:
             d, omega = best[i].size[:-1]
             if priority not in result:
                 result[priority] = []
             result[priority].append(PackedBlank(best[i], x, y))
-            rectangles[priority].remove(best[i])
+            index = pop_rectangle(rectangles[priority], best[i])
             if variant[i] == 2:
-                recursive_packing(
+                new_x, new_y, new_length, new_width = place_strip(
                     x, y + d, length - d, width, rectangles, result,
-                    tailings, first_priority=first_priority
+                    tailings, priority, index, variant[i], first_priority,
+                    advance_length, packed=PackedBlank
+                )
+                regions.append(
+                    (new_x, new_y, new_length, new_width, first_priority, 0)
                 )
             elif variant[i] == 3:
-                recursive_packing(
+                new_x, new_y, new_length, new_width = place_strip(
                     x + omega + allowance, y, length,
                     width - omega - allowance, rectangles, result,
-                    tailings, first_priority=first_priority
+                    tailings, priority, index, variant[i], first_priority,
+                    advance_width, packed=PackedBlank
+                )
+                regions.append(
+                    (new_x, new_y, new_length, new_width, first_priority, 0)
                 )
             elif variant[i] == 4:
                 min_w = min_l = sys.maxsize
@@ -88,38 +125,49 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                 min_l = min_w
                 if width - omega < min_w:
                     tailings.append(Tailing(x + omega, y, d, width - omega))
-                    recursive_packing(
-                        x, y + d + allowance, length - d - allowance, width, rectangles, result,
-                        tailings, first_priority=first_priority
-                    )
+                    regions.append((
+                        x, y + d + allowance, length - d - allowance, width,
+                        first_priority, 0
+                    ))
                 elif length - d < min_l:
                     tailings.append(Tailing(x, y + d, length - d, omega))
-                    recursive_packing(
+                    regions.append((
                         x + omega + allowance, y, length,
-                        width - omega - allowance, rectangles,
-                        result, tailings, first_priority=first_priority
-                    )
+                        width - omega - allowance, first_priority, 0
+                    ))
                 elif omega < min_w:
-                    recursive_packing(
+                    regions.append((
                         x + omega + allowance, y, d, width - omega - allowance,
-                        rectangles, result, tailings
-                    )
-                    recursive_packing(
+                        False, 0
+                    ))
+                    regions.append((
                         x, y + d + allowance, length - d - allowance, width,
-                        rectangles, result,
-                        tailings, first_priority=first_priority
-                    )
+                        first_priority, 0
+                    ))
                 else:
-                    recursive_packing(
+                    regions.append((
                         x, y + d + allowance, length - d - allowance, omega,
-                        rectangles, result, tailings
-                    )
-                    recursive_packing(
+                        False, 0
+                    ))
+                    regions.append((
                         x + omega + allowance, y, length,
-                        width - omega - allowance, rectangles,
-                        result, tailings, first_priority=first_priority
-                    )
+                        width - omega - allowance, first_priority, 0
+                    ))
             break
+    return regions
+
+
+# Области после размещения прямоугольника для place_strip: следующие
+# шаги полосы -- следующие области, в которые припуск не передается
+
+def advance_length(x, y, length, width, rectangle, tailings):
+    d = rectangle.size[0]
+    return x, y + d, length - d, width
+
+
+def advance_width(x, y, length, width, rectangle, tailings):
+    omega = rectangle.size[1]
+    return x + omega, y, length, width - omega
 
 
 def get_best_fig(length, width, rectangles):
@@ -7,12 +7,13 @@
 """
 
 
-from ..bpp_dsc.stm import _stmh_idrd
+from ..bpp_dsc.stm import _stmh_idrd, direction_passes
 from .tree import is_defective_tree, solution_efficiency
 from .support import dfs
 
 
-def optimal_ingot_size(main_tree, min_size, max_size, restrictions):
+def optimal_ingot_size(main_tree, min_size, max_size, restrictions,
+                       directions=None):
     """Определение размеров слитка
 
     :param main_tree: Основное дерево, содержащее слиток максимальных размеров
@@ -23,16 +24,25 @@ def optimal_ingot_size(main_tree, min_size, max_size, restrictions):
     :type max_size: tuple[number, number, number]
     :param restrictions: Ограничения
     :type restrictions: dict
+    :param directions: Направления проката для одновременных проходов
+                       построения, defaults to None (один проход)
+    :type directions: tuple[int], optional
     :raises ValueError: если построено некорректное дерево
     :return: Дерево раскроя для полученного слитка
     :rtype: Tree
     """
     min_length, min_width, min_height = min_size
 
-    trees = _stmh_idrd(
-        main_tree, restrictions=restrictions, local=False,
-        with_filter=False
-    )
+    if directions:
+        trees = direction_passes(
+            main_tree, directions, restrictions=restrictions, local=False,
+            with_filter=False
+        )
+    else:
+        trees = _stmh_idrd(
+            main_tree, restrictions=restrictions, local=False,
+            with_filter=False
+        )
 
     for tree in trees:
         # Получение смежного остатка
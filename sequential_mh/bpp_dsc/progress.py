@@ -0,0 +1,185 @@
+"""Прогресс и отмена построения без зависимости от интерфейса
+
+Построение сообщает о ходе работы через :class:`Progress` (функции
+обратного вызова с ограничением частоты обновлений), а отменяется
+флагом :class:`CancelToken`, который можно установить из другого
+потока или процесса. Окно прогресса интерфейса подключается через
+:class:`DialogProgress`.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+from threading import Event
+from time import monotonic
+
+from .exception import ForcedTermination
+
+
+class CancelToken:
+    """Флаг отмены построения
+
+    Совместим с параметром ``cancel_event`` функций :mod:`stm` (метод
+    is_set). Флаг на основе threading.Event (по умолчанию) работает
+    в пределах процесса; для передачи в другие процессы флаг
+    создается методом :meth:`shared`.
+
+    Флаг с родительским флагом считается установленным и при отмене
+    родителя, а его собственная отмена родителя не затрагивает.
+
+    :param event: Событие, defaults to None (новый threading.Event)
+    :type event: threading.Event, optional
+    :param parent: Родительский флаг, defaults to None
+    :type parent: CancelToken, optional
+    """
+    def __init__(self, event=None, parent=None) -> None:
+        self._event = Event() if event is None else event
+        self._parent = parent
+
+    @classmethod
+    def shared(cls, manager, parent=None):
+        """Флаг, который можно передавать в другие процессы
+
+        :param manager: Менеджер процессов
+        :type manager: multiprocessing.managers.SyncManager
+        :param parent: Родительский флаг (тоже общий), defaults to None
+        :type parent: CancelToken, optional
+        :rtype: CancelToken
+        """
+        return cls(manager.Event(), parent=parent)
+
+    def cancel(self) -> None:
+        """Отмена построения"""
+        self._event.set()
+
+    def is_set(self) -> bool:
+        """Была ли запрошена отмена"""
+        if self._parent is not None and self._parent.is_set():
+            return True
+        return self._event.is_set()
+
+    def check(self) -> None:
+        """Проверка отмены
+
+        :raises ForcedTermination: если была запрошена отмена
+        """
+        if self.is_set():
+            raise ForcedTermination('Процесс раскроя был прерван')
+
+
+class Progress:
+    """Прогресс построения
+
+    Объект можно передавать как ``on_step`` (количество выполненных
+    шагов). Значение накапливается при каждом вызове, а функция
+    ``on_progress`` вызывается не чаще одного раза в ``interval``
+    секунд. Тогда же опрашивается ``is_cancelled`` (например,
+    кнопка отмены окна прогресса) и при необходимости устанавливается
+    флаг :attr:`token`.
+
+    :param on_progress: Функция, принимающая текущее значение
+                        и общее количество шагов (или None),
+                        defaults to None
+    :type on_progress: Callable[[int, Optional[int]], None], optional
+    :param on_message: Функция, принимающая описание текущего этапа,
+                       defaults to None
+    :type on_message: Callable[[str], None], optional
+    :param is_cancelled: Функция без аргументов, возвращающая True,
+                         если построение нужно прервать,
+                         defaults to None
+    :type is_cancelled: Callable[[], bool], optional
+    :param token: Флаг отмены, defaults to None (новый флаг)
+    :type token: CancelToken, optional
+    :param interval: Минимальный интервал между обновлениями
+                     в секундах, defaults to 0.1
+    :type interval: float, optional
+    """
+    def __init__(self, on_progress=None, on_message=None, is_cancelled=None,
+                 token=None, interval=0.1) -> None:
+        self.on_progress = on_progress
+        self.on_message = on_message
+        self.poll = is_cancelled
+        self.token = CancelToken() if token is None else token
+        self.interval = interval
+        self.value = 0
+        self.total = None
+        self._updated = None
+
+    def __call__(self, count: int = 1) -> None:
+        self.step(count)
+
+    def step(self, count: int = 1) -> None:
+        """Выполнено ``count`` шагов"""
+        self.set_value(self.value + count)
+
+    def set_value(self, value: int) -> None:
+        """Установка текущего значения"""
+        self.value = value
+        now = monotonic()
+        if self._updated is None or now - self._updated >= self.interval:
+            self._update(now)
+
+    def set_total(self, total) -> None:
+        """Установка общего количества шагов (обновляется сразу)"""
+        self.total = total
+        self.flush()
+
+    def message(self, text: str) -> None:
+        """Описание текущего этапа построения"""
+        if self.on_message:
+            self.on_message(text)
+
+    def flush(self) -> None:
+        """Обновление без учета интервала"""
+        self._update(monotonic())
+
+    def is_cancelled(self) -> bool:
+        """Была ли запрошена отмена (с опросом источника отмены)"""
+        if not self.token.is_set() and self.poll and self.poll():
+            self.token.cancel()
+        return self.token.is_set()
+
+    def check(self) -> None:
+        """Проверка отмены
+
+        :raises ForcedTermination: если была запрошена отмена
+        """
+        self.is_cancelled()
+        self.token.check()
+
+    def _update(self, now) -> None:
+        self._updated = now
+        if self.total is not None and self.value > self.total:
+            # оценка количества шагов оказалась заниженной
+            self.total = int(self.value * 1.1)
+        if self.on_progress:
+            self.on_progress(self.value, self.total)
+        self.is_cancelled()
+
+
+class DialogProgress(Progress):
+    """Прогресс построения в окне прогресса интерфейса
+
+    Окно должно поддерживать методы setRange, setValue, setLabelText
+    и wasCanceled (например, QProgressDialog).
+
+    :param dialog: Окно прогресса
+    :param interval: Минимальный интервал между обновлениями
+                     в секундах, defaults to 0.1
+    :type interval: float, optional
+    """
+    def __init__(self, dialog, interval=0.1) -> None:
+        super().__init__(
+            on_progress=self._show, on_message=dialog.setLabelText,
+            is_cancelled=dialog.wasCanceled, interval=interval
+        )
+        self.dialog = dialog
+        self._range = None
+
+    def _show(self, value, total) -> None:
+        if total is not None and total != self._range:
+            self._range = total
+            self.dialog.setRange(0, total)
+        self.dialog.setValue(value)
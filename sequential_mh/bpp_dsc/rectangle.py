@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
-from copy import deepcopy
+from copy import copy, deepcopy
 from enum import Enum
 from dataclasses import dataclass
 from operator import attrgetter, itemgetter
 from itertools import groupby, product, chain
+from math import fsum
 from typing import Optional, Union, Type
 
 from .support import is_subrectangle, deformation
@@ -118,6 +119,11 @@ class Material:
     density: Number
     extension: Number
 
+    def __deepcopy__(self, memo):
+        # материал не изменяется, поэтому копии листов и заготовок
+        # ссылаются на один и тот же объект
+        return self
+
 
 class BaseBin(Rectangle3d):
     """Базовый класс листа
@@ -638,6 +644,13 @@ Group = dict[Number, Subgroup]
 class Kit(ABCKit):
     """Набор заготовок
 
+    Одинаковые заготовки, идущие подряд, могут храниться парами
+    (заготовка, количество). Списки заготовок толщины создаются при
+    первом обращении к ним (:meth:`__getitem__`, :attr:`blanks`),
+    а при копировании набора одинаковые заготовки снова объединяются,
+    поэтому копия набора содержит столько заготовок, сколько в нем
+    различных заготовок, а не их общее количество.
+
     :param blanks: список заготовок
     :type blanks: Union[list[Blank], Group]
 
@@ -646,12 +659,78 @@ class Kit(ABCKit):
     """
     def __init__(self, blanks: Union[list[Blank], Group]) -> None:
         super().__init__()
-        self.blanks = {}
+        self._groups = {}
+        # толщины, заготовки которых хранятся парами (заготовка, количество)
+        self._compact = set()
         if isinstance(blanks, list):
             for height, group in groupby_blanks(blanks, attr='height').items():
-                self.blanks[height] = groupby_blanks(group, attr='priority')
+                self._groups[height] = groupby_blanks(group, attr='priority')
         else:
-            self.blanks = blanks
+            self._groups = blanks
+
+    @classmethod
+    def from_counts(cls, items: list[tuple[Blank, int]]) -> 'Kit':
+        """Создание набора из заготовок с количествами
+
+        Набор совпадает с набором ``Kit(blanks)``, где каждая заготовка
+        повторена заданное количество раз, но копии заготовок
+        создаются только при обращении к спискам заготовок.
+
+        :param items: пары (заготовка, количество)
+        :type items: list[tuple[Blank, int]]
+        :rtype: Kit
+        """
+        kit = cls({})
+        runs = [(blank, count) for blank, count in items if count > 0]
+        for height, group in groupby_runs(runs, attr='height').items():
+            kit._groups[height] = groupby_runs(group, attr='priority')
+            kit._compact.add(height)
+        return kit
+
+    @property
+    def blanks(self) -> Group:
+        for height in list(self._compact):
+            self._expand(height)
+        return self._groups
+
+    @blanks.setter
+    def blanks(self, value: Group) -> None:
+        self._groups = value
+        self._compact = set()
+
+    def _expand(self, height):
+        if height in self._compact:
+            self._compact.discard(height)
+            self._groups[height] = {
+                priority: expand_runs(runs)
+                for priority, runs in self._groups[height].items()
+            }
+        return self._groups[height]
+
+    def counts(self, height=None, priority=None):
+        """Заготовки набора с количествами
+
+        Заготовки, хранящиеся парами, не разворачиваются в списки,
+        остальные заготовки возвращаются с количеством 1.
+
+        :param height: толщина, по умолчанию все толщины
+        :type height: int или float, optional
+        :param priority: приоритет, по умолчанию все приоритеты
+        :type priority: int, optional
+        :return: пары (заготовка, количество)
+        :rtype: Iterator[tuple[Blank, int]]
+        """
+        heights = self._groups if height is None else (height, )
+        for height_ in heights:
+            compact = height_ in self._compact
+            for priority_, subgroup in self._groups[height_].items():
+                if priority is not None and priority_ != priority:
+                    continue
+                if compact:
+                    yield from subgroup
+                else:
+                    for blank in subgroup:
+                        yield blank, 1
 
     def sort(self, sorting: str='width'):
         """Сортировка заготовок
@@ -671,21 +750,27 @@ class Kit(ABCKit):
         if sorting not in ('width', 'length'):
             raise ValueError('The algorithm only supports sorting by width '
                              f'or length but {sorting} was given.')
-        
-        for _, group in self.blanks.items():
-            rotate_all(group)
+
+        for height, group in self._groups.items():
+            if height in self._compact:
+                key = lambda run: getattr(run[0], sorting)
+            else:
+                key = attrgetter(sorting)
+            for blank, _ in self.counts(height):
+                if blank.length > blank.width and blank.is_rotatable:
+                    blank.rotate()
+            for blank, _ in self.counts(height):
+                if blank.length > blank.width:
+                    blank.rotate()
             for _, subgroup in group.items():
-                for blank in subgroup:
-                    if blank.length > blank.width:
-                        blank.rotate()
-                subgroup.sort(key=attrgetter(sorting), reverse=True)
+                subgroup.sort(key=key, reverse=True)
 
     def unplaced(self, bin_item: Bin, height=None):
         all_blanks = []
         if height:
             if height <= bin_item.height:
                 all_blanks.extend(
-                    chain.from_iterable(self.blanks[height].values())
+                    chain.from_iterable(self[height].values())
                 )
         else:
             for height, group in self.blanks.items():
@@ -694,45 +779,48 @@ class Kit(ABCKit):
         return all_blanks
 
     def available_blanks(self, bin_item: Bin, priority=None):
-        if bin_item.height in self.blanks:
+        if bin_item.height in self._groups:
             if priority is None:
                 all_blanks = chain.from_iterable(
-                    self.blanks[bin_item.height].values()
+                    self[bin_item.height].values()
                 )
             else:
-                all_blanks = self.blanks[bin_item.height][priority]
+                all_blanks = self[bin_item.height][priority]
             return [o for o in all_blanks if bin_item.is_suitable(o)]
         return []
 
     def rotate(self, height, rolldir):
-        for priority, group in self.blanks[height].items():
-            for item in group:
-                if not item.is_rotatable and item.direction != rolldir:
-                    item.rotate()
+        for item, _ in self.counts(height):
+            if not item.is_rotatable and item.direction != rolldir:
+                item.rotate()
 
     def delete_items(self, items, height):
         if isinstance(items, list):
             items = sorted(items, key=attrgetter('priority'))
             items = {k: list(v) for k, v in groupby(items, key=attrgetter('priority'))}
+        group = self[height]
         for key, values in items.items():
-            if key in self.blanks[height]:
+            if key in group:
                 for item in values:
-                    self.blanks[height][key].remove(item)
+                    group[key].remove(item)
 
     def separate(self, height: Number):
-        blanks = deepcopy(self.blanks)
-        new_kit = self.__class__({height: blanks.pop(height)})
+        residual_kit = deepcopy(self)
+        new_kit = self.__class__({height: residual_kit._groups.pop(height)})
         # new_kit = self.__class__({h: blanks.pop(h) for h in self.keys() if h <= height})
-        residual_kit = self.__class__(blanks)
+        if height in residual_kit._compact:
+            residual_kit._compact.discard(height)
+            new_kit._compact.add(height)
         return new_kit, residual_kit
 
     def pop_height(self, height):
         if height in self:
-            self.blanks.pop(height)
+            self._groups.pop(height)
+            self._compact.discard(height)
 
     def hp_sequence(self):
         sorted_height_priority = []
-        for height, group in self.blanks.items():
+        for height, group in self._groups.items():
             sorted_height_priority.extend(
                 product((height, ), [p for p, v in group.items() if v])
             )
@@ -750,20 +838,21 @@ class Kit(ABCKit):
             for height, group in blanks.items():
                 blanks[height] = groupby_blanks(group, attr='priority')
         for height, group in blanks.items():
-            if height in self.blanks:
+            if height in self._groups:
+                current = self._expand(height)
                 for priority, subgroup in group.items():
-                    if priority in self.blanks[height]:
-                        self.blanks[height][priority].extend(subgroup)
+                    if priority in current:
+                        current[priority].extend(subgroup)
                     else:
-                        self.blanks[height][priority] = subgroup
+                        current[priority] = subgroup
             else:
-                self.blanks[height] = group
+                self._groups[height] = group
 
     def is_empty(self, height=None):
-        if self.blanks:
+        if self._groups:
             empty_flag = False
             if height is None:
-                for _, group in self.blanks.items():
+                for _, group in self._groups.items():
                     for _, sg in group.items():
                         if sg:
                             empty_flag = True
@@ -772,8 +861,8 @@ class Kit(ABCKit):
                     # for _, subgroup in group.items():
                     #     empty_flag += bool(subgroup)
             else:
-                if height in self.blanks:
-                    for _, r_list in self.blanks[height].items():
+                if height in self._groups:
+                    for _, r_list in self._groups[height].items():
                         if r_list:
                             empty_flag = True
                             break
@@ -786,54 +875,48 @@ class Kit(ABCKit):
         return True
 
     def qty(self, height=None):  # кол-во заготовок
-        qty = 0
-        if height is None:
-            for _, group in self.blanks.items():
-                qty += sum(len(sg) for _, sg in group.items())
-                # for _, subgroup in group.items():
-                #     qty += len(subgroup)
-        else:
-            qty = sum(
-                len(sg) for _, sg in self.blanks[height].items()
-            )
-            # for _, subgroup in self.blanks[height].items():
-            #     qty += len(subgroup)
-        return qty
+        if height is not None and height not in self._groups:
+            raise KeyError(height)
+        return sum(count for _, count in self.counts(height))
 
     def qty_blank(self, blank):
-        if blank.height in self.blanks and blank.priority in self.blanks[blank.height]:
+        if blank.height in self._groups and blank.priority in self._groups[blank.height]:
             return sum(
-                item.eq_rot(blank) for item in self.blanks[blank.height][blank.priority]
+                count for item, count in self.counts(blank.height, blank.priority)
+                if item.eq_rot(blank)
             )
         return 0
 
     def delete_height(self, height):
-        if height in self:
-            self.blanks.pop(height)
+        self.pop_height(height)
 
     @property
     def max_height(self):
-        return max(self.blanks.keys())
+        return max(self._groups.keys())
 
     @property
     def total_volume(self) -> Number:
-        return sum(o.volume for o in self)
+        # точное суммирование: сумма не зависит от способа хранения
+        # (пары с количеством или списки) и порядка заготовок
+        return fsum(o.volume * count for o, count in self.counts())
 
     @property
     def total_mass(self) -> Number:
-        return sum(o.mass for o in self)
+        return fsum(o.mass * count for o, count in self.counts())
 
     def items(self):
         return self.blanks.items()
 
     def keys(self):
-        return self.blanks.keys()
+        return self._groups.keys()
 
     def __getitem__(self, key):
-        return self.blanks[key]
+        if key not in self._groups:
+            raise KeyError(key)
+        return self._expand(key)
 
     def __contains__(self, key):
-        return key in self.blanks
+        return key in self._groups
 
     def __iter__(self):
         for _, group in self.blanks.items():
@@ -841,8 +924,36 @@ class Kit(ABCKit):
                 for item in subgroup:
                     yield item
 
+    def __getstate__(self):
+        groups, compact = {}, set(self._compact)
+        for height, group in self._groups.items():
+            blanks = list(chain.from_iterable(group.values()))
+            if height in compact or len(set(map(id, blanks))) != len(blanks):
+                # один и тот же объект, встречающийся в наборе несколько
+                # раз, остается общим и после копирования набора
+                groups[height] = group
+            else:
+                groups[height] = {
+                    priority: compress_runs(subgroup)
+                    for priority, subgroup in group.items()
+                }
+                compact.add(height)
+        return {'_groups': groups, '_compact': compact}
+
+    def __setstate__(self, state):
+        if 'blanks' in state:
+            # набор, записанный до хранения одинаковых заготовок парами
+            state = {'_groups': state['blanks'], '_compact': set()}
+        self.__dict__.update(state)
+
     def __copy__(self):
-        return self.__class__(deepcopy(self.blanks))
+        return deepcopy(self)
+
+    def __deepcopy__(self, memo):
+        kit = self.__class__.__new__(self.__class__)
+        memo[id(self)] = kit
+        kit.__setstate__(deepcopy(self.__getstate__(), memo))
+        return kit
 
     def __repr__(self):
         return f'{self.__class__.__name__}({list(self)})'
@@ -972,6 +1083,38 @@ def groupby_blanks(blanks: list[Blank], *, attr) -> dict[int, list[Blank]]:
     }
 
 
+def groupby_runs(runs: list[tuple[Blank, int]], *,
+                 attr) -> dict[int, list[tuple[Blank, int]]]:
+    key = lambda run: getattr(run[0], attr)
+    runs.sort(key=key, reverse=True)
+    return {k: list(group) for k, group in groupby(runs, key=key)}
+
+
+def compress_runs(blanks: list[Blank]) -> list[tuple[Blank, int]]:
+    """Объединение идущих подряд одинаковых заготовок в пары
+    (заготовка, количество)"""
+    runs = []
+    for blank in blanks:
+        if runs and type(runs[-1][0]) is type(blank) and \
+                vars(runs[-1][0]) == vars(blank):
+            runs[-1][1] += 1
+        else:
+            runs.append([blank, 1])
+    return [(blank, count) for blank, count in runs]
+
+
+def expand_runs(runs: list[tuple[Blank, int]]) -> list[Blank]:
+    """Список заготовок из пар (заготовка, количество)
+
+    Первой в списке идет сама заготовка пары, остальные -- ее копии.
+    """
+    blanks = []
+    for blank, count in runs:
+        blanks.append(blank)
+        blanks.extend(copy(blank) for _ in range(count - 1))
+    return blanks
+
+
 def rotate_all(rectangles):
     for _, group in rectangles.items():
         for blank in group:
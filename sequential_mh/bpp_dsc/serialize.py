@@ -0,0 +1,290 @@
+"""Компактная сериализация деревьев раскроя
+
+Граф объектов дерева записывается в виде таблицы: каждый узел, лист,
+набор, результат упаковки и изменяемый контейнер получает номер,
+а ссылки на него заменяются этим номером. Поэтому общие объекты
+(например, лист карты раскроя и лист ее предка) после восстановления
+остаются общими, а циклические ссылки (предок -- потомок)
+восстанавливаются без рекурсии. Таблица состоит только из встроенных
+типов и кодируется модулем marshal со сжатием zlib.
+
+Записываются только объекты известных классов (:data:`CLASSES`), так
+что при восстановлении не выполняется произвольный код, как в pickle.
+Кэши узлов (индекс ID и листья) не записываются и строятся заново
+при первом обращении.
+
+Объекты, общие для многих деревьев построения (исходный набор
+заготовок, размещенные заготовки, поддеревья остатков, материалы),
+можно не записывать, а заменять ссылками на реестр
+:class:`SharedObjects`, который остается в памяти.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import marshal
+import zlib
+from enum import Enum
+
+from . import base_rect
+from .rectangle import (
+    Bin, BinType, Blank, Direction, Estimator, Kit, Material, PackedBlank,
+    Result, UnsizedBin
+)
+from .tree import (
+    BaseNode, BinNode, CuttingChartNode, OperationNode, Operations, Tree
+)
+from ..tsh import rect
+
+
+# Версия формата (изменяется при изменении состава таблицы)
+FORMAT_VERSION = 1
+
+# Классы, объекты которых могут быть записаны; номер класса -- его
+# позиция в кортеже, поэтому новые классы добавляются только в конец
+CLASSES = (
+    Tree, BinNode, OperationNode, CuttingChartNode,
+    Bin, UnsizedBin, Blank, Material, Kit, Result, Estimator, PackedBlank,
+    base_rect.RectangleXY, base_rect.Point,
+    rect.Rectangle, rect.PackedRectangle, rect.Point,
+    BinType, Direction, Operations, rect.RectangleType,
+)
+CLASS_INDEX = {cls: i for i, cls in enumerate(CLASSES)}
+
+# Классы, объекты которых всегда разделяются между деревьями
+SHARED_CLASSES = (Material,)
+
+# Кэши узлов, которые не записываются
+TRANSIENT = ('_index', '_leaves')
+
+# Виды записей таблицы
+_OBJECT, _LIST, _DICT, _SET = range(4)
+# Виды составных значений
+_REF, _SHARED, _TUPLE, _NAMEDTUPLE, _ENUM, _FROZENSET = range(6)
+
+_PRIMITIVES = (int, float, str, bool, bytes, type(None))
+
+
+class SharedObjects:
+    """Реестр объектов, которые не записываются, а заменяются ссылками
+
+    Реестр хранит сильные ссылки на объекты, поэтому номера объектов
+    остаются действительными, пока существует реестр.
+    """
+    def __init__(self) -> None:
+        self._objects = []
+        self._index = {}
+
+    def add(self, obj) -> int:
+        """Добавление объекта в реестр
+
+        :return: Номер объекта
+        :rtype: int
+        """
+        index = self._index.get(id(obj))
+        if index is None:
+            index = self._index[id(obj)] = len(self._objects)
+            self._objects.append(obj)
+        return index
+
+    def add_tree(self, tree: Tree) -> None:
+        """Добавление разделяемых между копиями частей дерева
+
+        :param tree: Дерево раскроя
+        :type tree: Tree
+        """
+        for obj in tree._shared_memo().values():
+            self.add(obj)
+
+    def index(self, obj):
+        """Номер объекта в реестре или None"""
+        return self._index.get(id(obj))
+
+    def __getitem__(self, index):
+        return self._objects[index]
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+def dumps(obj, shared=None) -> bytes:
+    """Сериализация дерева (или списка деревьев)
+
+    Общие объекты нескольких деревьев, переданных одним списком,
+    записываются один раз.
+
+    :param obj: Дерево раскроя или контейнер с деревьями
+    :param shared: Реестр объектов, которые записываются ссылками,
+                   defaults to None
+    :type shared: SharedObjects, optional
+    :raises TypeError: если граф содержит объект неизвестного класса
+    :return: Сжатое представление
+    :rtype: bytes
+    """
+    encoder = _Encoder(shared)
+    root = encoder.value(obj)
+    encoder.fill()
+    data = marshal.dumps((FORMAT_VERSION, root, encoder.table))
+    return zlib.compress(data)
+
+
+def loads(data: bytes, shared=None):
+    """Восстановление дерева, записанного :func:`dumps`
+
+    :param data: Сжатое представление
+    :type data: bytes
+    :param shared: Реестр, использованный при записи, defaults to None
+    :type shared: SharedObjects, optional
+    :raises ValueError: если формат записи не поддерживается
+    :return: Восстановленный объект
+    """
+    version, root, table = marshal.loads(zlib.decompress(data))
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Неподдерживаемая версия формата: {version}')
+    return _Decoder(table, shared).load(root)
+
+
+class _Encoder:
+    def __init__(self, shared) -> None:
+        self.shared = shared
+        self.table = []
+        self._ids = {}
+        self._pending = []
+        # ссылки на записанные объекты, чтобы их id не переиспользовались
+        self._keep = []
+
+    def value(self, obj):
+        """Кодирование значения (примитив или тегированный кортеж)"""
+        cls = type(obj)
+        if cls in _PRIMITIVES:
+            return obj
+        if self.shared is not None:
+            if isinstance(obj, SHARED_CLASSES):
+                self.shared.add(obj)
+            index = self.shared.index(obj)
+            if index is not None:
+                return (_SHARED, index)
+        if cls is tuple:
+            return (_TUPLE, [self.value(item) for item in obj])
+        if cls is frozenset:
+            return (_FROZENSET, [self.value(item) for item in obj])
+        if isinstance(obj, Enum):
+            return (_ENUM, self._class_index(cls), self.value(obj.value))
+        if isinstance(obj, tuple):
+            return (
+                _NAMEDTUPLE, self._class_index(cls),
+                [self.value(item) for item in obj]
+            )
+        if cls not in (list, dict, set):
+            self._class_index(cls)
+        return (_REF, self._ref(obj))
+
+    def fill(self) -> None:
+        """Запись всех объектов, на которые есть ссылки"""
+        while self._pending:
+            index, obj = self._pending.pop()
+            self.table[index] = self._entry(obj)
+
+    def _ref(self, obj) -> int:
+        index = self._ids.get(id(obj))
+        if index is None:
+            index = self._ids[id(obj)] = len(self.table)
+            self.table.append(None)
+            self._pending.append((index, obj))
+            self._keep.append(obj)
+        return index
+
+    def _entry(self, obj):
+        cls = type(obj)
+        if cls is list:
+            return (_LIST, [self.value(item) for item in obj])
+        if cls is dict:
+            return (
+                _DICT, [self.value(key) for key in obj],
+                [self.value(item) for item in obj.values()]
+            )
+        if cls is set:
+            return (_SET, [self.value(item) for item in obj])
+        is_node = isinstance(obj, BaseNode)
+        state = {
+            name: self.value(item) for name, item in vars(obj).items()
+            if not (is_node and name in TRANSIENT)
+        }
+        return (_OBJECT, CLASS_INDEX[cls], state)
+
+    @staticmethod
+    def _class_index(cls) -> int:
+        index = CLASS_INDEX.get(cls)
+        if index is None:
+            raise TypeError(
+                f'Объекты класса {cls.__qualname__} не сериализуются'
+            )
+        return index
+
+
+class _Decoder:
+    def __init__(self, table, shared) -> None:
+        self.table = table
+        self.shared = shared
+        self.objects = [None] * len(table)
+
+    def load(self, root):
+        # 1) пустые объекты и контейнеры (на них уже можно ссылаться)
+        for i, entry in enumerate(self.table):
+            kind = entry[0]
+            if kind == _OBJECT:
+                cls = CLASSES[entry[1]]
+                self.objects[i] = cls.__new__(cls)
+            elif kind == _LIST:
+                self.objects[i] = []
+            elif kind == _DICT:
+                self.objects[i] = {}
+            else:
+                self.objects[i] = set()
+        # 2) атрибуты объектов и элементы списков
+        for i, entry in enumerate(self.table):
+            kind = entry[0]
+            if kind == _OBJECT:
+                obj = self.objects[i]
+                vars(obj).update(
+                    (name, self.value(item)) for name, item in entry[2].items()
+                )
+                if isinstance(obj, BaseNode):
+                    for name in TRANSIENT:
+                        setattr(obj, name, None)
+            elif kind == _LIST:
+                self.objects[i].extend(self.value(item) for item in entry[1])
+        # 3) словари и множества: хеши элементов могут зависеть
+        #    от их атрибутов, поэтому они заполняются последними
+        for i, entry in enumerate(self.table):
+            kind = entry[0]
+            if kind == _DICT:
+                self.objects[i].update(zip(
+                    map(self.value, entry[1]), map(self.value, entry[2])
+                ))
+            elif kind == _SET:
+                self.objects[i].update(self.value(item) for item in entry[1])
+        return self.value(root)
+
+    def value(self, item):
+        if type(item) is not tuple:
+            return item
+        kind = item[0]
+        if kind == _REF:
+            return self.objects[item[1]]
+        if kind == _SHARED:
+            if self.shared is None:
+                raise ValueError('Для восстановления нужен реестр объектов')
+            return self.shared[item[1]]
+        if kind == _TUPLE:
+            return tuple(self.value(value) for value in item[1])
+        if kind == _FROZENSET:
+            return frozenset(self.value(value) for value in item[1])
+        if kind == _ENUM:
+            return CLASSES[item[1]](self.value(item[2]))
+        return CLASSES[item[1]](*(self.value(value) for value in item[2]))
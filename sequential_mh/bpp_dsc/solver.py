@@ -0,0 +1,671 @@
+"""Решатель задачи раскроя слитка без графического интерфейса
+
+Построение деревьев с поддеревьями для остатков карт раскроя,
+удвоением толщины реза и выбором решения по :func:`choice.choose_tree`
+(в том виде, в котором оно используется в приложении). Модуль
+не зависит от PyQt5, поэтому решатель можно запускать в отдельных
+процессах и без интерфейса.
+
+Одни и те же подзадачи раскроя остатков (размеры остатка, толщина
+и набор заготовок соседней ветки) повторяются в разных деревьях
+построения, поэтому их решения кэшируются (:data:`RESIDUAL_CACHE`).
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import atexit
+import copy
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from hashlib import blake2b
+from itertools import chain, repeat
+from pathlib import Path
+
+from .cache import LRUCache
+from .checkpoint import (
+    CheckpointError, exists as checkpoint_exists, format_version,
+    remove as remove_checkpoint
+)
+from .choice import TreeSelector
+from .exception import BPPError
+from .rectangle import Bin, BinType, Kit, Rectangle3d
+from .stm import (
+    _create_insert_template, _pack, _run_search, _search, is_empty_node,
+    is_empty_tree, iter_resume_stmh_idrd, predicate
+)
+from .support import dfs
+from .tree import (
+    BinNode, Tree, WithID, _blank_signature, get_all_residuals,
+    get_residuals, get_unplaced_before, is_cc_node, is_defective_tree,
+    tree_signature
+)
+from ..tsh.rect import RectangleType
+
+
+# Решения подзадач раскроя остатков (см. Solver.residual_key)
+RESIDUAL_CACHE = LRUCache(maxsize=256, maxbytes=64 * 2 ** 20)
+_MISSING = object()
+_POOLS = {}
+
+
+class Solver:
+    """Решатель задачи раскроя
+
+    :param aspect_ratio: Максимальное соотношение сторон при выборе
+                         решения, defaults to 10
+    :type aspect_ratio: float, optional
+    :param min_size: Минимальные размеры листа (длина, ширина):
+                     остатки меньшего размера не используются для
+                     построения поддеревьев, defaults to None
+    :type min_size: tuple[number, number], optional
+    :param workers: Количество процессов для раскрытия деревьев
+                    основного построения, defaults to None
+                    (последовательный режим)
+    :type workers: int, optional
+    :param checkpoint_interval: Интервал записи контрольных точек
+                                в секундах, defaults to 60
+    :type checkpoint_interval: float, optional
+    :param residual_workers: Количество процессов для раскроя остатков:
+                             проходы раскроя остатка выполняются
+                             одновременно (используется, если основное
+                             построение последовательное),
+                             defaults to None (проходы выполняются
+                             последовательно)
+    :type residual_workers: int, optional
+
+    Пул процессов для раскроя остатков общий для решателей с тем же
+    количеством процессов и закрывается методом :meth:`close` (или при
+    выходе из блока ``with``), оставшиеся пулы закрываются при
+    завершении программы.
+    """
+    def __init__(self, aspect_ratio=10, min_size=None, workers=None,
+                 checkpoint_interval=60., residual_workers=None) -> None:
+        self.aspect_ratio = aspect_ratio
+        self.min_size = min_size
+        self.workers = workers
+        self.checkpoint_interval = checkpoint_interval
+        self.residual_workers = residual_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Закрытие пула процессов для раскроя остатков"""
+        if self.residual_workers:
+            shutdown_pools(self.residual_workers)
+
+    def stmh_idrd(self, tree, with_filter=True, restrictions=None,
+                  progress=None, level_subtree=0, with_priority=True,
+                  checkpoint=None):
+        """Построение дерева раскроя
+
+        Деревья строятся двумя проходами (вертикальный и горизонтальный
+        прокат в шаблонах), из годных деревьев выбирается лучшее.
+
+        :param tree: Начальное дерево
+        :type tree: Tree
+        :param with_filter: Флаг фильтрации деревьев на соответствие
+                            ограничениям, defaults to True
+        :type with_filter: bool, optional
+        :param restrictions: Словарь ограничений, defaults to None
+        :type restrictions: dict, optional
+        :param progress: Прогресс и флаг отмены, defaults to None
+        :type progress: progress.Progress, optional
+        :param level_subtree: Уровень поддерева, defaults to 0
+        :type level_subtree: int, optional
+        :param with_priority: Учитывать приоритеты при упаковке,
+                              defaults to True
+        :type with_priority: bool, optional
+        :param checkpoint: Каталог контрольных точек: если в нем есть
+                           точка для той же задачи, построение
+                           продолжается с нее, defaults to None
+        :type checkpoint: str или Path, optional
+        :raises ForcedTermination: если построение было отменено
+        :raises BPPError: если для основного дерева не получено
+                          ни одного годного дерева
+        :return: Лучшее дерево или None (для поддерева без решений)
+        :rtype: Optional[Tree]
+        """
+        doubling = False
+        if restrictions:
+            cut_thickness = restrictions.get('cutting_thickness')
+            if cut_thickness and cut_thickness >= max(tree.root.kit.keys()):
+                doubling = True
+            else:
+                restrictions['cutting_thickness'] = max(tree.root.kit.keys())
+        if progress:
+            steps = number_of_steps(len(tree.root.kit.keys()), doubling=doubling)
+            # Костыль. Умножение на константу для учета одинаковых веток
+            progress.set_total(int(4 * steps))
+        if checkpoint is not None:
+            checkpoint = Path(checkpoint) / self.problem_key(tree, restrictions)
+
+        if restrictions:
+            max_size = restrictions.get('max_size')
+        else:
+            max_size = None
+        selector = TreeSelector(aspect_ratio=self.aspect_ratio)
+        kwargs = dict(
+            restrictions=restrictions, with_filter=with_filter,
+            level_subtree=level_subtree, with_priority=with_priority
+        )
+        # проходы раскроя остатка не зависят друг от друга (остаток
+        # раскраивается заново при каждом проходе), поэтому они
+        # выполняются одновременно в пуле процессов
+        passes = {}
+        if self.residual_workers and level_subtree:
+            pool = _residual_pool(self.residual_workers)
+            solver = copy.copy(self)
+            solver.residual_workers = None
+            for direction in (1, 2):
+                passes[direction] = pool.submit(
+                    _direction_trees, solver, tree, direction=direction,
+                    **kwargs
+                )
+
+        def add_trees(direction):
+            # деревья прохода добавляются к выбору только после его
+            # завершения: при повторе прохода (поврежденная точка)
+            # деревья, восстановленные из нее, не участвуют в выборе
+            pass_selector = TreeSelector(aspect_ratio=self.aspect_ratio)
+            if direction in passes:
+                trees = passes.pop(direction).result()
+            else:
+                trees = self._stmh_idrd(
+                    tree, progress=progress, direction=direction,
+                    checkpoint=checkpoint, **kwargs
+                )
+            for item in trees:
+                if with_filter and is_defective_tree(item, max_size):
+                    continue
+                pass_selector.add(item)
+            selector.update(pass_selector)
+
+        try:
+            for direction in (1, 2):
+                try:
+                    add_trees(direction)
+                except CheckpointError:
+                    # точка оказалась повреждена при восстановлении
+                    # деревьев (она уже удалена): построение направления
+                    # заново
+                    add_trees(direction)
+        finally:
+            for future in passes.values():
+                future.cancel()
+        if checkpoint is not None:
+            # точки проходов удаляются после завершения обоих проходов,
+            # чтобы при отмене второго прохода первый не строился заново
+            for direction in (1, 2):
+                remove_checkpoint(checkpoint / f'direction_{direction}')
+            if checkpoint.is_dir() and not any(checkpoint.iterdir()):
+                checkpoint.rmdir()
+        if progress:
+            progress.set_value(max(progress.value, progress.total))
+            progress.flush()
+
+        if not selector.count and level_subtree == 0:
+            raise BPPError(
+                'Не удалось получить раскрой.\n'
+                'Измените приоритеты, толщину реза или ограничения на максимальные размеры'
+            )
+        if not selector.count:
+            return None
+        if progress:
+            progress.message('Выбор оптимального решения...')
+        best, _ = selector.best()
+        get_all_residuals(best)
+        return best
+
+    def _stmh_idrd(self, tree, local=False, with_filter=True,
+                   restrictions=None, progress=None, direction=1,
+                   level_subtree=0, with_priority=True, checkpoint=None):
+        """Построение деревьев раскроя для одного направления проката
+
+        :param checkpoint: Каталог контрольных точек задачи,
+                           defaults to None
+        :type checkpoint: Path, optional
+        :return: Построенные деревья (по мере построения)
+        :rtype: Iterator[Tree]
+        """
+        cancel_event = progress.token if progress else None
+        if checkpoint is not None:
+            checkpoint = checkpoint / f'direction_{direction}'
+            if checkpoint_exists(checkpoint):
+                try:
+                    return iter_resume_stmh_idrd(
+                        checkpoint, workers=self.workers,
+                        cancel_event=cancel_event, on_step=progress
+                    )
+                except CheckpointError:
+                    # точка другой версии или повреждена: построение
+                    # начинается заново
+                    remove_checkpoint(checkpoint)
+        # при параллельном раскрытии деревьев остатки раскраиваются
+        # в тех же процессах
+        residual_workers = self.residual_workers
+        if self.workers and self.workers > 1:
+            residual_workers = None
+        expand = partial(
+            _expand, aspect_ratio=self.aspect_ratio, min_size=self.min_size,
+            level_subtree=level_subtree, local=local,
+            restrictions=restrictions, with_priority=with_priority,
+            direction=direction, residual_workers=residual_workers
+        )
+        search = partial(
+            _search, tree, expand, with_filter, restrictions,
+            cancel_event=cancel_event, on_step=progress,
+            checkpoint=checkpoint, keep_checkpoint=True,
+            checkpoint_interval=self.checkpoint_interval
+        )
+        return _run_search(search, self.workers)
+
+    def create_subtree(self, node, restrictions, level_subtree) -> None:
+        """Создание поддерева для остатка
+
+        :param node: Узел, содержащий остатки
+        :type node: CuttingChartNode
+        :param restrictions: Ограничения
+        :type restrictions: dict
+        :param level_subtree: Уровень поддерева, ограничивает
+                              рекурсивное построение деревьев
+        :type level_subtree: int
+        """
+        # остаток до границы листа добавляется в результат упаковки
+        get_residuals(node)
+        tailings = filtration_residues(
+            node.result.tailings, min_size=self.min_size
+        )
+        suitable_residues = [
+            t for t in tailings
+            if incoming_rectangles(t, node.bin.height, node.result.unplaced)
+        ]
+        # если нет прямоугольников для размещения текущей
+        # толщины пробуем упаковать другие
+        adjacent_branch = node.adjacent_branch()
+        if adjacent_branch:
+            adj_node = adjacent_branch.adj_leaves[0]
+        else:
+            return
+        if suitable_residues or adj_node.kit.is_empty():
+            return
+        # получить неупакованные элементы из соседней ветки
+        # построить дерево для остатков
+        height, material = node.bin.height, node.bin.material
+        for tailing in tailings:
+            key = self.residual_key(
+                tailing, height, material, adj_node.kit, restrictions,
+                level_subtree
+            )
+            new_tree = RESIDUAL_CACHE.get(key, _MISSING)
+            if new_tree is _MISSING:
+                new_tree = _solve_residual(
+                    self,
+                    Bin(tailing.length, tailing.width, height, material=material),
+                    copy.deepcopy(adj_node.kit), copy.deepcopy(restrictions),
+                    level_subtree
+                )
+                RESIDUAL_CACHE.put(
+                    key, new_tree, nbytes=len(pickle.dumps(new_tree))
+                )
+            if new_tree is None:
+                continue
+            # в кэше остается исходное дерево
+            new_tree = copy.deepcopy(new_tree)
+            if new_tree.root.children:
+                tailing.rtype = RectangleType.USED_RESIDUAL
+                node.subtree.append(new_tree)
+            # удалить упакованные элементы из соседней ветки
+            for subnode in new_tree.root.cc_leaves:
+                blanks = [
+                    r.rectangle
+                    for r in chain.from_iterable(subnode.result.blanks.values())
+                ]
+                adj_node.kit.delete_items(list(blanks), subnode.bin.height)
+            if adj_node.kit.is_empty():
+                break
+
+    def residual_key(self, tailing, height, material, kit, restrictions,
+                     level_subtree) -> bytes:
+        """Ключ подзадачи раскроя остатка
+
+        Подзадачи с одинаковыми размерами остатка, толщиной, материалом,
+        набором заготовок (последовательность с именами), ограничениями
+        и параметрами решателя имеют одинаковые решения. Порядок
+        заготовок входит в ключ, так как от него зависит раскрой
+        (как и в :func:`cache.cached_bpp_ts`).
+
+        :param tailing: Остаток
+        :type tailing: Rectangle
+        :param height: Толщина остатка
+        :type height: number
+        :param material: Материал
+        :type material: Material
+        :param kit: Набор заготовок соседней ветки
+        :type kit: Kit
+        :param restrictions: Ограничения
+        :type restrictions: dict
+        :param level_subtree: Уровень поддерева
+        :type level_subtree: int
+        :rtype: bytes
+        """
+        blanks = list(chain.from_iterable(
+            repeat((*_blank_signature(blank, 4), blank.name), count)
+            for blank, count in kit.counts()
+        ))
+        items = (
+            round(tailing.length, 4), round(tailing.width, 4),
+            round(height, 4), repr(material), blanks,
+            sorted(map(repr, (restrictions or {}).items())), level_subtree,
+            self.aspect_ratio, self.min_size
+        )
+        return blake2b(repr(items).encode(), digest_size=16).digest()
+
+    def optimal_ingot_size(self, main_tree, min_size, max_size, restrictions,
+                           progress=None):
+        """Определение размеров слитка
+
+        :param main_tree: Основное дерево, содержащее слиток максимальных размеров
+        :type main_tree: Tree
+        :param min_size: Минимальные размеры слитка, (длина, ширина, высота)
+        :type min_size: tuple[number, number, number]
+        :param max_size: Максимальные размеры слитка, (длина, ширина, высота)
+        :type max_size: tuple[number, number, number]
+        :param restrictions: Ограничения
+        :type restrictions: dict
+        :param progress: Прогресс и флаг отмены, defaults to None
+        :type progress: progress.Progress, optional
+        :raises ValueError: если построено некорректное дерево
+        :raises BPPError: если не получено ни одного годного дерева
+        :return: Дерево раскроя для полученного слитка
+        :rtype: Tree
+        """
+        min_length, min_width, min_height = min_size
+
+        doubling = False
+        if restrictions:
+            cut_thickness = restrictions.get('cutting_thickness')
+            if cut_thickness and cut_thickness >= max(main_tree.root.kit.keys()):
+                doubling = True
+            else:
+                restrictions['cutting_thickness'] = max(main_tree.root.kit.keys())
+        if progress:
+            steps = number_of_steps(len(main_tree.root.kit.keys()), doubling=doubling)
+            # Костыль. Умножение на константу для учета одинаковых веток
+            progress.set_total(int(6 * steps))
+
+        if restrictions:
+            max_leaf_size = restrictions.get('max_size')
+        else:
+            max_leaf_size = None
+        selector = TreeSelector(aspect_ratio=self.aspect_ratio)
+        for direction in (1, 2):
+            trees = self._stmh_idrd(
+                main_tree, restrictions=restrictions, local=False,
+                with_filter=False, progress=progress, direction=direction
+            )
+            for tree in trees:
+                # Получение смежного остатка
+                if len(tree.root.adj_leaves) > 1:
+                    raise ValueError('Смежных остатков более 1!')
+                adj_node = tree.root.adj_leaves[0]
+                # Обнуление размеров смежного остатка
+                adj_node.bin.length = 0
+                adj_node.bin.width = 0
+                # Обновление размеров вышестоящих узлов с учетом
+                # ограничений на размеры
+                adj_node.upward_size_update(min_size=min_size, max_size=max_size)
+                root_size = tree.root.bin.size
+                if root_size[0] < min_length:
+                    tree.root.bin.length = min_length
+                if root_size[1] < min_width:
+                    tree.root.bin.width = min_width
+                if root_size[2] < min_height:
+                    tree.root.bin.height = min_height
+                # TODO: тип разреза не обновляется, может случиться
+                # так, что резать нужно будет по другому (в 7 примере)
+                tree.root.update_size()
+                if not is_defective_tree(tree, max_leaf_size):
+                    selector.add(tree)
+        if progress:
+            progress.set_value(max(progress.value, progress.total))
+            progress.flush()
+
+        if not selector.count:
+            raise BPPError(
+                'Не удалось получить раскрой.\n'
+                'Измените приоритеты, толщину реза или ограничения на максимальные размеры'
+            )
+        best, _ = selector.best()
+        get_all_residuals(best)
+        return best
+
+    def recalculation(self, tree, updatable_nodes, restrictions) -> None:
+        """Перерасчет дерева
+
+        :param tree: Исходное дерево
+        :type tree: Tree
+        :param updatable_nodes: Пары из узлов и их новых размеров
+        :type updatable_nodes: list[tuple[BinNode, tuple[number, number, number]]]
+        :param restrictions: Ограничения
+        :type restrictions: dict
+        """
+        node = updatable_nodes[0][0]
+        unplaced = get_unplaced_before(node.parent, tree.main_kit)
+
+        for node, new_size in updatable_nodes:
+            ingot_bin = Bin(*new_size, material=node.bin.material)
+            # создать новое дерево
+            new_tree = Tree(BinNode(ingot_bin, kit=Kit(unplaced)))
+            new_tree = self.stmh_idrd(new_tree, restrictions=restrictions)
+            # удалить размещенные заготовки
+            for cc_node in new_tree.root.cc_leaves:
+                for packed_rectangle in chain.from_iterable(cc_node.result.blanks.values()):
+                    unplaced.remove(packed_rectangle.rectangle)
+
+            # меняем поддерево
+            parent = node.parent
+            new_tree.root.bin.bin_type = node.bin.bin_type
+            new_tree.root.parent = parent
+            parent.delete(node)
+            parent.add(new_tree.root)
+
+    def problem_key(self, tree, restrictions) -> str:
+        """Ключ задачи для имени контрольной точки
+
+        Ключ зависит от начального дерева, ограничений, параметров
+        решателя и версии формата контрольной точки, поэтому точка
+        другой задачи или другой версии не используется.
+
+        :rtype: str
+        """
+        digest = blake2b(digest_size=8)
+        digest.update(tree_signature(tree))
+        digest.update(repr((
+            sorted(map(repr, (restrictions or {}).items())),
+            self.aspect_ratio, self.min_size, format_version()
+        )).encode())
+        return digest.hexdigest()
+
+
+def _expand(tree, aspect_ratio=10, min_size=None, level_subtree=0,
+            local=False, restrictions=None, with_priority=True, direction=0,
+            residual_workers=None):
+    """Один шаг раскрытия дерева с построением поддеревьев остатков
+
+    :return: Завершенные и незавершенные деревья, полученные из дерева
+    :rtype: tuple[list[Tree], list[Tree]]
+    """
+    level = deque([])
+    nodes = [
+        node for node in tree.root.leaves() if not is_empty_node(node)
+    ]
+    node = sorted(nodes, key=predicate)[0]
+    if is_cc_node(node):
+        _pack(node, level, restrictions, with_priority=with_priority)
+        # контролируем уровень построения поддеревьев
+        if tree._type == 0:
+            level_subtree = 0
+        if level_subtree < 1:
+            solver = Solver(
+                aspect_ratio=aspect_ratio, min_size=min_size,
+                residual_workers=residual_workers
+            )
+            solver.create_subtree(node, restrictions, level_subtree + 1)
+        if is_empty_tree(tree):
+            return [tree], []
+        return [], [tree]
+    _create_insert_template(
+        node, level, tree, local, restrictions, direction=direction
+    )
+    return [], list(level)
+
+
+def _solve_residual(solver, bin_, kit, restrictions, level_subtree):
+    """Раскрой остатка (None, если раскрой не получен)"""
+    tree = Tree(BinNode(bin_, kit))
+    tree._type = 1
+    try:
+        return solver.stmh_idrd(
+            tree, restrictions=restrictions, level_subtree=level_subtree,
+            with_priority=False
+        )
+    except BPPError:
+        return None
+
+
+def _direction_trees(solver, tree, **kwargs):
+    """Деревья одного прохода, построенные в процессе пула
+
+    Счетчик ID сдвигается за максимальный ID дерева (как при раскрытии
+    деревьев в процессах, см. :func:`stm._expand_in_worker`).
+    """
+    WithID.set_id(max(node._id for node in dfs(tree.root)) + 1)
+    return list(solver._stmh_idrd(tree, **kwargs))
+
+
+def _residual_pool(workers):
+    """Пул процессов для раскроя остатков (общий в пределах процесса)"""
+    pool = _POOLS.get(workers)
+    if pool is None:
+        pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+@atexit.register
+def shutdown_pools(workers=None) -> None:
+    """Закрытие пулов процессов для раскроя остатков
+
+    :param workers: Количество процессов пула, defaults to None
+                    (все пулы)
+    :type workers: int, optional
+    """
+    for key in list(_POOLS) if workers is None else [workers]:
+        pool = _POOLS.pop(key, None)
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def number_of_steps(num_of_heights, doubling=True):
+    """Количество шагов алгоритма
+
+    :param num_of_heights: Количество толщин
+    :type num_of_heights: int
+    :param doubling: Использование удвоения, когда используется толщина
+                     реза, defaults to True
+    :type doubling: bool, optional
+    :return: Количество операций в алгоритме
+    :rtype: int
+    """
+    # экспериментально подобранная формула (изначальная:
+    # 4 * (4 ** num_of_heights - 1) / 3)
+    number_of_trees = 4 * (2 ** num_of_heights - 1) / 2
+    if doubling:
+        number_of_trees *= 2
+        number = (2 ** num_of_heights * 2 - 2) / 2 + 1
+    else:
+        number = (2 ** num_of_heights - 1) / 2 + 1
+    return int(number_of_trees + number)
+
+
+def create_bins_residues(items, height, rolldir, material=None):
+    """Создание контейнеров из остатков
+
+    :param items: список прямоуголников-остатков
+    :type items: list[Rectangle]
+    :param height: толщина
+    :type height: Number
+    :param rolldir: направление проката
+    :type rolldir: Direction
+    :param material: материал, defaults to None
+    :type material: Material, optional
+    :return: Список контейнеров-остатков
+    :rtype: list[Bin]
+    """
+    args = (height, rolldir, material, BinType.residue)
+    return [Bin(item.length, item.width, *args) for item in items]
+
+
+def incoming_rectangles(rect, height, kit):
+    """Прямоугольники входящие в rect"""
+    return [
+        Rectangle3d(rect.length, rect.width, height).is_subrectangle(b, b.is_rotatable)
+        for b in kit
+    ]
+
+
+def filtration_residues(items, min_size=None, key=None):
+    """Фильтрация остатков
+
+    :param items: список прямоугольников
+    :type items: list[Rectangle]
+    :param min_size: минимальные размеры, defaults to None
+    :type min_size: Optional[tuple[Number, Number]], optional
+    :return: остатки с подходящими размерами
+    :rtype: list[Rectangle]
+    """
+    key = key or (lambda x: x)
+    residues = filter(lambda item: is_residual(key(item)), items)
+    p_is_suitable_sizes = partial(is_suitable_sizes, min_size=min_size)
+    if min_size:
+        residues = filter(lambda item: p_is_suitable_sizes(key(item)), residues)
+    return list(residues)
+
+
+def is_residual(item) -> bool:
+    """Проверка на остаток
+
+    :param item: Прямоугольник тип которого проверяется
+    :type item: Rectangle
+    :return: True если остаток и False в противном случае
+    :rtype: bool
+    """
+    return isinstance(item, Bin) or item.rtype == RectangleType.RESIDUAL
+
+
+def is_suitable_sizes(item, min_size) -> bool:
+    """Проверка минимальных размеров
+
+    :param item: Прямоугольник
+    :type item: Rectangle
+    :param min_size: Минимальные размеры в формате (length, width)
+    :type min_size: tuple[Number, Number]
+    :return: True если прямоугольник удовлетворяет минимальным размерам
+             и False в противном случае
+    :rtype: bool
+    """
+    if isinstance(item, Bin):
+        min_side = min(item.size[:2])
+        max_side = max(item.size[:2])
+    else:
+        min_side = item.min_side
+        max_side = item.max_side
+    return min_side >= min(min_size) and max_side >= max(min_size)
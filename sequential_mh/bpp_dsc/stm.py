@@ -6,16 +6,42 @@
     - Воронов Владимир Сергеевич
 """
 
-from collections import deque
+import random
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from copy import copy
+from functools import partial
+from importlib import import_module
+from itertools import chain
+from math import fsum
+from multiprocessing import Manager
+from queue import Empty
 from operator import itemgetter
+from time import monotonic
 from sequential_mh.bpp_dsc.rectangle import BinType
 
 from .tree import (
     get_max_size, is_cc_node, is_cutting_node, is_ingot_node, is_op_node, is_adj_node,
-    is_ubin_node, is_imt_node, delete_all_branch,
-    solution_efficiency, is_defective_tree
+    is_ubin_node, is_imt_node, is_rolling_node, delete_all_branch,
+    solution_efficiency, is_defective_tree, to_delete, tree_signature, WithID
 )
 from .support import dfs
+from .choice import TreeSelector, number_rolling
+from .frontier import FrontierStore
+from .checkpoint import (
+    CheckpointError, add_result as add_checkpoint_result,
+    load as load_checkpoint, remove as remove_checkpoint,
+    save as save_checkpoint
+)
+from .exception import BPPError, ForcedTermination
+
+
+# Допуск по эффективности при выборе решения (см. choice.choose_tree)
+TOLERANCE = 0.02
+
+# Старт портфеля: зерно генератора случайных чисел, направление проката
+# в шаблонах и уровень, до которого направления 3 и 4 дают оба проката
+Start = namedtuple('Start', ('seed', 'direction', 'full_level'))
 
 
 def is_zero_size(length, width, height):
@@ -32,6 +58,35 @@ def is_empty_node(node):
     return True
 
 
+def leaf_height(node):
+    """Толщина листа (для карты раскроя -- толщина упаковки)"""
+    if is_cc_node(node) and is_ubin_node(node.parent.parent) \
+            and hasattr(node.bin, 'd_height'):
+        return node.bin.d_height
+    return node.bin.height
+
+
+def remaining_blanks(node):
+    """Заготовки, которые еще могут быть размещены в листе
+
+    :return: Пары (заготовка, количество)
+    :rtype: Iterator[tuple[Blank, int]]
+    """
+    if is_cc_node(node):
+        height = leaf_height(node)
+        if height in node.kit:
+            yield from node.kit.counts(height)
+    elif is_adj_node(node):
+        yield from node.kit.counts()
+
+
+def remaining_volume(node):
+    """Объем заготовок, которые еще могут быть размещены в листе"""
+    return fsum(
+        blank.volume * count for blank, count in remaining_blanks(node)
+    )
+
+
 def is_empty_tree(tree):
     is_empty_flags = []
     for node in tree.root.leaves():
@@ -50,14 +105,157 @@ def potential_efficiency(node):
     return node.result.total_efficiency(*node.bin.size[:2])
 
 
+def total_efficiency(tree):
+    """Общая эффективность дерева (по объему корня)"""
+    return solution_efficiency(
+        tree.root, list(dfs(tree.root)), tree.main_kit, is_total=True
+    )
+
+
+def partial_efficiency(tree):
+    """Оценка частично построенного дерева
+
+    Эффективность (взвешенная на количество заготовок и с учетом
+    приоритетов) только по уже упакованным картам раскроя.
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :return: Оценка дерева
+    :rtype: float
+    """
+    packed = [node for node in tree.root.cc_leaves if node.result.qty()]
+    return solution_efficiency(
+        tree.root, packed, tree.main_kit, nd=True, is_p=True
+    )
+
+
+def efficiency_bound(tree, max_size=None):
+    """Верхняя оценка общей эффективности частично построенного дерева
+
+    Объем уже упакованных заготовок (включая поддеревья остатков)
+    вместе с объемом еще не упакованных заготовок, которые могут
+    быть размещены, отнесенный к объему корня. Не учитываются
+    заготовки толще всех неупакованных листьев и заготовки, которые
+    не помещаются в лист максимальных размеров своей толщины. Объем
+    неупакованных заготовок не больше свободного объема -- объема
+    корня за вычетом листов упакованных карт раскроя. Из
+    альтернативных веток проката в дереве остается одна, поэтому
+    для них берется наибольшая оценка, а не сумма.
+
+    Размещение новых заготовок эту величину не увеличивает, поэтому
+    оценка допустима для общей эффективности
+    (``solution_efficiency(..., is_total=True)``).
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :param max_size: Максимальные размеры листов по толщинам,
+                     defaults to None
+    :type max_size: dict, optional
+    :return: Верхняя оценка эффективности
+    :rtype: float
+    """
+    max_height = max(
+        (
+            leaf_height(node) for node in tree.root.leaves()
+            if not is_empty_node(node)
+        ),
+        default=0.
+    )
+
+    def is_feasible(blank):
+        if blank.height > max_height:
+            return False
+        size = get_max_size(max_size, blank.height)
+        return size is None or not to_delete(blank.length, blank.width, size) \
+            or not to_delete(blank.width, blank.length, size)
+
+    packed, remaining, committed = _bound_volumes(tree.root, is_feasible)
+    volume = tree.root.bin.volume
+    return (packed + min(remaining, max(volume - committed, 0.))) / volume
+
+
+def _bound_volumes(node, is_feasible):
+    """Объемы поддерева узла для :func:`efficiency_bound`
+
+    :return: Объем упакованных заготовок, объем заготовок, которые
+             еще могут быть размещены, и объем листов упакованных
+             карт раскроя
+    :rtype: tuple[float, float, float]
+    """
+    children = node.list_of_children()
+    if not children:
+        packed = committed = 0.
+        if is_cc_node(node):
+            packed = node.result.total_volume + fsum(
+                subnode.result.total_volume
+                for subtree in node.subtree
+                for subnode in subtree.root.cc_leaves
+            )
+            if node.result.qty():
+                committed = node.bin.volume
+        remaining = fsum(
+            blank.volume * count for blank, count in remaining_blanks(node)
+            if is_feasible(blank)
+        )
+        return packed, remaining, committed
+    volumes = [_bound_volumes(child, is_feasible) for child in children]
+    if is_rolling_node(node) and len(children) > 1:
+        # альтернативные ветки проката с копиями одного набора
+        packed, remaining, committed = zip(*volumes)
+        return max(packed), max(remaining), min(committed)
+    return tuple(map(fsum, zip(*volumes)))
+
+
+def choice_efficiency(tree, aspect_ratio=10):
+    """Эффективность дерева, по которой выбирается решение
+
+    Совпадает с оценкой в :func:`choice.choose_tree`.
+    """
+    return solution_efficiency(
+        tree.root, list(dfs(tree.root)), tree.main_kit,
+        max_aspect_ratio=aspect_ratio, nd=True, is_p=True
+    )
+
+
+def update_incumbent(stats, tree):
+    """Обновление лучшего построенного дерева
+
+    Как и в :func:`choice.choose_tree`, из деревьев, эффективность
+    которых отличается не более чем на :data:`TOLERANCE`,
+    предпочтение отдается дереву с меньшим количеством прокатов.
+
+    :param stats: Словарь с лучшим деревом ('incumbent') и его
+                  эффективностью ('incumbent_efficiency')
+    :type stats: dict
+    :param tree: Построенное дерево
+    :type tree: Tree
+    """
+    efficiency = choice_efficiency(tree)
+    incumbent = stats.get('incumbent')
+    if incumbent is not None:
+        best = stats['incumbent_efficiency']
+        if efficiency < best - TOLERANCE:
+            return
+        if efficiency <= best + TOLERANCE and \
+                number_rolling(tree.root) >= number_rolling(incumbent.root):
+            return
+    stats['incumbent'] = tree
+    stats['incumbent_efficiency'] = efficiency
+
+
 def get_unpacked_item(parent, node):
     # TODO: пересмотреть или перенести в метод???
     add_detail = {}
     add_detail[node.bin.height] = {}
+    # одинаковые заготовки идут подряд, количества для них не меняются
+    previous, n_blank_in_res, n_blank_in_kit = None, 0, 0
     for priority, group in parent.kit[node.bin.height].items():
         for item in group:
-            n_blank_in_res = node.result.qty_blank(item)
-            n_blank_in_kit = parent.kit.qty_blank(item)
+            if previous is None or type(previous) is not type(item) or \
+                    vars(previous) != vars(item):
+                n_blank_in_res = node.result.qty_blank(item)
+                n_blank_in_kit = parent.kit.qty_blank(item)
+                previous = item
             if n_blank_in_res < n_blank_in_kit:
                 for _ in range(n_blank_in_kit - n_blank_in_res):
                     if item.priority not in add_detail[node.bin.height]:
@@ -75,7 +273,9 @@ def get_unpacked_item(parent, node):
 
 
 def stmh_idrd(tree, in_process_filtering=True, postfiltration=True,
-              restrictions=None):
+              restrictions=None, directions=None, beam_width=None,
+              bound_pruning=False, deduplicate=False, time_budget=None,
+              max_expansions=None, frontier_limit=None, progress=None):
     """Последовательная древовидная метаэвристика
 
     Алгоритм для поиска решения задачи упаковки слитка. Задача
@@ -100,34 +300,98 @@ def stmh_idrd(tree, in_process_filtering=True, postfiltration=True,
     :type postfiltration: bool, optional
     :param restrictions: Словарь ограничений, defaults to None
     :type restrictions: dict, optional
+    :param directions: Направления проката, для каждого из которых
+                       строится отдельный набор деревьев (проходы
+                       выполняются одновременно в разных процессах),
+                       defaults to None (один проход с обоими
+                       направлениями)
+    :type directions: tuple[int], optional
+    :param beam_width: Ширина луча -- максимальное количество частично
+                       построенных деревьев на каждом уровне,
+                       defaults to None (без ограничения)
+    :type beam_width: int, optional
+    :param bound_pruning: Отсекать деревья по верхней оценке
+                          эффективности, defaults to False
+    :type bound_pruning: bool, optional
+    :param deduplicate: Пропускать повторно построенные одинаковые
+                        деревья, defaults to False
+    :type deduplicate: bool, optional
+    :param time_budget: Ограничение времени построения в секундах:
+                        по его истечении возвращается лучшее из уже
+                        построенных деревьев, defaults to None
+    :type time_budget: float, optional
+    :param max_expansions: Ограничение количества раскрытий деревьев,
+                           defaults to None
+    :type max_expansions: int, optional
+    :param frontier_limit: Максимальное количество частично построенных
+                           деревьев в памяти (остальные выгружаются
+                           на диск), defaults to None
+    :type frontier_limit: int, optional
+    :param progress: Прогресс и флаг отмены построения,
+                     defaults to None
+    :type progress: progress.Progress, optional
+    :raises ForcedTermination: если построение было отменено
     :return: Дерево раскроя
     :rtype: Tree
     """
     is_main = True
-    trees = _stmh_idrd(
-        tree, restrictions=restrictions, local=not is_main,
-        with_filter=in_process_filtering
-    )
+    stats = {}
+    if directions:
+        trees = direction_passes(
+            tree, directions, restrictions=restrictions, local=not is_main,
+            with_filter=in_process_filtering, beam_width=beam_width,
+            bound_pruning=bound_pruning, deduplicate=deduplicate,
+            time_budget=time_budget, max_expansions=max_expansions,
+            frontier_limit=frontier_limit,
+            cancel=progress and progress.is_cancelled,
+            progress=progress and progress.set_value
+        )
+    else:
+        # деревья обрабатываются по мере построения и не накапливаются
+        trees = iter_stmh_idrd(
+            tree, restrictions=restrictions, local=not is_main,
+            with_filter=in_process_filtering, beam_width=beam_width,
+            bound_pruning=bound_pruning, deduplicate=deduplicate,
+            time_budget=time_budget, max_expansions=max_expansions,
+            frontier_limit=frontier_limit,
+            cancel_event=progress and progress.token, on_step=progress,
+            stats=stats
+        )
 
     if restrictions:
         max_size = restrictions.get('max_size')
     else:
         max_size = None
-    print(f'Количество деревьев: {len(trees)}')
-    if postfiltration:
-        trees = [
-            item for item in trees if not is_defective_tree(item, max_size)
-        ]
-    print(f'Годных деревьев: {len(trees)}')
-    best = max(
-        trees,
-        key=lambda item: solution_efficiency(
+    n_trees = 0
+    n_suitable = 0
+    best = None
+    best_efficiency = None
+    for item in trees:
+        n_trees += 1
+        if postfiltration and is_defective_tree(item, max_size):
+            continue
+        n_suitable += 1
+        efficiency = solution_efficiency(
             item.root, list(dfs(item.root)), item.main_kit, nd=True, is_p=True
         )
-    )
-    total_efficiency = solution_efficiency(
-        best.root, list(dfs(best.root)), best.main_kit, is_total=True
-    )
+        if best is None or efficiency > best_efficiency:
+            best, best_efficiency = item, efficiency
+    incumbent = stats.get('incumbent')
+    if stats.get('interrupted') and incumbent is not None and not (
+            postfiltration and is_defective_tree(incumbent, max_size)):
+        # при досрочной остановке возвращается лучшее построенное
+        # дерево, выбранное по правилу choose_tree (см. update_incumbent)
+        best = incumbent
+    print(f'Количество деревьев: {n_trees}')
+    print(f'Годных деревьев: {n_suitable}')
+    if best is None:
+        if stats.get('interrupted'):
+            raise ValueError(
+                'Не построено ни одного годного дерева в пределах '
+                'ограничений построения'
+            )
+        raise ValueError('Не построено ни одного годного дерева')
+    total = total_efficiency(best)
     weighted_efficiency = solution_efficiency(
         best.root, list(dfs(best.root)), best.main_kit, nd=True
     )
@@ -135,70 +399,739 @@ def stmh_idrd(tree, in_process_filtering=True, postfiltration=True,
         best.root, list(dfs(best.root)), best.main_kit, is_p=True
     )
     print('Построение дерева завершено')
-    print(f'Общая эффективность: {total_efficiency:.4f}')
+    print(f'Общая эффективность: {total:.4f}')
     print(f'Взвешенная эффективность: {weighted_efficiency:.4f}')
     print(f'Эффективность с приоритетами: {prioritized_efficiency:.4f}')
+    if stats.get('interrupted'):
+        print(
+            f'Построение остановлено после {stats["expansions"]} раскрытий '
+            f'(построено деревьев: {n_trees})'
+        )
+    if stats.get('spilled'):
+        print(f'Выгружено на диск: {stats["spilled"]} деревьев')
+    if stats.get('duplicates'):
+        print(f'Пропущено повторных деревьев: {stats["duplicates"]}')
+    if stats.get('bounded'):
+        print(f'Отсечено по верхней оценке: {stats["bounded"]} деревьев')
+    if stats.get('pruned'):
+        print(
+            f'Отброшено лучом: {stats["pruned"]} деревьев '
+            f'(лучшая оценка отброшенного: {stats["best_pruned"]:.4f}, '
+            f'решения: {partial_efficiency(best):.4f})'
+        )
     # print(f'Взвешенная эффективность: {efficiency:.4f}')
     print('-' * 50)
     return best
 
 
+def direction_passes(tree, directions=(1, 2), cancel=None, progress=None,
+                     **kwargs):
+    """Одновременное построение деревьев для нескольких направлений
+
+    Каждый проход (:func:`_stmh_idrd` с одним направлением проката)
+    выполняется в отдельном процессе. Проходы используют общий флаг
+    отмены, а количество выполненных ими шагов суммируется.
+
+    :param tree: Начальное дерево
+    :type tree: Tree
+    :param directions: Направления проката, defaults to (1, 2)
+    :type directions: tuple[int], optional
+    :param cancel: Функция без аргументов, возвращающая True, если
+                   построение нужно прервать, defaults to None
+    :type cancel: Callable[[], bool], optional
+    :param progress: Функция, принимающая суммарное количество
+                     выполненных шагов, defaults to None
+    :type progress: Callable[[int], None], optional
+    :param kwargs: Параметры :func:`_stmh_idrd`
+    :raises ForcedTermination: если построение было прервано
+    :return: Деревья всех проходов в порядке направлений
+    :rtype: list[Tree]
+    """
+    with Manager() as manager:
+        cancel_event = manager.Event()
+        steps = manager.Queue()
+        with ProcessPoolExecutor(max_workers=len(directions)) as executor:
+            futures = [
+                executor.submit(
+                    _stmh_idrd, copy(tree), direction=direction,
+                    cancel_event=cancel_event, on_step=steps.put, **kwargs
+                )
+                for direction in directions
+            ]
+            step = 0
+            pending = futures
+            while pending:
+                if cancel and cancel():
+                    cancel_event.set()
+                _, pending = wait(pending, timeout=0.1)
+                step += _drain(steps)
+                if progress:
+                    progress(step)
+            trees = []
+            for future in futures:
+                trees.extend(future.result())
+    return trees
+
+
+def portfolio_starts(number, seed=0, full_levels=(7, 5, 3)):
+    """Набор стартов для :func:`portfolio`
+
+    Первые два старта -- детерминированные проходы с вертикальным
+    и горизонтальным прокатом, остальные чередуют случайные политики
+    3 и 4 с уровнями из ``full_levels``. Зерна стартов различны:
+    ``seed``, ``seed + 1`` и т.д.
+
+    :param number: Количество стартов
+    :type number: int
+    :param seed: Начальное зерно, defaults to 0
+    :type seed: int, optional
+    :param full_levels: Уровни полного перебора для случайных политик,
+                        defaults to (7, 5, 3)
+    :type full_levels: tuple[int], optional
+    :return: Старты портфеля
+    :rtype: list[Start]
+    """
+    policies = [(1, None), (2, None)]
+    random_policies = [
+        (direction, full_level)
+        for full_level in full_levels for direction in (3, 4)
+    ]
+    starts = []
+    for i in range(number):
+        if i < len(policies):
+            direction, full_level = policies[i]
+        else:
+            direction, full_level = random_policies[
+                (i - len(policies)) % len(random_policies)
+            ]
+        starts.append(Start(seed + i, direction, full_level))
+    return starts
+
+
+def portfolio(tree, starts, workers=None, restrictions=None,
+              aspect_ratio=10, **kwargs):
+    """Мультистарт построения деревьев с разными политиками проката
+
+    Каждый старт (:func:`_stmh_idrd` с заданными направлением,
+    уровнем полного перебора и зерном генератора случайных чисел)
+    выполняется в пуле процессов. Деревья всех стартов без дефектов
+    объединяются, и решение выбирается по критериям
+    :func:`choice.choose_tree` (:class:`choice.TreeSelector`).
+    Повторный запуск с теми же стартами дает то же решение.
+
+    :param tree: Начальное дерево
+    :type tree: Tree
+    :param starts: Старты (см. :func:`portfolio_starts`)
+    :type starts: list[Start]
+    :param workers: Количество процессов, defaults to None (по
+                    количеству процессоров)
+    :type workers: int, optional
+    :param restrictions: Словарь ограничений, defaults to None
+    :type restrictions: dict, optional
+    :param aspect_ratio: Максимальное соотношение сторон при выборе
+                         решения, defaults to 10
+    :type aspect_ratio: float, optional
+    :param kwargs: Остальные параметры :func:`_stmh_idrd`
+    :raises BPPError: если ни один старт не дал дерева без дефектов
+    :return: Лучшее дерево, его эффективность и старт, на котором
+             оно построено
+    :rtype: tuple[Tree, float, Start]
+    """
+    if restrictions:
+        max_size = restrictions.get('max_size')
+    else:
+        max_size = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _run_start, copy(tree), start, restrictions=restrictions,
+                **kwargs
+            )
+            for start in starts
+        ]
+        selector = TreeSelector(aspect_ratio=aspect_ratio)
+        origins = {}
+        for start, future in zip(starts, futures):
+            for item in future.result():
+                if is_defective_tree(item, max_size):
+                    continue
+                origins[id(item)] = start
+                selector.add(item)
+    if not selector.count:
+        raise BPPError('Ни один старт не дал дерева без дефектов')
+    best, efficiency = selector.best()
+    return best, efficiency, origins[id(best)]
+
+
+def _run_start(tree, start, **kwargs):
+    """Построение деревьев для одного старта портфеля"""
+    random.seed(start.seed)
+    return _stmh_idrd(
+        tree, direction=start.direction, full_level=start.full_level,
+        **kwargs
+    )
+
+
+def _drain(queue):
+    """Сумма всех значений, накопленных в очереди"""
+    total = 0
+    while True:
+        try:
+            total += queue.get_nowait()
+        except Empty:
+            return total
+
+
 def _stmh_idrd(tree, local=False, with_filter=True, restrictions=None,
-               with_priority=True):
-    # if local:
-    #     level = deque(tree.root.leaves())
-    #     for node in tree.root.cc_leaves:
-    #         node.kit.update(node.result.unplaced)
-    # else:
-    #     level = deque([tree.root])
+               with_priority=True, direction=0, workers=None,
+               cancel_event=None, on_step=None, beam_width=None,
+               bound_pruning=False, deduplicate=False, time_budget=None,
+               max_expansions=None, full_level=None, frontier_limit=None,
+               spill_dir=None, checkpoint=None, checkpoint_interval=60.,
+               stats=None):
+    """Построение всех деревьев раскроя обходом в ширину
+
+    При ``workers > 1`` деревья текущего уровня раскрываются
+    параллельно в пуле процессов: деревья уровня независимы
+    (каждое -- полная копия), поэтому результат совпадает
+    с последовательным режимом с точностью до порядка деревьев.
+    В пуле находится вдвое больше деревьев, чем процессов, а их
+    результаты обрабатываются по мере готовности.
+
+    :param tree: Начальное дерево
+    :type tree: Tree
+    :param local: Флаг локального построения, defaults to False
+    :type local: bool, optional
+    :param with_filter: Флаг фильтрации деревьев в процессе построения,
+                        defaults to True
+    :type with_filter: bool, optional
+    :param restrictions: Словарь ограничений, defaults to None
+    :type restrictions: dict, optional
+    :param with_priority: Учитывать приоритеты при упаковке,
+                          defaults to True
+    :type with_priority: bool, optional
+    :param direction: Направление проката в шаблонах (0 -- оба,
+                      1 -- вертикальный, 2 -- горизонтальный,
+                      3 и 4 -- оба до уровня ``full_level``, затем
+                      случайно), defaults to 0
+    :type direction: int, optional
+    :param full_level: Уровень шаблонов, до которого направления 3 и 4
+                       дают оба проката, defaults to None (7 для
+                       дерева, 3 для поддерева)
+    :type full_level: int, optional
+    :param frontier_limit: Максимальное количество частично построенных
+                           деревьев в памяти: остальные деревья уровня
+                           выгружаются во временные файлы
+                           (:class:`frontier.FrontierStore`); не
+                           используется с ``beam_width`` и в режиме
+                           с ограничениями, defaults to None
+    :type frontier_limit: int, optional
+    :param spill_dir: Каталог для выгружаемых деревьев, defaults to None
+                      (системный временный каталог)
+    :type spill_dir: str, optional
+    :param checkpoint: Каталог контрольной точки: состояние построения
+                       периодически записывается в него
+                       (:mod:`checkpoint`), и построение можно
+                       продолжить функцией :func:`resume_stmh_idrd`;
+                       после завершения построения точка удаляется,
+                       defaults to None
+    :type checkpoint: str или Path, optional
+    :param checkpoint_interval: Интервал записи контрольной точки
+                                в секундах, defaults to 60
+    :type checkpoint_interval: float, optional
+    :param workers: Количество процессов для раскрытия деревьев,
+                    defaults to None (последовательный режим)
+    :type workers: int, optional
+    :param cancel_event: Флаг отмены построения (threading.Event, его
+                         прокси или :class:`progress.CancelToken`),
+                         defaults to None
+    :type cancel_event: threading.Event, optional
+    :param on_step: Функция, вызываемая после каждого шага
+                    с количеством раскрытых деревьев, defaults to None
+    :type on_step: Callable[[int], None], optional
+    :param beam_width: Ширина луча: после раскрытия всех деревьев
+                       уровня из следующего уровня остаются только
+                       лучшие по :func:`partial_efficiency` деревья
+                       (при обходе в глубину -- лучшие из деревьев,
+                       полученных за шаг), defaults to None (без
+                       ограничения)
+    :type beam_width: int, optional
+    :param bound_pruning: Метод ветвей и границ: дерево отбрасывается,
+                          если его :func:`efficiency_bound` меньше
+                          общей эффективности лучшего построенного
+                          дерева более чем на :data:`TOLERANCE`,
+                          defaults to False
+    :type bound_pruning: bool, optional
+    :param deduplicate: Пропускать построенные деревья, состояние
+                        которых (:func:`tree_signature`) уже
+                        встречалось, defaults to False
+    :type deduplicate: bool, optional
+    :param time_budget: Ограничение времени построения в секундах,
+                        defaults to None
+    :type time_budget: float, optional
+    :param max_expansions: Ограничение количества раскрытий деревьев,
+                           defaults to None
+    :type max_expansions: int, optional
+    :param stats: Словарь, в который записывается количество
+                  отброшенных лучом деревьев ('pruned'), лучшая
+                  оценка среди них ('best_pruned'), количество
+                  деревьев, отсеченных по верхней оценке ('bounded'),
+                  количество повторных деревьев ('duplicates'),
+                  количество раскрытий ('expansions'), количество
+                  выгруженных на диск деревьев ('spilled') и флаг
+                  досрочной остановки ('interrupted'),
+                  defaults to None
+    :type stats: dict, optional
+    :raises ForcedTermination: если установлен флаг отмены (при
+                               заданных ограничениях -- только если
+                               еще не построено ни одного дерева)
+    :return: Список построенных деревьев
+    :rtype: list[Tree]
+
+    .. note::
+        При заданном ``time_budget`` или ``max_expansions`` деревья
+        раскрываются в глубину, чтобы построенные деревья появлялись
+        как можно раньше. Лучшее из них по критериям
+        :func:`choice.choose_tree` хранится в ``stats['incumbent']``.
+        Когда ограничение исчерпано или установлен флаг отмены,
+        построение останавливается и возвращаются уже построенные
+        деревья. Если к этому моменту не построено ни одного дерева
+        без дефектов, построение тоже останавливается: в ``stats``
+        не будет ``'incumbent'`` (решение в пределах ограничений
+        не найдено).
+    """
+    return list(iter_stmh_idrd(
+        tree, local=local, with_filter=with_filter, restrictions=restrictions,
+        with_priority=with_priority, direction=direction, workers=workers,
+        cancel_event=cancel_event, on_step=on_step, beam_width=beam_width,
+        bound_pruning=bound_pruning, deduplicate=deduplicate,
+        time_budget=time_budget, max_expansions=max_expansions,
+        full_level=full_level, frontier_limit=frontier_limit,
+        spill_dir=spill_dir, checkpoint=checkpoint,
+        checkpoint_interval=checkpoint_interval, stats=stats
+    ))
+
+
+def iter_stmh_idrd(tree, local=False, with_filter=True, restrictions=None,
+                   with_priority=True, direction=0, workers=None,
+                   cancel_event=None, on_step=None, beam_width=None,
+                   bound_pruning=False, deduplicate=False, time_budget=None,
+                   max_expansions=None, full_level=None, frontier_limit=None,
+                   spill_dir=None, checkpoint=None, checkpoint_interval=60.,
+                   stats=None):
+    """Генератор деревьев раскроя
 
-    level = deque([tree])
-    result = []
+    Построенные деревья выдаются сразу по мере их появления, поэтому
+    их не нужно хранить до конца построения (см.
+    :class:`choice.TreeSelector`). Параметры и порядок деревьев
+    такие же, как у :func:`_stmh_idrd`.
+
+    :return: Построенные деревья
+    :rtype: Iterator[Tree]
+    """
+    expand = partial(
+        _expand, local=local, restrictions=restrictions,
+        with_priority=with_priority, direction=direction,
+        full_level=full_level
+    )
+    search = partial(
+        _search, tree, expand, with_filter, restrictions,
+        cancel_event=cancel_event, on_step=on_step, beam_width=beam_width,
+        bound_pruning=bound_pruning, deduplicate=deduplicate,
+        time_budget=time_budget, max_expansions=max_expansions,
+        frontier_limit=frontier_limit, spill_dir=spill_dir,
+        checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+        stats=stats
+    )
+    yield from _run_search(search, workers)
+
+
+def resume_stmh_idrd(checkpoint, workers=None, cancel_event=None,
+                     on_step=None, stats=None):
+    """Продолжение построения с контрольной точки
+
+    Построение продолжается с теми же параметрами, состоянием
+    генератора случайных чисел и счетчиком ID узлов, поэтому
+    в последовательном режиме результат совпадает с построением без
+    перерыва. Ограничение времени (``time_budget``) продолжается
+    с остатка на момент записи точки.
+
+    :param checkpoint: Каталог контрольной точки (см. :func:`_stmh_idrd`)
+    :type checkpoint: str или Path
+    :param workers: Количество процессов для раскрытия деревьев,
+                    defaults to None (последовательный режим)
+    :type workers: int, optional
+    :param cancel_event: Флаг отмены построения, defaults to None
+    :type cancel_event: threading.Event, optional
+    :param on_step: Функция, вызываемая после каждого шага
+                    с количеством раскрытых деревьев, defaults to None
+    :type on_step: Callable[[int], None], optional
+    :param stats: Словарь статистики (см. :func:`_stmh_idrd`),
+                  defaults to None
+    :type stats: dict, optional
+    :raises FileNotFoundError: если контрольной точки нет
+    :raises checkpoint.CheckpointError: если точка записана другой
+                                        версией или повреждена
+    :return: Список всех построенных деревьев (включая построенные
+             до записи точки)
+    :rtype: list[Tree]
+    """
+    return list(iter_resume_stmh_idrd(
+        checkpoint, workers=workers, cancel_event=cancel_event,
+        on_step=on_step, stats=stats
+    ))
+
+
+def iter_resume_stmh_idrd(checkpoint, workers=None, cancel_event=None,
+                          on_step=None, stats=None):
+    """Генератор деревьев, продолжающий построение с контрольной точки
+
+    Контрольная точка читается сразу при вызове, деревья выдаются
+    по мере построения. Параметры такие же, как
+    у :func:`resume_stmh_idrd`.
+
+    :raises FileNotFoundError: если контрольной точки нет
+    :raises checkpoint.CheckpointError: если точка записана другой
+                                        версией или повреждена
+    :return: Построенные деревья (включая построенные до записи точки)
+    :rtype: Iterator[Tree]
+    """
+    state, frontier, results = load_checkpoint(checkpoint)
+    module, name = state['expand_func']
+    # функция раскрытия ищется только среди модулей библиотеки
+    if module.rpartition('.')[0] != __name__.rpartition('.')[0]:
+        raise CheckpointError(
+            f'Недопустимая функция раскрытия: {module}.{name}'
+        )
+    expand = partial(getattr(import_module(module), name), **state['expand'])
+    search = partial(
+        _search, None, expand, cancel_event=cancel_event, on_step=on_step,
+        time_budget=state['time_left'], checkpoint=checkpoint,
+        resume=(state, frontier, results), stats=stats, **state['search']
+    )
+    return _run_search(search, workers)
+
+
+def _run_search(search, workers):
+    if workers is None or workers <= 1:
+        yield from search()
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from search(executor=executor, max_in_flight=2 * workers)
+
+
+def _search(tree, expand, with_filter, restrictions, executor=None,
+            max_in_flight=1, cancel_event=None, on_step=None, beam_width=None,
+            bound_pruning=False, deduplicate=False, time_budget=None,
+            max_expansions=None, frontier_limit=None, spill_dir=None,
+            checkpoint=None, checkpoint_interval=60., keep_checkpoint=False,
+            resume=None, stats=None):
+    seen = set()
+    incumbent = 0.
+    # количество построенных деревьев, записанных в контрольную точку
+    n_results = 0
+    if stats is None:
+        stats = {}
+    stats.setdefault('pruned', 0)
+    stats.setdefault('best_pruned', 0.)
+    stats.setdefault('bounded', 0)
+    stats.setdefault('duplicates', 0)
+    stats.setdefault('expansions', 0)
+    stats.setdefault('spilled', 0)
+    stats['interrupted'] = False
+    stats.pop('incumbent', None)
+    stats.pop('incumbent_efficiency', None)
 
     if restrictions:
         max_size = restrictions.get('max_size')
     else:
         max_size = None
 
-    while level:
-        # 1) Фильтрация узлов (пустой набор для бинов и карт; проверка
-        #       размеров для бинов и карт (если у карт не хватает места
-        #       - удаление группы толщины))
-        new_level = deque([])
-        for _, tree_ in enumerate(level):
-            if with_filter and is_defective_tree(tree_, max_size=max_size):
+    # режим с ограничениями: обход в глубину и лучшее построенное дерево
+    anytime = time_budget is not None or max_expansions is not None
+    deadline = None if time_budget is None else monotonic() + time_budget
+    expansions = 0
+
+    # выгрузка уровня на диск возможна только при обходе в ширину
+    # без луча (лучу нужен весь уровень)
+    store = None
+    if frontier_limit and not anytime and not beam_width:
+        store = FrontierStore(max_in_memory=frontier_limit, directory=spill_dir)
+        level = store
+    else:
+        level = deque()
+    # при обходе в ширину с лучом -- деревья следующего уровня, луч
+    # применяется к ним после раскрытия всех деревьев текущего уровня
+    next_level = deque()
+    # деревья, раскрываемые в процессах пула (в порядке передачи),
+    # и такие же деревья, восстановленные из контрольной точки
+    in_flight = {}
+    retry = deque()
+
+    def take():
+        while retry or level or next_level:
+            if retry:
+                tree_ = retry.popleft()
+            elif level:
+                tree_ = level.pop() if anytime else level.popleft()
+            elif in_flight:
+                # уровень еще раскрывается, луч к следующему уровню
+                # применяется после раскрытия всех его деревьев
+                return None
+            else:
+                level.extend(_beam(next_level, beam_width, stats))
+                next_level.clear()
                 continue
-            if is_empty_tree(tree_):
-                result.append(tree_)
+            if bound_pruning and incumbent and \
+                    efficiency_bound(tree_, max_size) < incumbent - TOLERANCE:
+                stats['bounded'] += 1
+                continue
+            return tree_
+        return None
+
+    def is_duplicate(tree_):
+        # одинаковые деревья получаются после упаковки карт (ветки с
+        # разным порядком проката, не влияющим на раскрой), поэтому
+        # проверяются построенные, а не раскрываемые деревья
+        if not deduplicate:
+            return False
+        signature = tree_signature(tree_)
+        if signature in seen:
+            stats['duplicates'] += 1
+            return True
+        seen.add(signature)
+        return False
+
+    def finish(tree_, is_new=True):
+        nonlocal n_results, incumbent
+        if anytime and not (with_filter and is_defective_tree(tree_, max_size)):
+            update_incumbent(stats, tree_)
+        if bound_pruning and not is_defective_tree(tree_, max_size):
+            incumbent = max(incumbent, total_efficiency(tree_))
+        if checkpoint is not None and is_new:
+            # деревья не накапливаются в памяти, а дописываются в файл
+            add_checkpoint_result(checkpoint, tree_)
+            n_results += 1
+        return tree_
+
+    def save():
+        state = {
+            'expand_func': (expand.func.__module__, expand.func.__qualname__),
+            'expand': dict(expand.keywords),
+            'search': {
+                'with_filter': with_filter, 'restrictions': restrictions,
+                'beam_width': beam_width, 'bound_pruning': bound_pruning,
+                'deduplicate': deduplicate, 'max_expansions': max_expansions,
+                'frontier_limit': frontier_limit, 'spill_dir': spill_dir,
+                'checkpoint_interval': checkpoint_interval,
+                'keep_checkpoint': keep_checkpoint,
+            },
+            'time_left': None if deadline is None else deadline - monotonic(),
+            'stats': {
+                key: value for key, value in stats.items()
+                if key not in ('incumbent', 'incumbent_efficiency')
+            },
+            'seen': list(seen),
+            'next_level': len(next_level),
+            'in_flight': len(in_flight),
+            'results': n_results,
+            'expansions': expansions,
+            'incumbent': incumbent,
+            'random': random.getstate(),
+            'next_id': WithID.peek_id(),
+        }
+        # раскрываемые деревья не изменяются (раскрываются их копии),
+        # поэтому после восстановления они раскрываются заново
+        frontier = chain(in_flight.values(), level, next_level)
+        save_checkpoint(checkpoint, state, frontier)
+
+    # новые деревья, еще не прошедшие фильтрацию
+    pending = [tree]
+    if resume is not None:
+        state, frontier, results = resume
+        pending = []
+        stats.update(state['stats'])
+        seen.update(state['seen'])
+        expansions = state['expansions']
+        incumbent = state['incumbent']
+        n_results = state['results']
+        try:
+            for tree_ in results:
+                yield finish(tree_, is_new=False)
+            for tree_ in frontier:
+                if len(retry) < state.get('in_flight', 0):
+                    retry.append(tree_)
+                else:
+                    level.append(tree_)
+        except CheckpointError:
+            # поврежденная точка удаляется, чтобы следующее построение
+            # началось заново
+            remove_checkpoint(checkpoint)
+            raise
+        for _ in range(state.get('next_level', 0)):
+            next_level.appendleft(level.pop())
+        random.setstate(state['random'])
+        WithID.set_id(state['next_id'])
+    saved = monotonic()
+    try:
+        while True:
+            # 1) Фильтрация новых узлов (пустой набор для бинов и карт;
+            #       проверка размеров для бинов и карт (если у карт не
+            #       хватает места - удаление группы толщины)). Деревья
+            #       уровня не изменяются, поэтому проверяются один раз
+            candidates = []
+            for tree_ in pending:
+                if with_filter and is_defective_tree(tree_, max_size=max_size):
+                    continue
+                if is_empty_tree(tree_):
+                    if not is_duplicate(tree_):
+                        yield finish(tree_)
+                elif beam_width:
+                    candidates.append(tree_)
+                else:
+                    level.append(tree_)
+            pending = []
+            if beam_width and anytime:
+                level.extend(_beam(candidates, beam_width, stats))
             else:
-                new_level.append(tree_)
-        level = new_level
-        if not level:
-            break
-        # 2) Сортировка по приоритету, толщине и типу (узлы карт должны
-        #       идти перед бинами, но приоритет и толщина должны иметь
-        #       первостепенное влияние)
-        # 3) получить первую ноду (без удаления)
-        # 4) если она типа 'карта раскроя':
-
-        tree = level.popleft()
-        nodes = [
-            node for node in tree.root.leaves() if not is_empty_node(node)
-        ]
-        nodes = deque(sorted(nodes, key=predicate))
-        node = nodes[0]
-        if is_cc_node(node):
-            _pack(node, level, restrictions, with_priority=with_priority)
-            if is_empty_tree(tree):
-                result.append(tree)
+                next_level.extend(candidates)
+            if checkpoint is not None and \
+                    monotonic() - saved >= checkpoint_interval:
+                save()
+                saved = monotonic()
+            # 2)-5) раскрытие первых деревьев уровня
+            if executor is None:
+                tree_ = take()
+                if tree_ is None:
+                    break
+                expanded = [expand(tree_)]
             else:
-                level.append(tree)
+                # в пуле больше деревьев, чем процессов, и результаты
+                # обрабатываются по мере готовности, поэтому долгое
+                # раскрытие одного дерева не оставляет процессы без работы
+                while len(in_flight) < max_in_flight and (
+                        max_expansions is None
+                        or expansions + len(in_flight) < max_expansions):
+                    tree_ = take()
+                    if tree_ is None:
+                        break
+                    future = executor.submit(_expand_in_worker, expand, tree_)
+                    in_flight[future] = tree_
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                expanded = []
+                for future in [item for item in in_flight if item in done]:
+                    del in_flight[future]
+                    expanded.append(future.result())
+            n_expanded = 0
+            for finished, unfinished in expanded:
+                for tree_ in finished:
+                    if not is_duplicate(tree_):
+                        yield finish(tree_)
+                n_expanded += 1
+                pending.extend(unfinished)
+            expansions += n_expanded
+            stats['expansions'] += n_expanded
+            if on_step:
+                on_step(n_expanded)
+            is_cancelled = cancel_event is not None and cancel_event.is_set()
+            has_solution = anytime and 'incumbent' in stats
+            if is_cancelled and not has_solution:
+                raise ForcedTermination('Процесс раскроя был прерван')
+            if anytime and (
+                    is_cancelled
+                    or (deadline is not None and monotonic() >= deadline)
+                    or (max_expansions is not None
+                        and expansions >= max_expansions)):
+                # ограничение исчерпано (в том числе если годного
+                # дерева еще нет -- тогда в stats нет 'incumbent')
+                stats['interrupted'] = True
+                # построенные, но еще не отфильтрованные деревья
+                for tree_ in pending:
+                    if with_filter and is_defective_tree(tree_, max_size):
+                        continue
+                    if is_empty_tree(tree_) and not is_duplicate(tree_):
+                        yield finish(tree_)
+                break
+    finally:
+        for future in in_flight:
+            future.cancel()
+        if store is not None:
+            stats['spilled'] += store.spilled
+            store.close()
+    if checkpoint is not None:
+        if keep_checkpoint:
+            # завершенное построение: при продолжении с точки деревья
+            # восстанавливаются без раскрытия
+            save()
         else:
-            # 5) иначе (нужна вставка шаблона):
-            # 5.1) получить первую ноду (с удалением из уровня)
-            _create_insert_template(node, level, tree, local, restrictions)
+            remove_checkpoint(checkpoint)
+
+
+def _beam(trees, beam_width, stats):
+    """Отбор лучших по :func:`partial_efficiency` деревьев с сохранением
+    их порядка
+
+    :return: Оставшиеся деревья
+    :rtype: list[Tree]
+    """
+    if len(trees) <= beam_width:
+        return list(trees)
+    scores = [partial_efficiency(tree) for tree in trees]
+    ranked = sorted(
+        range(len(scores)), key=lambda i: scores[i], reverse=True
+    )
+    kept = set(ranked[:beam_width])
+    stats['pruned'] += len(scores) - beam_width
+    stats['best_pruned'] = max(
+        stats['best_pruned'], scores[ranked[beam_width]]
+    )
+    return [tree for i, tree in enumerate(trees) if i in kept]
 
-    return result
+
+def _expand(tree, local=False, restrictions=None, with_priority=True,
+            direction=0, full_level=None):
+    """Один шаг раскрытия дерева
+
+    :return: Завершенные и незавершенные деревья, полученные из дерева
+    :rtype: tuple[list[Tree], list[Tree]]
+    """
+    level = deque([])
+    # 2) Сортировка по приоритету, толщине и типу (узлы карт должны
+    #       идти перед бинами, но приоритет и толщина должны иметь
+    #       первостепенное влияние)
+    # 3) получить первую ноду (без удаления)
+    # 4) если она типа 'карта раскроя':
+    nodes = [
+        node for node in tree.root.leaves() if not is_empty_node(node)
+    ]
+    nodes = deque(sorted(nodes, key=predicate))
+    node = nodes[0]
+    if is_cc_node(node):
+        _pack(node, level, restrictions, with_priority=with_priority)
+        if is_empty_tree(tree):
+            return [tree], []
+        return [], [tree]
+    # 5) иначе (нужна вставка шаблона):
+    # 5.1) получить первую ноду (с удалением из уровня)
+    _create_insert_template(
+        node, level, tree, local, restrictions, direction=direction,
+        full_level=full_level
+    )
+    return [], list(level)
+
+
+def _expand_in_worker(expand, tree):
+    """Раскрытие дерева в дочернем процессе
+
+    Счетчик ID в каждом процессе свой, поэтому перед раскрытием он
+    сдвигается за максимальный ID дерева, чтобы новые узлы не
+    совпали по ID с уже существующими (поиск узлов в копиях дерева
+    идет по ID).
+    """
+    WithID.set_id(max(node._id for node in dfs(tree.root)) + 1)
+    return expand(tree)
 
 
 def _pack(node, level, restrictions, with_priority=True):
@@ -282,7 +1215,8 @@ def _pack(node, level, restrictions, with_priority=True):
             max_branch[1].update_size(max_len=max_len, min_size=min_size)
 
 
-def _create_insert_template(node, level, tree, local, restrictions, direction=0):
+def _create_insert_template(node, level, tree, local, restrictions, direction=0,
+                            full_level=None):
     if restrictions:
         max_len = restrictions.get('cutting_length')
         cut_thickness = restrictions.get('cutting_thickness')
@@ -315,7 +1249,7 @@ def _create_insert_template(node, level, tree, local, restrictions, direction=0)
             cut_thickness = None
         res = tree.create_template_branches(
             new_parent, height, cut_thickness=cut_thickness,
-            direction=direction, min_size=min_size
+            direction=direction, min_size=min_size, full_level=full_level
         )
         if res is None:
             node.kit.delete_height(height)
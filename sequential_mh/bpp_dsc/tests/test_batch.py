@@ -0,0 +1,101 @@
+"""Модуль тестирования пакетного раскроя
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import csv
+import json
+from copy import deepcopy
+
+import pytest
+
+from ..batch import load_problem, main, solve_all
+from ..rectangle import Direction
+
+
+PROBLEM = {
+    'name': 'Синтетический пример',
+    'ingot': [180, 160, 28],
+    'material': {'name': 'Сплав 1', 'density': 2.2, 'extension': 1.},
+    'blanks': [
+        {'length': 200, 'width': 170, 'height': 1.0, 'priority': 1},
+        {'length': 160, 'width': 93, 'height': 3.0, 'priority': 1},
+        {'length': 415, 'width': 170, 'height': 0.5, 'priority': 1},
+        {'length': 420, 'width': 165, 'height': 0.5, 'priority': 1},
+        {'length': 420, 'width': 170, 'height': 1.0, 'priority': 1},
+        {'length': 82, 'width': 180, 'height': 2.2, 'priority': 1,
+         'direction': 'P'},
+        {'length': 77, 'width': 180, 'height': 3.3, 'priority': 1,
+         'amount': 2},
+    ],
+    'restrictions': {
+        'max_size': [[[3, None], [1200, 380]], [[0, 3], [1200, 400]]],
+        'cutting_length': 1200,
+        'cutting_thickness': 4.2,
+        'hem_until_3': 4,
+        'hem_after_3': 2,
+        'allowance': 2,
+        'end': 0.02,
+        'min_size': [50, 100],
+    },
+}
+
+
+def write_problems(path):
+    """Две корректные задачи и одна задача без слитка"""
+    path.mkdir()
+    second = deepcopy(PROBLEM)
+    second['name'] = 'Пример 2'
+    second['blanks'] = second['blanks'][:4]
+    broken = deepcopy(PROBLEM)
+    del broken['ingot']
+    for name, data in (('a', PROBLEM), ('b', second), ('c', broken)):
+        with (path / f'{name}.json').open('w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+
+def test_load_problem(tmp_path):
+    """Задача преобразуется в дерево и ограничения приложения"""
+    write_problems(tmp_path / 'problems')
+    name, tree, restrictions, solver = load_problem(
+        tmp_path / 'problems' / 'a.json'
+    )
+    assert name == PROBLEM['name']
+    assert tree.root.kit.qty() == 8
+    assert restrictions['max_size'] == {
+        (3, float('inf')): (1200, 380), (0, 3): (1200, 400)
+    }
+    assert solver.min_size == (50, 100)
+    # перпендикулярное направление заготовка заменяет на V или H
+    directions = {
+        blank.direction for blank in tree.root.kit[2.2][1]
+    }
+    assert directions and Direction.A not in directions
+    with pytest.raises(ValueError):
+        load_problem(tmp_path / 'problems' / 'c.json')
+
+
+def test_solve_all(tmp_path):
+    """Решения и таблица summary.csv"""
+    write_problems(tmp_path / 'problems')
+    output = tmp_path / 'solutions'
+    rows = solve_all(tmp_path / 'problems', output, workers=2)
+    assert [row['status'] for row in rows] == ['ok', 'ok', 'error']
+    for stem in 'ab':
+        assert (output / f'{stem}.oci').exists()
+        with (output / f'{stem}.json').open(encoding='utf-8') as file:
+            solution = json.load(file)
+        placed = sum(len(chart['blanks']) for chart in solution['charts'])
+        assert 0 < solution['efficiency'] <= 1
+        assert placed == rows['ab'.index(stem)]['placed']
+    with (output / 'summary.csv').open(encoding='utf-8') as file:
+        summary = list(csv.DictReader(file))
+    assert [row['name'] for row in summary] == [
+        PROBLEM['name'], 'Пример 2', 'c'
+    ]
+
+    assert main([str(tmp_path / 'problems'), '-j', '1']) == 1
+    assert (tmp_path / 'problems' / 'solutions' / 'summary.csv').exists()
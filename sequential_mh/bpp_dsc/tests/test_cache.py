@@ -0,0 +1,196 @@
+"""Модуль тестирования кэша подзадач
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import pytest
+
+from ..cache import (
+    BPP_TS_CACHE, PH_BPP_CACHE, TSH_PH_BPP_CACHE, LRUCache, cached_bpp_ts,
+    cached_ph_bpp, cached_tsh_ph_bpp
+)
+from ..ph import ph_bpp
+from ..rectangle import Blank, Direction, Material
+from ..stm import _stmh_idrd
+from ..tree import tree_signature
+from ...tsh.bpp_ts import bpp_ts
+from ...tsh.ph import ph_bpp as tsh_ph_bpp
+from .test_tree import create_problem
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+
+
+def test_lru_cache():
+    """Вытесняется давно не использованное значение"""
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache and len(cache) == 2
+    assert cache.get('b', 0) == 0
+    assert cache.info()[:4] == (1, 1, 2, 2)
+    cache.clear()
+    assert cache.info()[:4] == (0, 0, 2, 0)
+
+
+def test_lru_cache_bytes():
+    """Объем кэша ограничивается"""
+    cache = LRUCache(maxsize=10, maxbytes=100)
+    cache.put('a', 1, nbytes=60)
+    cache.put('b', 2, nbytes=30)
+    cache.put('a', 1, nbytes=50)
+    assert cache.nbytes == 80
+    cache.put('c', 3, nbytes=40)
+    assert 'b' not in cache and cache.nbytes == 90
+    cache.put('d', 4, nbytes=200)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def create_group(prefix):
+    group = {1: [], 2: []}
+    sizes = [
+        (160, 93, 1), (77, 180, 1), (77, 180, 1), (60, 40, 2), (60, 40, 2),
+        (100, 30, 2)
+    ]
+    for i, (length, width, priority) in enumerate(sizes):
+        blank = Blank(length, width, 3.0, priority, material=MATERIAL)
+        blank.name = f'{prefix}{i}'
+        group[priority].append(blank)
+    return group
+
+
+def pack(func, group):
+    src_rect, main_region, min_rect, result, unplaced, tailings = func(
+        180, 160, 28, 3.0, group, Direction.H, first_priority=1,
+        x_hem=(4, 4), y_hem=(2, 2), allowance=2, max_size=(1200, 380)
+    )
+    return {
+        'rects': (src_rect, min_rect, main_region.rectangle),
+        'result': [
+            (
+                item.rectangle.name[-1], item.x, item.y,
+                item.rectangle.length, item.rectangle.width
+            )
+            for item in result
+        ],
+        'unplaced': [blank.name[-1] for blank in unplaced],
+        'tailings': [(item.blp, item.trp, item.rtype) for item in tailings],
+        'group': {
+            priority: [
+                (blank.name[-1], blank.length, blank.width, blank.direction)
+                for blank in values
+            ]
+            for priority, values in group.items()
+        },
+    }, result, group
+
+
+def test_cached_bpp_ts():
+    """Результат из кэша совпадает с результатом bpp_ts"""
+    BPP_TS_CACHE.clear()
+    expected, *_ = pack(bpp_ts, create_group('a'))
+    missed, *_ = pack(cached_bpp_ts, create_group('b'))
+    assert BPP_TS_CACHE.info()[:2] == (0, 1)
+    hit, result, group = pack(cached_bpp_ts, create_group('c'))
+    assert BPP_TS_CACHE.info()[:2] == (1, 1)
+    assert missed == expected
+    assert hit == expected
+    # размещенные заготовки -- копии заготовок переданного набора
+    assert all(item.rectangle.name.startswith('3.0_c') for item in result)
+    for blank in (item.rectangle for item in result):
+        assert not hasattr(blank, '_cache_index')
+    for blank in group[2]:
+        assert not hasattr(blank, '_cache_index')
+
+
+def packing(func, group, **kwargs):
+    result, total_len, total_width, tailings = func(
+        180, 160, group, x0=4, y0=2, allowance=2, **kwargs
+    )
+    return {
+        'result': {
+            priority: [
+                (
+                    item.rectangle.name[-1], item.x, item.y,
+                    item.rectangle.length, item.rectangle.width
+                )
+                for item in items
+            ]
+            for priority, items in result.items()
+        },
+        'size': (total_len, total_width),
+        'tailings': [
+            (item.x, item.y, item.length, item.width)
+            if isinstance(item, tuple) else (item.blp, item.trp, item.rtype)
+            for item in tailings
+        ],
+        'group': {
+            priority: [
+                (blank.name[-1], blank.length, blank.width, blank.direction)
+                for blank in values
+            ]
+            for priority, values in group.items()
+        },
+    }, result, group
+
+
+@pytest.mark.parametrize('func, cached, cache, kwargs', [
+    (ph_bpp, cached_ph_bpp, PH_BPP_CACHE, {'first_priority': True}),
+    (
+        tsh_ph_bpp, cached_tsh_ph_bpp, TSH_PH_BPP_CACHE,
+        {'sorting': 'length', 'soft_type': 1, 'k': 0.8}
+    ),
+])
+def test_cached_ph_bpp(func, cached, cache, kwargs):
+    """Результат из кэша совпадает с результатом ph_bpp"""
+    cache.clear()
+    expected, *_ = packing(func, create_group('a'), **kwargs)
+    missed, *_ = packing(cached, create_group('b'), **kwargs)
+    assert cache.info()[:2] == (0, 1)
+    group = create_group('c')
+    blanks = [blank for values in group.values() for blank in values]
+    hit, result, group = packing(cached, group, **kwargs)
+    assert cache.info()[:2] == (1, 1)
+    assert missed == expected
+    assert hit == expected
+    # размещаются сами заготовки переданного набора
+    placed = [item.rectangle for items in result.values() for item in items]
+    remaining = [blank for values in group.values() for blank in values]
+    assert sorted(map(id, placed + remaining)) == sorted(map(id, blanks))
+
+
+def test_cached_search():
+    """Построение с кэшем дает те же деревья"""
+    dsc_example = pytest.importorskip('dsc_example')
+
+    def signatures():
+        tree, restrictions = create_problem(dsc_example.example_2)
+        return [
+            (tree_signature(item), sorted(
+                (blank.rectangle.name, blank.x, blank.y)
+                for node in item.root.cc_leaves
+                for values in node.result.blanks.values()
+                for blank in values
+            ))
+            for item in _stmh_idrd(tree, restrictions=restrictions)
+        ]
+
+    caches = (BPP_TS_CACHE, PH_BPP_CACHE, TSH_PH_BPP_CACHE)
+    sizes = [cache.maxsize for cache in caches]
+    try:
+        for cache in caches:
+            cache.maxsize = 0
+            cache.clear()
+        expected = signatures()
+        for cache, maxsize in zip(caches, sizes):
+            cache.maxsize = maxsize
+        assert signatures() == expected
+        assert BPP_TS_CACHE.info().hits and TSH_PH_BPP_CACHE.info().hits
+    finally:
+        for cache, maxsize in zip(caches, sizes):
+            cache.maxsize = maxsize
@@ -0,0 +1,113 @@
+"""Модуль тестирования раскроя нескольких слитков
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+from collections import Counter
+
+import pytest
+
+from ..exception import ForcedTermination
+from ..ingots import (
+    IngotTask, create_kit, predict_placed, remaining, solve_ingots
+)
+from ..progress import Progress
+from ..rectangle import Direction, Material
+from ..solver import Solver
+from .test_solver import MIN_SIZE, RESTRICTIONS
+
+
+FIRST = Material('Сплав 1', 2.2, 1.)
+SECOND = Material('Сплав 2', 2.7, 1.)
+SIZES = [
+    (200, 170, 1.0, 1), (160, 93, 3.0, 1), (415, 170, 0.5, 1),
+    (420, 165, 0.5, 1), (420, 170, 1.0, 1), (82, 180, 2.2, 1),
+    (77, 180, 3.3, 1)
+]
+DETAILS = [
+    (*size, Direction.A, str(i + 1), 2) for i, size in enumerate(SIZES)
+]
+BLANKS = {FIRST.name: DETAILS, SECOND.name: DETAILS[:4]}
+# заготовки первого сплава не помещаются на первый слиток,
+# а на втором слитке этого сплава раскрой не получается
+TASKS = [
+    IngotTask(1, (100, 80, 28), FIRST),
+    IngotTask(2, (150, 120, 20), SECOND),
+    IngotTask(3, (120, 100, 28), FIRST),
+    IngotTask(4, (180, 160, 28), FIRST),
+]
+
+
+def solve(**kwargs):
+    results = solve_ingots(
+        TASKS, BLANKS, RESTRICTIONS, Solver(min_size=MIN_SIZE), workers=2,
+        **kwargs
+    )
+    return {result.key: result for result in results}
+
+
+@pytest.fixture(scope='module')
+def expected():
+    return solve()
+
+
+def test_kit():
+    """Исключаются заготовки, размещенные на других слитках"""
+    exclude = Counter({'3.0_2': 2, '3.3_7': 1})
+    kit = create_kit(DETAILS, FIRST, exclude)
+    assert kit.qty() == remaining(DETAILS, exclude) == 11
+    predicted = predict_placed((100, 80, 28), DETAILS, exclude)
+    assert predicted and not predicted & exclude
+
+
+def test_solve_ingots(expected):
+    """Слитки одного сплава используют остаток набора заготовок"""
+    assert set(expected) == {1, 2, 3, 4}
+    assert expected[3].tree is None and expected[3].error
+    first = expected[1].placed + expected[4].placed
+    assert first == Counter({
+        f'{detail[2]}_{detail[5]}': detail[6] for detail in DETAILS
+    })
+    assert not expected[1].placed & expected[4].placed
+    assert sum(expected[2].placed.values()) == 8
+    for result in expected.values():
+        assert not result.speculative
+
+
+def same_results(results, expected):
+    assert results.keys() == expected.keys()
+    for key, result in results.items():
+        assert result.placed == expected[key].placed
+        assert result.efficiency == pytest.approx(expected[key].efficiency)
+        assert result.error == expected[key].error
+
+
+def test_speculative(expected):
+    """Верно предсказанный раскрой принимается, неверный отбрасывается"""
+    def oracle(size, details, exclude):
+        key = next(task.key for task in TASKS if task.size == size)
+        return expected[key].placed
+
+    results = solve(speculative=True, predict=oracle)
+    same_results(results, expected)
+    assert [results[key].speculative for key in (1, 3, 4)] == [
+        False, True, True
+    ]
+
+    results = solve(
+        speculative=True,
+        predict=lambda size, details, exclude: Counter({'0.5_3': 1})
+    )
+    same_results(results, expected)
+    assert not any(result.speculative for result in results.values())
+
+
+def test_cancel():
+    """Отмена прерывает раскрой всех слитков"""
+    progress = Progress(interval=0)
+    progress.token.cancel()
+    with pytest.raises(ForcedTermination):
+        solve(speculative=True, progress=progress)
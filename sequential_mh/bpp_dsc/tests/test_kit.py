@@ -0,0 +1,94 @@
+"""Модуль тестирования набора заготовок
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import pickle
+from copy import deepcopy
+
+from ..rectangle import Blank, Direction, Kit, Material
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+# длина, ширина, толщина, приоритет, направление, имя, количество
+DETAILS = [
+    (60, 40, 3.0, 1, Direction.A, '1', 3),
+    (100, 30, 3.0, 2, Direction.V, '2', 2),
+    (80, 80, 1.0, 1, Direction.A, '3', 4),
+    (60, 40, 3.0, 1, Direction.A, '4', 1),
+]
+
+
+def create_blank(detail):
+    blank = Blank(*detail[:4], direction=detail[4], material=MATERIAL)
+    blank.name = detail[5]
+    return blank
+
+
+def state(kit):
+    return {
+        height: {
+            priority: [
+                (blank.name, blank.length, blank.width, blank.direction)
+                for blank in subgroup
+            ]
+            for priority, subgroup in group.items()
+        }
+        for height, group in kit.items()
+    }
+
+
+def test_from_counts():
+    """Набор из заготовок с количествами совпадает с обычным набором"""
+    expected = Kit([
+        create_blank(detail) for detail in DETAILS for _ in range(detail[-1])
+    ])
+    expected.sort('width')
+    kit = Kit.from_counts([(create_blank(d), d[-1]) for d in DETAILS])
+    kit.sort('width')
+    assert len(list(kit.counts())) == len(DETAILS)
+    assert kit.qty() == expected.qty() == 10
+    assert kit.qty(3.0) == 6
+    assert kit.hp_sequence() == expected.hp_sequence()
+    assert kit.total_volume == expected.total_volume
+    blank = create_blank(DETAILS[0])
+    assert kit.qty_blank(blank) == expected.qty_blank(blank) == 3
+    assert state(kit) == state(expected)
+    # копии заготовок создаются при обращении к спискам
+    blanks = kit[3.0][1]
+    assert len({id(blank) for blank in blanks}) == len(blanks) == 4
+
+
+def test_copy():
+    """Копия набора хранит одинаковые заготовки парами"""
+    kit = Kit([
+        create_blank(detail) for detail in DETAILS for _ in range(detail[-1])
+    ])
+    kit.sort('width')
+    other = deepcopy(kit)
+    assert len(list(other.counts())) == len(DETAILS)
+    assert state(other) == state(kit)
+    other[3.0][1].pop()
+    assert kit.qty(3.0) == 6 and other.qty(3.0) == 5
+    restored = pickle.loads(pickle.dumps(kit))
+    assert state(restored) == state(kit)
+
+
+def test_copy_shared_blank():
+    """Объект, встречающийся в наборе дважды, остается общим"""
+    blank = create_blank(DETAILS[0])
+    kit = Kit({3.0: {1: [blank, blank]}})
+    other = deepcopy(kit)
+    first, second = other[3.0][1]
+    assert first is second and first is not blank
+
+
+def test_legacy_state():
+    """Восстановление набора, записанного со списками заготовок"""
+    blank = create_blank(DETAILS[0])
+    kit = Kit.__new__(Kit)
+    kit.__setstate__({'blanks': {3.0: {1: [blank]}}})
+    assert kit.qty() == 1 and kit[3.0][1] == [blank]
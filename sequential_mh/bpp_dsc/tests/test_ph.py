@@ -0,0 +1,402 @@
+"""Модуль тестирования алгоритмов приоритетной эвристики
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import random
+import sys
+from copy import deepcopy
+from functools import partial
+from itertools import chain, zip_longest
+
+import pytest
+
+from .. import ph
+from ..rectangle import Blank, Direction, Material
+from ...tsh import ph as tsh_ph
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+
+
+def create_group(rng):
+    """Случайный набор с повторяющимися заготовками"""
+    group = {}
+    for shape in range(rng.randint(1, 6)):
+        length = rng.choice([10, 20, 25, 30, 40, 50, 60])
+        width = rng.choice([10, 20, 25, 30, 40, 50])
+        direction = rng.choice([Direction.A, Direction.A, Direction.H, Direction.V])
+        priority = rng.choice([1, 1, 2, 3])
+        for _ in range(rng.choice([1, 2, 5, 10, 30])):
+            blank = Blank(length, width, 1.0, priority, direction=direction,
+                          material=MATERIAL)
+            blank.name = str(shape)
+            group.setdefault(priority, []).append(blank)
+    if rng.random() < 0.5:
+        for values in group.values():
+            rng.shuffle(values)
+    return group
+
+
+def random_problems(seed, size=150):
+    rng = random.Random(seed)
+    for _ in range(size):
+        group = create_group(rng)
+        length = rng.choice([100, 150, 200, 300, 600])
+        width = rng.choice([100, 120, 200, 400])
+        position = dict(
+            x0=rng.choice([0, 4]), y0=rng.choice([0, 2]),
+            allowance=rng.choice([0, 2, 3])
+        )
+        yield ph.ph_bpp, group, length, width, dict(
+            position, first_priority=rng.random() < 0.7
+        )
+        yield tsh_ph.ph_bpp, group, length, width, dict(
+            position, first_priority=rng.random() < 0.3,
+            sorting=rng.choice(['width', 'length']),
+            soft_type=rng.choice([None, 0, 1, 2, 3]), k=rng.choice([0, 0.8])
+        )
+
+
+def packing(func, group, length, width, kwargs):
+    """Результат упаковки и состояние набора после нее"""
+    group = deepcopy(group)
+    blanks = [blank for values in group.values() for blank in values]
+    index = {id(blank): i for i, blank in enumerate(blanks)}
+    result, *sizes, tailings = func(length, width, group, **kwargs)
+    return {
+        'result': {
+            priority: [
+                (
+                    index[id(item.rectangle)], item.x, item.y,
+                    item.rectangle.length, item.rectangle.width
+                )
+                for item in items
+            ]
+            for priority, items in result.items()
+        },
+        'sizes': sizes,
+        'tailings': [
+            tuple(item) if isinstance(item, tuple)
+            else (item.blp, item.trp, item.rtype)
+            for item in tailings
+        ],
+        'group': {
+            priority: [index[id(blank)] for blank in values]
+            for priority, values in group.items()
+        },
+        'blanks': [(b.length, b.width, b.direction) for b in blanks],
+    }
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_bulk_placement(seed, monkeypatch):
+    """Размещение полос дает тот же результат, что и пошаговое"""
+    problems = list(random_problems(seed))
+    expected = []
+    with monkeypatch.context() as patch:
+        patch.setattr(tsh_ph, 'BULK_PLACEMENT', False)
+        for problem in problems:
+            expected.append(packing(*problem))
+    for problem, result in zip(problems, expected):
+        assert packing(*problem) == result
+
+
+def test_strip():
+    """Одинаковые заготовки размещаются полосами"""
+    group = {1: []}
+    for _ in range(2000):
+        blank = Blank(10, 20, 1.0, 1, material=MATERIAL)
+        blank.name = '1'
+        group[1].append(blank)
+    result, *_ = ph.ph_bpp(1200, 400, group, first_priority=True)
+    assert len(result[1]) == 2000 and not group[1]
+    assert len({(item.x, item.y) for item in result[1]}) == 2000
+
+
+# Исходная (рекурсивная) реализация обхода областей -----------------------
+def reference_recursive_packing(x, y, length, width, rectangles, result,
+                                tailings, first_priority=False, allowance=0):
+    variant, best, priorities = [], [], []
+    if first_priority:
+        priorities.append(first_priority)
+        v, b = ph.get_best_fig(length, width, rectangles[first_priority])
+        variant.append(v)
+        best.append(b)
+    else:
+        for p, group in rectangles.items():
+            priorities.append(p)
+            v, b = ph.get_best_fig(length, width, group)
+            variant.append(v)
+            best.append(b)
+
+    for i, priority in enumerate(priorities):  # number_groups
+        if variant[i] < 5:
+            d, omega = best[i].size[:-1]
+            if priority not in result:
+                result[priority] = []
+            result[priority].append(ph.PackedBlank(best[i], x, y))
+            index = ph.pop_rectangle(rectangles[priority], best[i])
+            if variant[i] == 2:
+                new_x, new_y, new_length, new_width = ph.place_strip(
+                    x, y + d, length - d, width, rectangles, result,
+                    tailings, priority, index, variant[i], first_priority,
+                    ph.advance_length, packed=ph.PackedBlank
+                )
+                reference_recursive_packing(
+                    new_x, new_y, new_length, new_width, rectangles, result,
+                    tailings, first_priority=first_priority
+                )
+            elif variant[i] == 3:
+                new_x, new_y, new_length, new_width = ph.place_strip(
+                    x + omega + allowance, y, length,
+                    width - omega - allowance, rectangles, result,
+                    tailings, priority, index, variant[i], first_priority,
+                    ph.advance_width, packed=ph.PackedBlank
+                )
+                reference_recursive_packing(
+                    new_x, new_y, new_length, new_width, rectangles, result,
+                    tailings, first_priority=first_priority
+                )
+            elif variant[i] == 4:
+                min_w = min_l = sys.maxsize
+                for p, group in rectangles.items():
+                    for blank in group:
+                        min_l = min(min_l, blank.length)
+                        min_w = min(min_w, blank.width)
+                min_w = min(min_w, min_l)
+                min_l = min_w
+                if width - omega < min_w:
+                    tailings.append(ph.Tailing(x + omega, y, d, width - omega))
+                    reference_recursive_packing(
+                        x, y + d + allowance, length - d - allowance, width, rectangles, result,
+                        tailings, first_priority=first_priority
+                    )
+                elif length - d < min_l:
+                    tailings.append(ph.Tailing(x, y + d, length - d, omega))
+                    reference_recursive_packing(
+                        x + omega + allowance, y, length,
+                        width - omega - allowance, rectangles,
+                        result, tailings, first_priority=first_priority
+                    )
+                elif omega < min_w:
+                    reference_recursive_packing(
+                        x + omega + allowance, y, d, width - omega - allowance,
+                        rectangles, result, tailings
+                    )
+                    reference_recursive_packing(
+                        x, y + d + allowance, length - d - allowance, width,
+                        rectangles, result,
+                        tailings, first_priority=first_priority
+                    )
+                else:
+                    reference_recursive_packing(
+                        x, y + d + allowance, length - d - allowance, omega,
+                        rectangles, result, tailings
+                    )
+                    reference_recursive_packing(
+                        x + omega + allowance, y, length,
+                        width - omega - allowance, rectangles,
+                        result, tailings, first_priority=first_priority
+                    )
+            break
+
+
+def reference_tsh_recursive_packing(x, y, length, width, rectangles, result,
+                                    tailings, allowance, first_priority=False,
+                                    soft_type=None, k=0):
+    best_rect = []
+    if first_priority:
+        variant, best = tsh_ph.get_best_fig(length, width, rectangles[first_priority])
+        if variant < 5:
+            best_rect.append((best, first_priority, variant))
+    else:
+        for priority, group in rectangles.items():
+            variant, best = tsh_ph.get_best_fig(length, width, group)
+            if variant < 5:
+                best_rect.append((best, priority, variant))
+
+    best_rect.sort(key=lambda x: (x[2], x[1]))
+
+    if not best_rect:
+        if not soft_type:
+            dummy = tsh_ph.create_residual(x, y, length, width)
+            tailings.append(dummy)
+        else:
+            max_length, max_width = length, width
+            if soft_type in (1, 3) and k > 0:
+                max_length = length * (1 + k)
+            if soft_type in (2, 3) and k > 0:
+                max_width = width * (1 + k)
+            rectangles_list = list(chain.from_iterable(
+                [zip_longest([k], v, fillvalue=k) for k, v in rectangles.items() if v]
+            ))
+            priority, best = tsh_ph.get_best_fig_with_soft_sizes(
+                length, width, max_length, max_width, rectangles_list
+            )
+            if best:
+                if priority not in result:
+                    result[priority] = []
+                result[priority].append(tsh_ph.PackedRectangle(best, x, y))
+            else:
+                dummy = tsh_ph.create_residual(x, y, length, width)
+                tailings.append(dummy)
+    else:
+        best, p, variant = best_rect[0]
+        d, omega = best.size[:-1]
+        new_length, new_width = length - d, width - omega
+        new_x, new_y = x + omega, y + d
+        if p not in result:
+            result[p] = []
+        result[p].append(tsh_ph.PackedRectangle(best, x, y))
+        index = tsh_ph.pop_rectangle(rectangles[p], best)
+        if variant == 2:
+            # new_y = y + d
+            # new_length = length - d
+            if new_length > allowance:
+                dummy = tsh_ph.create_allowance(x, new_y, allowance, width)
+                new_y += allowance
+                new_length -= allowance
+                tailings.append(dummy)
+            _, new_y, new_length, _ = tsh_ph.place_strip(
+                x, new_y, new_length, width, rectangles, result, tailings,
+                p, index, variant, first_priority,
+                partial(tsh_ph.advance_length, allowance=allowance)
+            )
+            reference_tsh_recursive_packing(
+                x, new_y, new_length, width, rectangles, result,
+                tailings, allowance, first_priority=first_priority
+            )
+        elif variant == 3:
+            # new_x = x + omega
+            # new_width = width - omega
+            if new_width > allowance:
+                dummy = tsh_ph.create_allowance(new_x, y, length, allowance)
+                new_x += allowance
+                new_width -= allowance
+                tailings.append(dummy)
+            new_x, _, _, new_width = tsh_ph.place_strip(
+                new_x, y, length, new_width, rectangles, result, tailings,
+                p, index, variant, first_priority,
+                partial(tsh_ph.advance_width, allowance=allowance)
+            )
+            reference_tsh_recursive_packing(
+                new_x, y, length, new_width, rectangles, result,
+                tailings, allowance, first_priority=first_priority
+            )
+        elif variant == 4:
+            min_w = min_l = sys.maxsize
+            for _, group in rectangles.items():
+                for blank in group:
+                    min_l = min(min_l, blank.length)
+                    min_w = min(min_w, blank.width)
+            min_w = min(min_w, min_l)
+            min_l = min_w
+            # new_x, new_y = x + omega, y + d
+            # new_length, new_width = length - d, width - omega
+
+            if new_width < min_w:
+                if new_length > allowance:
+                    dummy = tsh_ph.create_allowance(x, new_y, allowance, width)
+                    new_y += allowance
+                    new_length -= allowance
+                    tailings.append(dummy)
+                if new_width > allowance:
+                    dummy = tsh_ph.create_allowance(new_x, y, d, allowance)
+                    new_x += allowance
+                    new_width -= allowance
+                    tailings.append(dummy)
+                dummy = tsh_ph.create_residual(new_x, y, d, new_width)
+                tailings.append(dummy)
+                reference_tsh_recursive_packing(
+                    x, new_y, new_length, width, rectangles, result,
+                    tailings, allowance, first_priority=first_priority
+                )
+            elif new_length < min_l:
+                if new_length > allowance:
+                    dummy = tsh_ph.create_allowance(x, new_y, allowance, omega)
+                    new_y += allowance
+                    new_length -= allowance
+                    tailings.append(dummy)
+                if new_width > allowance:
+                    dummy = tsh_ph.create_allowance(new_x, y, length, allowance)
+                    new_x += allowance
+                    new_width -= allowance
+                    tailings.append(dummy)
+                dummy = tsh_ph.create_residual(x, new_y, new_length, omega)
+                tailings.append(dummy)
+                reference_tsh_recursive_packing(
+                    new_x, y, length, new_width, rectangles,
+                    result, tailings, allowance, first_priority=first_priority
+                )
+            elif omega < min_w:
+                if new_length > allowance:
+                    dummy = tsh_ph.create_allowance(x, new_y, allowance, width)
+                    new_y += allowance
+                    new_length -= allowance
+                    tailings.append(dummy)
+                if new_width > allowance:
+                    dummy = tsh_ph.create_allowance(new_x, y, d, allowance)
+                    new_x += allowance
+                    new_width -= allowance
+                    tailings.append(dummy)
+                reference_tsh_recursive_packing(
+                    new_x, y, d, new_width, rectangles, result,
+                    tailings, allowance
+                )
+                reference_tsh_recursive_packing(
+                    x, new_y, new_length, width, rectangles, result,
+                    tailings, allowance, first_priority=first_priority
+                )
+            else:
+                if new_length > allowance:
+                    dummy = tsh_ph.create_allowance(x, new_y, allowance, omega)
+                    new_y += allowance
+                    new_length -= allowance
+                    tailings.append(dummy)
+                if new_width > allowance:
+                    dummy = tsh_ph.create_allowance(new_x, y, length, allowance)
+                    new_x += allowance
+                    new_width -= allowance
+                    tailings.append(dummy)
+                reference_tsh_recursive_packing(
+                    x, new_y, new_length, omega, rectangles, result,
+                    tailings, allowance
+                )
+                reference_tsh_recursive_packing(
+                    new_x, y, length, new_width, rectangles,
+                    result, tailings, allowance,
+                    first_priority=first_priority
+                )
+
+
+@pytest.mark.parametrize('seed', range(4, 8))
+def test_iterative(seed, monkeypatch):
+    """Обход областей со стеком совпадает с исходным рекурсивным"""
+    problems = list(random_problems(seed))
+    expected = []
+    with monkeypatch.context() as patch:
+        patch.setattr(ph, 'recursive_packing', reference_recursive_packing)
+        patch.setattr(
+            tsh_ph, 'recursive_packing', reference_tsh_recursive_packing
+        )
+        for problem in problems:
+            expected.append(packing(*problem))
+    for problem, result in zip(problems, expected):
+        assert packing(*problem) == result
+
+
+def test_depth():
+    """Количество областей не ограничено глубиной рекурсии"""
+    size = sys.getrecursionlimit() + 500
+    for func in (ph.ph_bpp, tsh_ph.ph_bpp):
+        group = {1: []}
+        for i in range(size):
+            blank = Blank(10, 20, 1.0, 1, material=MATERIAL)
+            blank.name = str(i)
+            group[1].append(blank)
+        result, *_ = func(10 * size, 20, group, first_priority=True)
+        assert len(result[1]) == size and not group[1]
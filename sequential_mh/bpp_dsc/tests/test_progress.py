@@ -0,0 +1,135 @@
+"""Модуль тестирования прогресса и отмены построения
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+import pytest
+
+from ..exception import ForcedTermination
+from ..progress import CancelToken, DialogProgress, Progress
+from ..stm import _stmh_idrd, stmh_idrd
+from .test_stm import RESTRICTIONS, create_tree
+
+
+class FakeDialog:
+    """Окно прогресса с интерфейсом QProgressDialog"""
+    def __init__(self) -> None:
+        self.range = None
+        self.values = []
+        self.labels = []
+        self.canceled = False
+
+    def setRange(self, minimum, maximum):
+        self.range = (minimum, maximum)
+
+    def setValue(self, value):
+        self.values.append(value)
+
+    def setLabelText(self, text):
+        self.labels.append(text)
+
+    def wasCanceled(self):
+        return self.canceled
+
+
+def test_throttling():
+    """Обновления не чаще интервала, flush обновляет сразу"""
+    updates = []
+    progress = Progress(
+        on_progress=lambda value, total: updates.append((value, total)),
+        interval=3600
+    )
+    for _ in range(100):
+        progress()
+    assert updates == [(1, None)]
+    assert progress.value == 100
+    progress.set_total(50)
+    # заниженная оценка количества шагов увеличивается
+    assert updates[-1] == (100, 110)
+
+    updates.clear()
+    progress = Progress(
+        on_progress=lambda value, total: updates.append(value), interval=0
+    )
+    progress.step(2)
+    progress.step(3)
+    assert updates == [2, 5]
+
+
+def test_cancel():
+    """Источник отмены опрашивается при обновлениях"""
+    dialog = FakeDialog()
+    progress = DialogProgress(dialog, interval=0)
+    progress.set_total(10)
+    progress.message('Раскрой')
+    progress.step()
+    assert dialog.range == (0, 10)
+    assert dialog.values == [0, 1]
+    assert dialog.labels == ['Раскрой']
+    progress.check()
+
+    dialog.canceled = True
+    progress.step()
+    assert progress.token.is_set()
+    with pytest.raises(ForcedTermination):
+        progress.check()
+
+
+def _is_set(token):
+    return token.is_set()
+
+
+def test_shared_token():
+    """Флаг отмены виден в других процессах"""
+    with Manager() as manager:
+        token = CancelToken.shared(manager)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            assert not executor.submit(_is_set, token).result()
+            token.cancel()
+            assert executor.submit(_is_set, token).result()
+
+
+def test_child_token():
+    """Отмена дочернего флага не затрагивает родителя и соседей"""
+    with Manager() as manager:
+        parent = CancelToken.shared(manager)
+        first = CancelToken.shared(manager, parent=parent)
+        second = CancelToken.shared(manager, parent=parent)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            first.cancel()
+            assert executor.submit(_is_set, first).result()
+            assert not executor.submit(_is_set, second).result()
+            assert not parent.is_set()
+            parent.cancel()
+            assert executor.submit(_is_set, second).result()
+
+
+def test_search_cancel():
+    """Построение прерывается по флагу отмены"""
+    progress = Progress(interval=0)
+
+    def on_step(count):
+        progress.step(count)
+        if progress.value >= 3:
+            progress.token.cancel()
+
+    with pytest.raises(ForcedTermination):
+        _stmh_idrd(
+            create_tree(), restrictions=RESTRICTIONS,
+            cancel_event=progress.token, on_step=on_step
+        )
+    assert progress.value == 3
+
+    dialog = FakeDialog()
+    dialog.canceled = True
+    with pytest.raises(ForcedTermination):
+        stmh_idrd(
+            create_tree(), restrictions=RESTRICTIONS,
+            progress=DialogProgress(dialog)
+        )
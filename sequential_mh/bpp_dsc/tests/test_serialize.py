@@ -0,0 +1,138 @@
+"""Модуль тестирования сериализации деревьев и очереди с выгрузкой
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import gc
+import weakref
+from collections import deque
+from copy import copy
+
+import pytest
+
+from ..frontier import FrontierStore
+from ..serialize import SharedObjects, dumps, loads
+from ..stm import _expand, _stmh_idrd, is_empty_tree
+from ..tree import tree_signature
+from .test_stm import RESTRICTIONS, create_tree, efficiencies
+
+
+def frontier(number=30):
+    """Частично построенные деревья (первые ``number`` деревьев)"""
+    level = deque([create_tree()])
+    trees = []
+    while level and len(trees) < number:
+        tree = level.popleft()
+        trees.append(tree)
+        if not is_empty_tree(tree):
+            _, unfinished = _expand(copy(tree), restrictions=RESTRICTIONS)
+            level.extend(unfinished)
+    return trees
+
+
+@pytest.mark.parametrize('with_shared', [False, True])
+def test_round_trip(with_shared):
+    """Восстановленное дерево раскрывается так же, как исходное"""
+    shared = SharedObjects() if with_shared else None
+    for tree in frontier():
+        if shared is not None:
+            shared.add_tree(tree)
+        restored = loads(dumps(tree, shared), shared)
+        assert tree_signature(restored) == tree_signature(tree)
+        assert restored.root._index is None
+        for node in restored.root.leaves():
+            assert restored.node_by_id(node._id) is node
+        if is_empty_tree(tree):
+            continue
+        expected = _expand(copy(tree), restrictions=RESTRICTIONS)
+        result = _expand(restored, restrictions=RESTRICTIONS)
+        for trees, restored_trees in zip(expected, result):
+            assert [tree_signature(item) for item in trees] == \
+                [tree_signature(item) for item in restored_trees]
+
+
+def test_aliasing():
+    """Общие объекты остаются общими, разделяемые -- не копируются"""
+    tree = frontier()[-1]
+    first, second, kit = loads(dumps([tree, tree, tree.root.kit]))
+    assert first is second
+    assert kit is first.root.kit
+    for node in first.root.leaves():
+        while node.parent is not None:
+            assert any(item is node for item in node.parent.list_of_children())
+            node = node.parent
+        assert node is first.root
+
+    shared = SharedObjects()
+    shared.add_tree(tree)
+    restored = loads(dumps(tree, shared), shared)
+    assert restored.main_kit is tree.main_kit
+    assert restored.root is not tree.root
+
+
+def test_unknown_class():
+    """Объекты неизвестных классов не записываются"""
+    tree = create_tree()
+    tree.root.color = object()
+    with pytest.raises(TypeError):
+        dumps(tree)
+
+
+def test_missing_registry():
+    """Для ссылок на реестр нужен реестр"""
+    shared = SharedObjects()
+    tree = create_tree()
+    shared.add_tree(tree)
+    with pytest.raises(ValueError):
+        loads(dumps(tree, shared))
+
+
+@pytest.mark.parametrize('max_in_memory, chunk_size', [(1, 1), (4, 3), (100, 10)])
+def test_frontier_store(tmp_path, max_in_memory, chunk_size):
+    """Очередь выдает деревья в порядке добавления"""
+    trees = frontier()
+    with FrontierStore(max_in_memory, chunk_size, directory=tmp_path) as store:
+        for tree in trees[:10]:
+            store.append(tree)
+        result = [store.popleft() for _ in range(5)]
+        for tree in trees[10:]:
+            store.append(tree)
+        assert len(store) == len(trees) - 5
+        while store:
+            result.append(store.popleft())
+        assert (store.spilled > 0) == (max_in_memory < len(trees))
+    assert [tree_signature(item) for item in result] == \
+        [tree_signature(item) for item in trees]
+    assert not list(tmp_path.iterdir())
+
+
+def test_frontier_store_release(tmp_path):
+    """Извлеченные деревья не удерживаются реестрами очереди"""
+    trees = frontier()
+    main_kit = weakref.ref(trees[0].main_kit)
+    with FrontierStore(1, 3, directory=tmp_path) as store:
+        for tree in trees:
+            store.append(tree)
+        assert [tree_signature(item) for item in store] == \
+            [tree_signature(item) for item in trees]
+        del trees, tree
+        while store:
+            store.popleft()
+        gc.collect()
+        assert main_kit() is None
+
+
+def test_search_with_spill(tmp_path):
+    """Выгрузка уровня на диск не меняет результат построения"""
+    expected = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    stats = {}
+    trees = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, frontier_limit=2,
+        spill_dir=str(tmp_path), stats=stats
+    )
+    assert stats['spilled'] > 0
+    assert efficiencies(trees) == efficiencies(expected)
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,251 @@
+"""Модуль тестирования решателя задачи раскроя
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import subprocess
+import sys
+from copy import deepcopy
+
+import pytest
+
+from ..choice import choose_tree, number_rolling
+from ..exception import ForcedTermination
+from ..progress import Progress
+from ..rectangle import Bin, BinType, Blank, Kit, Material
+from .. import solver as solver_module
+from ..solver import _POOLS, RESIDUAL_CACHE, Solver, _residual_pool
+from ..tree import BinNode, Tree, is_defective_tree
+from ...tsh.rect import Rectangle
+from .test_tree import create_problem
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+RESTRICTIONS = {
+    'max_size': {
+        (3, float('inf')): (1200, 380), (1, 3): (1200, 400),
+        (0, 1): (1200, 400)
+    },
+    'cutting_length': 1200,
+    'cutting_thickness': 4.2,
+    'hem_until_3': 4,
+    'hem_after_3': 2,
+    'allowance': 2,
+    'end': 0.02,
+    'min_size': (50, 100),
+}
+MIN_SIZE = (100, 50)
+
+
+def create_tree():
+    """Дерево, в решении которого используются остатки"""
+    sizes = [
+        (200, 170, 1.0, 1), (160, 93, 3.0, 1), (415, 170, 0.5, 1),
+        (420, 165, 0.5, 1), (420, 170, 1.0, 1), (82, 180, 2.2, 1),
+        (77, 180, 3.3, 1)
+    ]
+    blanks = []
+    for i, size in enumerate(sizes):
+        blank = Blank(*size, material=MATERIAL)
+        blank.name = str(i + 1)
+        blanks.append(blank)
+    ingot = Bin(180, 160, 28, material=MATERIAL, bin_type=BinType.ingot)
+    return Tree(BinNode(ingot, kit=Kit(blanks)))
+
+
+def solve(checkpoint_interval=60., residual_workers=None, **kwargs):
+    solver = Solver(
+        min_size=MIN_SIZE, checkpoint_interval=checkpoint_interval,
+        residual_workers=residual_workers
+    )
+    return solver.stmh_idrd(
+        create_tree(), restrictions=deepcopy(RESTRICTIONS), **kwargs
+    )
+
+
+def test_residual_subtrees():
+    """Решение выбирается среди деревьев обоих проходов"""
+    best = solve()
+    assert any(node.subtree for node in best.root.cc_leaves)
+
+    solver = Solver(min_size=MIN_SIZE)
+    restrictions = deepcopy(RESTRICTIONS)
+    trees = []
+    for direction in (1, 2):
+        trees.extend(solver._stmh_idrd(
+            create_tree(), restrictions=restrictions, direction=direction
+        ))
+    trees = [
+        tree for tree in trees
+        if not is_defective_tree(tree, RESTRICTIONS['max_size'])
+    ]
+    expected, efficiency = choose_tree(trees)
+    assert number_rolling(best.root) == number_rolling(expected.root)
+    assert choose_tree([best])[1] == pytest.approx(efficiency)
+
+
+def test_residual_cache():
+    """Повторные подзадачи раскроя остатков берутся из кэша"""
+    RESIDUAL_CACHE.clear()
+    expected = solve()
+    info = RESIDUAL_CACHE.info()
+    assert info.misses and info.currsize == info.misses
+
+    best = solve()
+    assert RESIDUAL_CACHE.info().hits >= info.hits + info.misses
+    assert number_rolling(best.root) == number_rolling(expected.root)
+    assert choose_tree([best])[1] == pytest.approx(choose_tree([expected])[1])
+    # решения из кэша не разделяются между деревьями
+    subtrees = [
+        subtree for node in best.root.cc_leaves for subtree in node.subtree
+    ]
+    for node in expected.root.cc_leaves:
+        for subtree in node.subtree:
+            assert all(subtree is not item for item in subtrees)
+
+
+def test_residual_key_order():
+    """Порядок заготовок набора входит в ключ подзадачи"""
+    solver = Solver(min_size=MIN_SIZE)
+    first = Blank(100, 50, 1., 1, material=MATERIAL)
+    second = Blank(90, 60, 1., 1, material=MATERIAL)
+    tailing = Rectangle((0, 0), (200, 100))
+
+    def key(blanks):
+        return solver.residual_key(
+            tailing, 1., MATERIAL, Kit(blanks), RESTRICTIONS, 1
+        )
+
+    assert key([first, second]) == key([deepcopy(first), deepcopy(second)])
+    assert key([first, second]) != key([second, first])
+
+
+def test_residual_workers(monkeypatch):
+    """Раскрой остатков в пуле процессов дает то же решение"""
+    dsc_example = pytest.importorskip('dsc_example')
+    futures = []
+
+    def residual_pool(workers):
+        pool = _residual_pool(workers)
+        submit = pool.submit
+
+        class Pool:
+            def submit(self, *args, **kwargs):
+                future = submit(*args, **kwargs)
+                futures.append(future)
+                return future
+
+        return Pool()
+
+    monkeypatch.setattr(solver_module, '_residual_pool', residual_pool)
+    results = []
+    for residual_workers in (None, 2):
+        RESIDUAL_CACHE.clear()
+        # при малых минимальных размерах у карт несколько остатков
+        tree, restrictions = create_problem(dsc_example.example_2)
+        with Solver(
+            min_size=(10, 10), residual_workers=residual_workers
+        ) as solver:
+            best = solver.stmh_idrd(tree, restrictions=restrictions)
+        assert not _POOLS
+        results.append((number_rolling(best.root), choose_tree([best])[1]))
+    # результаты всех проходов, переданных в пул, использованы
+    assert futures
+    assert all(future.done() and not future.cancelled() for future in futures)
+    assert results[0][0] == results[1][0]
+    assert results[0][1] == pytest.approx(results[1][1])
+
+
+def test_checkpoint(tmp_path):
+    """Прерванное построение продолжается с контрольной точки"""
+    expected = solve()
+
+    def on_progress(value, _):
+        if value >= 5:
+            progress.token.cancel()
+
+    progress = Progress(on_progress=on_progress, interval=0)
+    with pytest.raises(ForcedTermination):
+        solve(
+            progress=progress, checkpoint=tmp_path, checkpoint_interval=0
+        )
+    assert any(tmp_path.iterdir())
+
+    best = solve(checkpoint=tmp_path)
+    assert number_rolling(best.root) == number_rolling(expected.root)
+    assert choose_tree([best])[1] == pytest.approx(choose_tree([expected])[1])
+    assert not any(tmp_path.iterdir())
+
+
+class StepProgress(Progress):
+    """Прогресс с подсчетом выполненных шагов"""
+    steps = 0
+
+    def step(self, count=1):
+        self.steps += count
+        super().step(count)
+
+
+def test_checkpoint_second_pass(tmp_path):
+    """Отмена второго прохода не перестраивает первый"""
+    expected = StepProgress(interval=0)
+    solve(progress=expected)
+
+    def on_progress(*_):
+        if any(tmp_path.glob('*/direction_2')):
+            progress.token.cancel()
+
+    progress = StepProgress(on_progress=on_progress, interval=0)
+    with pytest.raises(ForcedTermination):
+        solve(
+            progress=progress, checkpoint=tmp_path, checkpoint_interval=0
+        )
+    assert any(tmp_path.glob('*/direction_1'))
+
+    resumed = StepProgress(interval=0)
+    solve(progress=resumed, checkpoint=tmp_path)
+    # заново раскрывается только дерево, раскрытое перед отменой
+    assert progress.steps + resumed.steps == expected.steps + 1
+    assert not any(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize('name, content', [
+    ('version.txt', '0'), ('state.bin', b'\x00'), ('frontier.bin', b'\x07'),
+    ('frontier.bin', b'\x01\x00\x00\x00\x00'),
+])
+def test_unreadable_checkpoint(tmp_path, name, content):
+    """Нечитаемая контрольная точка удаляется, построение идет заново"""
+    expected = solve()
+
+    def on_progress(value, _):
+        if value >= 5:
+            progress.token.cancel()
+
+    progress = Progress(on_progress=on_progress, interval=0)
+    with pytest.raises(ForcedTermination):
+        solve(
+            progress=progress, checkpoint=tmp_path, checkpoint_interval=0
+        )
+    files = list(tmp_path.glob(f'*/*/{name}'))
+    assert files
+    for path in files:
+        if isinstance(content, str):
+            path.write_text(content)
+        else:
+            path.write_bytes(content)
+
+    best = solve(checkpoint=tmp_path)
+    assert choose_tree([best])[1] == pytest.approx(choose_tree([expected])[1])
+    assert not any(tmp_path.iterdir())
+
+
+def test_import_without_qt():
+    """Решатель импортируется без PyQt5"""
+    code = (
+        "import sys; sys.modules['PyQt5'] = None; "
+        "import sequential_mh.bpp_dsc.solver"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,488 @@
+"""Модуль тестирования последовательной древовидной метаэвристики
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+import random
+from concurrent.futures import Future
+from copy import copy
+from functools import partial
+from threading import Event, Timer
+
+import pytest
+
+from ..rectangle import Bin, BinType, Blank, Kit, Material
+from ..support import dfs
+from ..tree import (
+    BinNode, Tree, WithID, is_defective_tree, solution_efficiency,
+    tree_signature
+)
+from ..exception import ForcedTermination
+from ..frontier import read_records
+from ..serialize import loads
+from ..choice import TreeSelector, choose_tree, choose_tree_iter
+from ..stm import (
+    Start, _expand, _run_start, _search, _stmh_idrd, choice_efficiency,
+    direction_passes, efficiency_bound, iter_stmh_idrd, portfolio,
+    portfolio_starts, resume_stmh_idrd, stmh_idrd, total_efficiency
+)
+from .test_tree import create_problem
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+RESTRICTIONS = {
+    'max_size': {
+        (3, float('inf')): (1200, 380), (1, 3): (1200, 400),
+        (0, 1): (1200, 400)
+    },
+    'cutting_length': 1200,
+    'cutting_thickness': 3,
+    'hem_until_3': 0,
+    'hem_after_3': 0,
+    'allowance': 0,
+    'end': 0.,
+    'min_size': (50, 100),
+}
+
+
+def create_tree():
+    """Дерево с корнем-слитком и набором заготовок двух толщин"""
+    sizes = [
+        (68, 110, 3, 1), (78, 30, 3, 1), (30, 30, 3, 1), (100, 68, 3, 1),
+        (110, 18, 3, 1), (110, 18, 3, 1), (110, 20, 3, 1),
+        (99, 98, 1, 1), (89, 98, 1, 1), (48.5, 30, 1, 1), (48.5, 30, 1, 1),
+        (99, 118, 1, 1), (20, 190, 1, 1), (178, 38, 1, 1), (178, 30, 1, 1),
+    ]
+    blanks = []
+    for i, size in enumerate(sizes):
+        blank = Blank(*size, material=MATERIAL)
+        blank.name = str(i + 1)
+        blanks.append(blank)
+    ingot = Bin(190, 140, 6, material=MATERIAL, bin_type=BinType.ingot)
+    return Tree(BinNode(ingot, kit=Kit(blanks)))
+
+
+def efficiencies(trees):
+    """Отсортированные эффективности деревьев"""
+    return sorted(
+        round(solution_efficiency(
+            tree.root, list(dfs(tree.root)), tree.main_kit,
+            nd=True, is_p=True
+        ), 9)
+        for tree in trees
+    )
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_parallel_expansion(workers):
+    """Параллельное раскрытие дает те же деревья, что и последовательное"""
+    serial = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    parallel = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, workers=workers
+    )
+    assert serial
+    assert efficiencies(parallel) == efficiencies(serial)
+
+
+class SlowExecutor:
+    """Исполнитель, в котором одно раскрытие завершается с задержкой"""
+    def __init__(self, slow=2, delay=0.5):
+        self.slow = slow
+        self.delay = delay
+        self.submitted = 0
+        self.submitted_before = None
+
+    def submit(self, func, *args):
+        future = Future()
+        result = func(*args)
+        self.submitted += 1
+        if self.submitted == self.slow:
+            Timer(self.delay, self._release, (future, result)).start()
+        else:
+            future.set_result(result)
+        return future
+
+    def _release(self, future, result):
+        self.submitted_before = self.submitted
+        if future.set_running_or_notify_cancel():
+            future.set_result(result)
+
+
+def test_parallel_in_flight():
+    """Пока одно дерево раскрывается, раскрываются другие деревья"""
+    serial = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    executor = SlowExecutor()
+    trees = list(_search(
+        create_tree(), partial(_expand, restrictions=RESTRICTIONS), True,
+        RESTRICTIONS, executor=executor, max_in_flight=4
+    ))
+    assert executor.submitted_before > executor.slow + 1
+    assert efficiencies(trees) == efficiencies(serial)
+
+
+def test_direction_passes():
+    """Одновременные проходы совпадают с последовательными"""
+    serial = []
+    for direction in (1, 2):
+        serial.extend(_stmh_idrd(
+            create_tree(), restrictions=RESTRICTIONS, direction=direction
+        ))
+    steps = []
+    concurrent = direction_passes(
+        create_tree(), (1, 2), progress=steps.append,
+        restrictions=RESTRICTIONS
+    )
+    assert efficiencies(concurrent) == efficiencies(serial)
+    assert steps and steps == sorted(steps)
+
+
+def test_direction_passes_cancel():
+    """Отмена прерывает все проходы"""
+    with pytest.raises(ForcedTermination):
+        direction_passes(
+            create_tree(), (1, 2), cancel=lambda: True,
+            restrictions=RESTRICTIONS
+        )
+
+
+def test_beam_width():
+    """Луч ограничивает уровень и учитывает отброшенные деревья"""
+    full = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    stats = {}
+    wide = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, beam_width=1000,
+        stats=stats
+    )
+    assert efficiencies(wide) == efficiencies(full)
+    assert stats['pruned'] == 0
+
+    stats = {}
+    narrow = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, beam_width=1, stats=stats
+    )
+    assert narrow
+    assert len(narrow) < len(full)
+    assert stats['pruned'] > 0
+
+
+def test_efficiency_bound():
+    """Верхняя оценка не меньше эффективности построенных деревьев
+    и отсекает деревья, не меняя решения"""
+    tree = create_tree()
+    bound = efficiency_bound(tree)
+    trees = _stmh_idrd(tree, restrictions=RESTRICTIONS)
+    for item in trees:
+        assert total_efficiency(item) <= efficiency_bound(item) + 1e-9
+        assert efficiency_bound(item) <= bound + 1e-9
+
+    dsc_example = pytest.importorskip('dsc_example')
+    results = []
+    for bound_pruning in (False, True):
+        tree, restrictions = create_problem(dsc_example.example_2)
+        stats = {}
+        trees = _stmh_idrd(
+            tree, restrictions=restrictions, bound_pruning=bound_pruning,
+            stats=stats
+        )
+        valid = [
+            item for item in trees
+            if not is_defective_tree(item, restrictions['max_size'])
+        ]
+        for item in valid:
+            assert total_efficiency(item) <= efficiency_bound(
+                item, restrictions['max_size']
+            ) + 1e-9
+        best, efficiency = choose_tree(valid)
+        results.append((tree_signature(best), efficiency, stats))
+    (expected, efficiency, full), (best, pruned_efficiency, stats) = results
+    assert full['bounded'] == 0 and stats['bounded'] > 0
+    assert stats['expansions'] < full['expansions']
+    assert best == expected
+    assert pruned_efficiency == pytest.approx(efficiency)
+
+
+def test_deduplicate():
+    """Повторно построенные деревья пропускаются, решение не меняется"""
+    tree = create_tree()
+    assert tree_signature(copy(tree)) == tree_signature(tree)
+
+    dsc_example = pytest.importorskip('dsc_example')
+    results = []
+    for deduplicate in (False, True):
+        # ветки с разным порядком проката дают одинаковые деревья
+        tree, restrictions = create_problem(dsc_example.example_1)
+        stats = {}
+        trees = _stmh_idrd(
+            tree, restrictions=restrictions, deduplicate=deduplicate,
+            stats=stats
+        )
+        signatures = [tree_signature(item) for item in trees]
+        valid = [
+            item for item in trees
+            if not is_defective_tree(item, restrictions['max_size'])
+        ]
+        best, efficiency = choose_tree(valid)
+        results.append((signatures, tree_signature(best), efficiency, stats))
+    (signatures, expected, efficiency, full), \
+        (unique, best, unique_efficiency, stats) = results
+    assert full['duplicates'] == 0 and stats['duplicates'] > 0
+    assert len(unique) == len(set(unique)) == len(set(signatures))
+    assert len(unique) + stats['duplicates'] == len(signatures)
+    assert best == expected
+    assert unique_efficiency == pytest.approx(efficiency)
+
+
+def test_max_expansions():
+    """Построение останавливается после исчерпания ограничения"""
+    full = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    # ограничение действует и до появления первого годного дерева
+    budget = 1
+    stats = {}
+    trees = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, max_expansions=budget,
+        stats=stats
+    )
+    assert stats['interrupted'] and stats['expansions'] == budget
+    assert 'incumbent' not in stats and not trees
+    while 'incumbent' not in stats:
+        budget += 1
+        stats = {}
+        trees = _stmh_idrd(
+            create_tree(), restrictions=RESTRICTIONS, max_expansions=budget,
+            stats=stats
+        )
+    assert stats['interrupted'] and stats['expansions'] == budget
+    assert 0 < len(trees) < len(full)
+    assert any(item is stats['incumbent'] for item in trees)
+    assert not is_defective_tree(
+        stats['incumbent'], RESTRICTIONS['max_size']
+    )
+
+    stats = {}
+    trees = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, max_expansions=10 ** 6,
+        stats=stats
+    )
+    assert not stats['interrupted']
+    valid = [
+        item for item in trees
+        if not is_defective_tree(item, RESTRICTIONS['max_size'])
+    ]
+    assert stats['incumbent_efficiency'] >= \
+        max(map(choice_efficiency, valid)) - 0.02
+
+
+def test_interrupted_result():
+    """После досрочной остановки возвращается лучшее построенное дерево"""
+    dsc_example = pytest.importorskip('dsc_example')
+    # при таком ограничении дерево с максимальной эффективностью
+    # не совпадает с выбранным по правилу choose_tree
+    tree, restrictions = create_problem(dsc_example.example_1)
+    stats = {}
+    _stmh_idrd(
+        tree, restrictions=restrictions, max_expansions=20, stats=stats
+    )
+    assert stats['interrupted']
+
+    tree, restrictions = create_problem(dsc_example.example_1)
+    best = stmh_idrd(tree, restrictions=restrictions, max_expansions=20)
+    assert tree_signature(best) == tree_signature(stats['incumbent'])
+
+
+def test_anytime_cancel():
+    """При отмене с ограничениями возвращаются построенные деревья"""
+    stats = {}
+    cancel_event = Event()
+
+    def on_step(_):
+        if 'incumbent' in stats:
+            cancel_event.set()
+
+    trees = _stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS, time_budget=60,
+        cancel_event=cancel_event, on_step=on_step, stats=stats
+    )
+    assert stats['interrupted']
+    assert any(item is stats['incumbent'] for item in trees)
+
+    cancel_event = Event()
+    cancel_event.set()
+    with pytest.raises(ForcedTermination):
+        _stmh_idrd(
+            create_tree(), restrictions=RESTRICTIONS,
+            cancel_event=cancel_event
+        )
+
+
+def test_portfolio_starts():
+    """Старты портфеля различаются зернами и политиками"""
+    starts = portfolio_starts(8, seed=10)
+    assert [start.seed for start in starts] == list(range(10, 18))
+    assert [start.direction for start in starts[:4]] == [1, 2, 3, 4]
+    assert {start.full_level for start in starts[2:]} == {7, 5, 3}
+
+
+def test_seeded_start():
+    """Старт со случайной политикой воспроизводим по зерну"""
+    start = Start(5, 4, 1)
+    first = _run_start(create_tree(), start, restrictions=RESTRICTIONS)
+    second = _run_start(create_tree(), start, restrictions=RESTRICTIONS)
+    assert efficiencies(first) == efficiencies(second)
+
+
+def test_portfolio():
+    """Портфель выбирает лучшее дерево среди всех стартов"""
+    starts = [Start(0, 1, None), Start(1, 4, 1)]
+    best, efficiency, start = portfolio(
+        create_tree(), starts, workers=2, restrictions=RESTRICTIONS
+    )
+    assert start in starts
+    assert efficiency == pytest.approx(choice_efficiency(best))
+    for item in starts:
+        trees = _run_start(create_tree(), item, restrictions=RESTRICTIONS)
+        valid = [
+            tree for tree in trees
+            if not is_defective_tree(tree, RESTRICTIONS['max_size'])
+        ]
+        assert max(map(choice_efficiency, valid)) <= efficiency + 0.02
+    again = portfolio(
+        create_tree(), starts, workers=2, restrictions=RESTRICTIONS
+    )
+    assert again[1:] == (efficiency, start)
+
+
+def test_iter_stmh_idrd():
+    """Генератор выдает те же деревья, что и построение списком"""
+    trees = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    generator = iter_stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    first = next(generator)
+    assert efficiencies([first, *generator]) == efficiencies(trees)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {}, {'deduplicate': True}, {'direction': 4, 'full_level': 1},
+    {'frontier_limit': 3}, {'max_expansions': 10 ** 6}, {'beam_width': 3},
+])
+def test_checkpoint_resume(tmp_path, kwargs):
+    """Продолжение с контрольной точки дает те же деревья"""
+    def run(generator, limit=None):
+        random.seed(3)
+        WithID.set_id(0)
+        trees = []
+        for item in generator(create_tree()):
+            trees.append(item)
+            if len(trees) == limit:
+                break
+        return trees
+
+    def signatures(trees):
+        return [
+            (tree_signature(item), [node._id for node in dfs(item.root)])
+            for item in trees
+        ]
+
+    path = tmp_path / 'checkpoint'
+    full = run(partial(
+        _stmh_idrd, restrictions=RESTRICTIONS, checkpoint=path, **kwargs
+    ))
+    assert not path.exists()
+
+    # построение прерывается после половины деревьев
+    run(partial(
+        iter_stmh_idrd, restrictions=RESTRICTIONS, checkpoint=path,
+        checkpoint_interval=0, **kwargs
+    ), limit=len(full) // 2)
+    assert path.exists()
+    random.seed(100)
+    resumed = resume_stmh_idrd(path)
+    assert signatures(resumed) == signatures(full)
+    assert not path.exists()
+
+
+def test_checkpoint_results(tmp_path):
+    """Построенные деревья дописываются в файл контрольной точки"""
+    generator = iter_stmh_idrd(
+        create_tree(), restrictions=RESTRICTIONS,
+        checkpoint=tmp_path / 'checkpoint', checkpoint_interval=0
+    )
+    trees = [next(generator), next(generator)]
+    records = read_records(tmp_path / 'checkpoint.results')
+    assert [tree_signature(loads(data)) for data in records] == \
+        [tree_signature(item) for item in trees]
+
+
+def test_tree_selector():
+    """Потоковый выбор совпадает с choose_tree при любом порядке"""
+    trees = [
+        item for item in _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+        if not is_defective_tree(item, RESTRICTIONS['max_size'])
+    ]
+    rnd = random.Random(0)
+    for _ in range(20):
+        rnd.shuffle(trees)
+        expected, efficiency = choose_tree(trees)
+        selector = TreeSelector()
+        for item in trees:
+            selector.add(item)
+        assert selector.count == len(trees)
+        assert len(selector) <= len(trees)
+        assert selector.best() == (expected, efficiency)
+        assert choose_tree_iter(iter(trees)) == (expected, efficiency)
+        # выбор по частям совпадает с выбором по всем деревьям
+        first, second = TreeSelector(), TreeSelector()
+        for i, item in enumerate(trees):
+            (first if i < len(trees) // 2 else second).add(item)
+        first.update(second)
+        assert first.count == len(trees)
+        assert first.best() == (expected, efficiency)
+    with pytest.raises(ValueError):
+        TreeSelector().best()
+
+
+def test_tree_copy_sharing():
+    """Копия дерева разделяет неизменяемые части с оригиналом"""
+    tree = max(
+        _stmh_idrd(create_tree(), restrictions=RESTRICTIONS),
+        key=lambda item: len(item.root.cc_leaves)
+    )
+    other = copy(tree)
+    assert other.main_kit is tree.main_kit
+    assert other.root is not tree.root
+    assert tree_signature(other) == tree_signature(tree)
+    for node, copy_node in zip(tree.root.cc_leaves, other.root.cc_leaves):
+        assert copy_node.result is not node.result
+        for item, copy_item in zip(node.result, copy_node.result):
+            assert copy_item is item
+    adj_node = other.root.adj_leaves[0]
+    adj_node.kit.update([Blank(10, 10, 1, 1, material=MATERIAL)])
+    assert tree_signature(other) != tree_signature(tree)
+
+
+def test_node_index():
+    """Индекс узлов совпадает с обходом дерева после построения"""
+    for tree in _stmh_idrd(create_tree(), restrictions=RESTRICTIONS):
+        nodes = list(dfs(tree.root))
+        assert tree.root._index == {node._id: node for node in nodes}
+        other = copy(tree)
+        for node in nodes:
+            assert other.node_by_id(node._id)._id == node._id
+            assert other.node_by_id(node._id) is not node
+
+
+def test_checkpoint_in_flight(tmp_path):
+    """Деревья, раскрывавшиеся при записи точки, раскрываются заново"""
+    full = _stmh_idrd(create_tree(), restrictions=RESTRICTIONS)
+    path = tmp_path / 'checkpoint'
+    generator = _search(
+        create_tree(), partial(_expand, restrictions=RESTRICTIONS), True,
+        RESTRICTIONS, executor=SlowExecutor(), max_in_flight=4,
+        checkpoint=path, checkpoint_interval=0
+    )
+    next(generator)
+    generator.close()
+    assert path.exists()
+    resumed = resume_stmh_idrd(path)
+    assert efficiencies(resumed) == efficiencies(full)
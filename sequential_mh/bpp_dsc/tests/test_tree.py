@@ -0,0 +1,322 @@
+"""Модуль тестирования проверок дерева на соответствие ограничениям
+
+Проверки сравниваются с исходной (квадратичной) реализацией на
+деревьях, построенных для примеров из dsc_example.py.
+
+:Date: 17.10.2026
+:Version: 0.1
+:Authors:
+    - Воронов Владимир Сергеевич
+"""
+
+from collections import deque
+from copy import copy
+
+import pytest
+
+from ..rectangle import Bin, BinType, Blank, Direction, Kit, Material
+from ..support import dfs
+from ..stm import _expand, is_empty_tree
+from ..tree import (
+    BinNode, Operations, Tree, delete_all_branch, get_max_size, is_cc_node,
+    is_cutting_node, is_defective_tree, is_rolling_node, is_ubin_node,
+    to_delete, to_delete_branch, tree_signature
+)
+
+
+MATERIAL = Material('Сплав 1', 2.2, 1.)
+MAX_SIZE = {
+    (3, float('inf')): (1200, 380), (1, 3): (1200, 400), (0, 1): (1200, 400)
+}
+MAX_TREES = 40
+
+
+# Исходная реализация проверок --------------------------------------------
+def reference_delete_all_branch(root, max_size, without_root=False):
+    for node in dfs(root):
+        if node not in list(dfs(root)):
+            continue
+        if without_root and node is root:
+            continue
+        is_locked = False
+        if is_rolling_node(node.parent):
+            if node.parent.operation == Operations.h_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.length, node.bin.width, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            elif node.parent.operation == Operations.v_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.width, node.bin.length, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            if not is_cutting_node(node.parent) and is_locked:
+                node.delete_branch()
+        elif is_cutting_node(node.parent):
+            parent = node.parent
+            children = parent.list_of_children()
+            if len(children) == 2:
+                left_size = children[0].bin.size[:2]
+                right_size = children[1].bin.size[:2]
+                if parent.direction == Direction.H:
+                    if left_size[0] < 0:
+                        is_locked = True
+                    size = (
+                        round(left_size[0] + right_size[0], 4),
+                        round(max(left_size[1], right_size[1]), 4)
+                    )
+                else:
+                    if left_size[1] < 0:
+                        is_locked = True
+                    size = (
+                        round(max(left_size[0], right_size[0]), 4),
+                        round(left_size[1] + right_size[1], 4)
+                    )
+            else:
+                size = children[0].bin.size[:2]
+            parent_bin = parent.parent.bin
+            if size[0] > round(parent_bin.size[0], 4) or size[1] > round(parent_bin.size[1], 4):
+                is_locked = True
+            if is_locked:
+                parent.delete_branch()
+
+
+def reference_to_delete_branch(root, max_size, without_root=False):
+    for node in dfs(root):
+        if node not in list(dfs(root)):
+            continue
+        if without_root and node is root:
+            continue
+        is_locked = False
+        if is_rolling_node(node.parent):
+            if node.parent.operation == Operations.h_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.length, node.bin.width, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            elif node.parent.operation == Operations.v_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.width, node.bin.length, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            if not is_cutting_node(node.parent) and is_locked:
+                return True
+        elif is_cutting_node(node.parent):
+            parent = node.parent
+            children = parent.list_of_children()
+            if len(children) == 2:
+                left_size = children[0].bin.size[:2]
+                right_size = children[1].bin.size[:2]
+                if parent.direction == Direction.H:
+                    if left_size[0] < 0:
+                        is_locked = True
+                    size = (
+                        round(left_size[0] + right_size[0], 4),
+                        round(max(left_size[1], right_size[1]), 4)
+                    )
+                else:
+                    if left_size[1] < 0:
+                        is_locked = True
+                    size = (
+                        round(max(left_size[0], right_size[0]), 4),
+                        round(left_size[1] + right_size[1], 4)
+                    )
+            else:
+                size = children[0].bin.size[:2]
+            parent_bin = parent.parent.bin
+            if size[0] > round(parent_bin.size[0], 4) or size[1] > round(parent_bin.size[1], 4):
+                is_locked = True
+            return is_locked
+    return False
+
+
+def reference_is_defective_tree(tree, max_size):
+    root = tree.root
+    for node in dfs(root):
+        if node not in list(dfs(root)):
+            continue
+        if is_ubin_node(node):
+            return False
+        is_locked = False
+        if is_rolling_node(node.parent):
+            if node.parent.operation == Operations.h_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.length, node.bin.width, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            elif node.parent.operation == Operations.v_rolling:
+                if max_size:
+                    is_locked = to_delete(node.bin.width, node.bin.length, get_max_size(max_size, node.bin.height))
+                is_locked = is_locked and node.bin.height != node.parent_bnode.bin.height
+            if not is_cutting_node(node.parent) and is_locked:
+                return True
+        elif is_cutting_node(node.parent):
+            parent = node.parent
+            children = parent.list_of_children()
+            if len(children) == 2:
+                left_size = children[0].bin.size[:2]
+                right_size = children[1].bin.size[:2]
+                if parent.direction == Direction.H:
+                    if round(left_size[0], 4) < 0:
+                        is_locked = True
+                    size = (
+                        round(left_size[0] + right_size[0], 4),
+                        round(max(left_size[1], right_size[1]), 4)
+                    )
+                else:
+                    if round(left_size[1], 4) < 0:
+                        is_locked = True
+                    size = (
+                        round(max(left_size[0], right_size[0]), 4),
+                        round(left_size[1] + right_size[1], 4)
+                    )
+            else:
+                size = children[0].bin.size[:2]
+            parent_bin = parent.parent.bin
+            if size[0] > round(parent_bin.size[0], 4) or size[1] > round(parent_bin.size[1], 4):
+                is_locked = True
+            if is_locked:
+                return True
+        elif is_cc_node(node):
+            if round(node.bin.length, 4) < round(node.result.length, 4) or round(node.bin.width, 4) < round(node.result.width, 4):
+                return True
+    return False
+
+
+# Построение деревьев для примеров -----------------------------------------
+def create_problem(example):
+    """Начальное дерево и ограничения для примера из dsc_example.py"""
+    data = example()
+    restrictions = {
+        'max_size': MAX_SIZE,
+        'cutting_length': data.get('cutting_length', 1200),
+        'cutting_thickness': data.get('cutting_thickness'),
+        'hem_until_3': data.get('hem_until_3', 0),
+        'hem_after_3': data.get('hem_after_3', 0),
+        'allowance': data.get('allowance', 0),
+        'end': data.get('end', 0),
+        'min_size': (50, 100),
+    }
+    blanks = []
+    for i, item in enumerate(data['kit']):
+        direction = None
+        if len(item) == 5:
+            *item, direction = item
+            # пример использует модуль, импортированный
+            # по абсолютному пути
+            direction = Direction(direction.value)
+        blank = Blank(*item, direction=direction, material=MATERIAL)
+        blank.name = str(i + 1)
+        blanks.append(blank)
+    ingot = Bin(
+        data['L0'], data['W0'], data['H0'], material=MATERIAL,
+        bin_type=BinType.ingot
+    )
+    return Tree(BinNode(ingot, kit=Kit(blanks))), restrictions
+
+
+def frontier_trees(example):
+    """Деревья, встречающиеся в процессе построения (до MAX_TREES)"""
+    tree, restrictions = create_problem(example)
+    level = deque([tree])
+    trees = []
+    while level and len(trees) < MAX_TREES:
+        tree = level.popleft()
+        trees.append(tree)
+        if is_empty_tree(tree) or reference_is_defective_tree(tree, MAX_SIZE):
+            continue
+        _, unfinished = _expand(copy(tree), restrictions=restrictions)
+        level.extend(unfinished)
+    return trees
+
+
+def examples():
+    dsc_example = pytest.importorskip('dsc_example')
+    return [
+        dsc_example.example_2, dsc_example.example_6, dsc_example.example_7,
+        dsc_example.example_8, dsc_example.example_9
+    ]
+
+
+@pytest.fixture(scope='module', params=range(5))
+def trees(request):
+    return frontier_trees(examples()[request.param])
+
+
+def test_is_defective_tree(trees):
+    """Проверка дерева совпадает с исходной реализацией"""
+    verdicts = [is_defective_tree(tree, MAX_SIZE) for tree in trees]
+    assert verdicts == [
+        reference_is_defective_tree(tree, MAX_SIZE) for tree in trees
+    ]
+
+
+@pytest.mark.parametrize('index', range(5))
+def test_is_defective_tree_cache(index):
+    """Кэш проверки сбрасывается при изменении дерева"""
+    tree, restrictions = create_problem(examples()[index])
+    level = deque([tree])
+    checked = 0
+    while level and checked < MAX_TREES:
+        tree = level.popleft()
+        checked += 1
+        verdict = is_defective_tree(tree, MAX_SIZE)
+        assert verdict == reference_is_defective_tree(tree, MAX_SIZE)
+        assert not tree.root.is_dirty()
+        if verdict or is_empty_tree(tree):
+            continue
+        # раскрытие без копирования: проверенное дерево изменяется
+        _, unfinished = _expand(tree, restrictions=restrictions)
+        for item in unfinished:
+            assert is_defective_tree(item, MAX_SIZE) == \
+                reference_is_defective_tree(item, MAX_SIZE)
+        level.extend(unfinished)
+
+
+@pytest.mark.parametrize('index', range(5))
+def test_leaves_cache(index):
+    """Кэш листьев сбрасывается при изменении структуры дерева"""
+    tree, restrictions = create_problem(examples()[index])
+    level = deque([tree])
+    checked = 0
+    while level and checked < MAX_TREES:
+        tree = level.popleft()
+        checked += 1
+        for node in dfs(tree.root):
+            assert node.leaves() == node._find_leaves()
+        if is_empty_tree(tree) or is_defective_tree(tree, MAX_SIZE):
+            continue
+        # раскрытие без копирования: закэшированные листья устаревают
+        _, unfinished = _expand(tree, restrictions=restrictions)
+        for item in unfinished:
+            assert item.root.leaves() == item.root._find_leaves()
+        level.extend(unfinished)
+
+
+@pytest.mark.parametrize('without_root', [False, True])
+def test_to_delete_branch(trees, without_root):
+    """Проверка ветвей совпадает с исходной реализацией"""
+    for tree in trees:
+        for node in dfs(tree.root):
+            assert to_delete_branch(node, MAX_SIZE, without_root) == \
+                reference_to_delete_branch(node, MAX_SIZE, without_root)
+
+
+@pytest.mark.parametrize('without_root', [False, True])
+def test_delete_all_branch(trees, without_root):
+    """Удаление ветвей совпадает с исходной реализацией"""
+    for tree in trees:
+        # удаление вызывается для узлов проката и разрезов
+        nodes = [
+            node for node in dfs(tree.root)
+            if node is tree.root or is_rolling_node(node)
+            or is_cutting_node(node)
+        ]
+        for node in nodes:
+            tree_1, tree_2 = copy(tree), copy(tree)
+            delete_all_branch(
+                tree_1.node_by_id(node._id), MAX_SIZE, without_root
+            )
+            reference_delete_all_branch(
+                tree_2.node_by_id(node._id), MAX_SIZE, without_root
+            )
+            assert tree_signature(tree_1) == tree_signature(tree_2)
+            # кэш проверки, скопированный из исходного дерева,
+            # сбрасывается удалением ветвей
+            assert is_defective_tree(tree_1, MAX_SIZE) == \
+                reference_is_defective_tree(tree_1, MAX_SIZE)
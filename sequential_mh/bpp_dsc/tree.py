@@ -9,16 +9,17 @@
 
 import random
 from collections import Counter, deque
+from hashlib import blake2b
 from collections.abc import Iterable
 from copy import copy, deepcopy
 from enum import Enum
 from functools import partial
-from itertools import chain, product, count
+from itertools import chain, product, count, repeat
 from operator import attrgetter
 from math import prod
 
 
-from .ph import ph_bpp
+from .cache import cached_bpp_ts, cached_ph_bpp
 from .support import (
     deformation, eq_with_deformation_double_side, is_subrectangle, is_subrectangle_with_def, dfs
 )
@@ -28,7 +29,7 @@ from .exception import (
 )
 from .rectangle import BinType, Bin, Direction, Kit, Number, Result, UnsizedBin
 
-from ..tsh.bpp_ts import bpp_ts, Rectangle, RectangleType
+from ..tsh.bpp_ts import Rectangle, RectangleType
 
 
 Vec3 = tuple[Number, Number, Number]
@@ -51,6 +52,13 @@ class WithID:
     def __init__(self) -> None:
         self._id = next(self.__class__._current_id)
 
+    @classmethod
+    def peek_id(cls) -> int:
+        """Следующее значение ID (без его использования)"""
+        value = next(cls._current_id)
+        cls._current_id = count(value)
+        return value
+
     # работа с ID ------------------------------------------------------
     @classmethod
     def reset_id(cls) -> None:
@@ -86,6 +94,14 @@ class BaseNode(WithID):
         self.locked = False
         self.level = 0
         self.color = ''
+        # индекс узлов по ID (ведется только у корня дерева)
+        self._index = None
+        # отметка изменения дерева после последней проверки на дефекты
+        # и результат этой проверки (ведутся только у корня)
+        self._dirty = False
+        self._defect = None
+        # кэш листьев поддерева
+        self._leaves = None
 
     # работа с потомками (создание, добавление, удаление, вставка) -----
     def create(self, *args, **kwargs):
@@ -99,9 +115,18 @@ class BaseNode(WithID):
             if node not in self._children:
                 self._children.append(node)
                 node.parent = self
+            else:
+                return
         else:
             self._children = [self._children, node]
             node.parent = self
+        node._index = None
+        self.reset_leaves()
+        self.mark_dirty()
+        index = self.attached_index()
+        if index is not None:
+            for item in dfs(node):
+                index[item._id] = item
 
     def delete(self, node) -> None:
         if isinstance(self._children, list):
@@ -112,12 +137,20 @@ class BaseNode(WithID):
                     self._children = None
                 elif len(self._children) == 1:
                     self._children = self._children[0]
+            else:
+                return
         else:
             if self._children is node:
                 self._children = None
                 node.parent = None
+            else:
+                return
+        self.reset_leaves()
+        self.mark_dirty()
+        self._unindex(node, self.attached_index())
 
     def delete_branch(self):
+        self.mark_dirty()
         cur_branch = self.current_branch()
         if cur_branch:
             rolling_node = cur_branch.parent
@@ -149,6 +182,17 @@ class BaseNode(WithID):
         return children
 
     def leaves(self):
+        """Листья поддерева узла (в порядке обхода в ширину)
+
+        Список листьев кэшируется в узле и сбрасывается при изменении
+        структуры поддерева (см. reset_leaves).
+        """
+        cached = getattr(self, '_leaves', None)
+        if cached is None:
+            cached = self._leaves = self._find_leaves()
+        return list(cached)
+
+    def _find_leaves(self):
         leaves = []
         level = deque([self])
         while level:
@@ -208,15 +252,73 @@ class BaseNode(WithID):
 
     @children.setter
     def children(self, value) -> None:
+        self.mark_dirty()
+        index = self.attached_index()
         for node in self.list_of_children():
             node.parent = None
+            self._unindex(node, index)
         self._children = None
+        self.reset_leaves()
         if isinstance(value, Iterable):
             for node in value:
                 self.add(node)
         else:
             self.add(value)
 
+    # индекс узлов ---------------------------------------------------
+    def build_index(self):
+        """Построение индекса узлов по ID для корня дерева"""
+        self._index = {node._id: node for node in dfs(self)}
+        return self._index
+
+    def attached_index(self):
+        """Индекс узлов дерева, в которое включен узел
+
+        Узел включен в дерево, если он достижим из корня через
+        потомков. Узлы шаблона, у которых указан предок, но которые
+        еще не добавлены в его потомки, в дерево не включены.
+
+        :return: Индекс узлов корня или None, если узел не включен
+                 в дерево или у корня нет индекса
+        :rtype: dict[int, BaseNode] или None
+        """
+        node = self
+        while node.parent is not None:
+            if not any(item is node for item in node.parent.list_of_children()):
+                return None
+            node = node.parent
+        return getattr(node, '_index', None)
+
+    @staticmethod
+    def _unindex(node, index):
+        if index is None:
+            return
+        for item in dfs(node):
+            if index.get(item._id) is item:
+                del index[item._id]
+
+    # отслеживание изменений -------------------------------------------
+    def reset_leaves(self):
+        """Сброс кэша листьев узла и его предков"""
+        node = self
+        while node is not None:
+            node._leaves = None
+            node = node.parent
+    def mark_dirty(self):
+        """Отметка дерева узла как измененного
+
+        Отметка ставится в корне. Пока ее нет, результат проверки
+        дерева на дефекты берется из кэша (см. is_defective_tree).
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        root._dirty = True
+
+    def is_dirty(self):
+        """Есть ли в дереве узла изменения после последней проверки"""
+        return getattr(self.root, '_dirty', False)
+
     # маические методы -------------------------------------------------
     def __copy__(self):
         return self.__class__()
@@ -239,6 +341,8 @@ class Node(BaseNode):
         return self.children.estimate_size(start=start)
 
     def update_size(self, *, start=None, max_len=None, min_size=None):
+        if start is None:
+            self.mark_dirty()
         start = start or self
         for node in self.list_of_children():
             node.update_size(start=start, max_len=max_len, min_size=min_size)
@@ -251,6 +355,9 @@ class Node(BaseNode):
                 min_size=min_size, max_size=max_size,
                 change_height=change_height
             )
+        else:
+            # обновление дошло до корня
+            self.mark_dirty()
 
     # дополнительно (для удобства) -------------------------------------
     def update_kit(self, height):
@@ -368,7 +475,7 @@ class BinNode(Node):
             right = OperationNode(Operations.rolling)
             right.level = kwargs['level']
             return left, right
-        if cut_thickness == max(self.kit.blanks.keys()):
+        if cut_thickness == max(self.kit.keys()):
             node = OperationNode(Operations.rolling)
             node.level = kwargs['level']
             return node
@@ -410,6 +517,7 @@ class BinNode(Node):
         return node
 
     def insert(self, children, max_len=None, min_size=None):
+        self.mark_dirty()
         temp_children = self.children
         self.children = children
         if temp_children:
@@ -685,6 +793,7 @@ class BinNode(Node):
     def fix_sizes(self, width, length, is_min=False, miss_bins=False,
                   max_len=None, max_size=None, min_size=None, restrictions=None):
         # Лучше разнести этот метод по разным классам
+        self.mark_dirty()
         p_cont = self.parent_cont
         if not is_ubin_node(self):
             if miss_bins:
@@ -1125,7 +1234,7 @@ class OperationNode(Node):
             height = parent_bn.bin.height
         is_intermediate = bool(cut_thickness)
 
-        max_h = max(self.parent_bnode.kit.blanks.keys())
+        max_h = max(self.parent_bnode.kit.keys())
         if is_intermediate and not is_op_node(self.parent) and max_h != cut_thickness:
             bin_type = BinType.INTERMEDIATE
 
@@ -1243,6 +1352,8 @@ class OperationNode(Node):
         return estimate
 
     def update_size(self, *, start=None, max_len=None, min_size=None):
+        if start is None:
+            self.mark_dirty()
         if self.parent_bnode is None:
             return
         parent_size = self.parent_bnode.bin.size
@@ -1374,6 +1485,7 @@ class OperationNode(Node):
         )
 
     def transfer_size(self, to_right=False, max_len=None, min_size=None):
+        self.mark_dirty()
         if self.operation != Operations.cutting:
             msg = (
                 f'The node type "{self.operation.value}"'
@@ -1425,6 +1537,7 @@ class OperationNode(Node):
 
     def set_cut(self, max_len=None, min_size=None):
         # min_size = (50, 100)
+        self.mark_dirty()
         if self.operation == Operations.cutting:
             is_left = False
             parent_size = self.parent_bnode.bin.size
@@ -1561,6 +1674,7 @@ class OperationNode(Node):
 
     def update_cut(self, min_size=None):
         min_size = (50, 100)
+        self.mark_dirty()
         if self.operation != Operations.cutting:
             msg = 'Разрез доступен только для узлов разреза'
             raise OperationTypeError(msg)
@@ -1613,6 +1727,7 @@ class CuttingChartNode(Node):
 
     def pack(self, sorting='width', max_size=None, min_size=None, restrictions=None,
              with_priority=True):
+        self.mark_dirty()
         # if not self.size_check():
         #     self.kit.delete_height(self.bin.height)
         #     return self.result
@@ -1676,7 +1791,7 @@ class CuttingChartNode(Node):
                 first_priority = min([priority for priority, sg in group.items() if sg])
             else:
                 first_priority = None
-            _, main_region, min_rect, result, unplaced, tailings = bpp_ts(
+            _, main_region, min_rect, result, unplaced, tailings = cached_bpp_ts(
                 bin_node.bin.length, bin_node.bin.width, bin_node.bin.height,
                 bin_node.bin.d_height, group, self.bin.rolldir, x_hem=self.x_hem, y_hem=self.y_hem,
                 allowance=allowance, max_size=max_size,
@@ -1740,7 +1855,7 @@ class CuttingChartNode(Node):
                 length -= 2 * r.length
                 edge = max(self.result.tailings, key=attrgetter('x'))
                 x_0 = x_0 - edge.width + allowance
-            result, *_, tailings = ph_bpp(
+            result, *_, tailings = cached_ph_bpp(
                 length, width, group, x0=x_0, y0=y_0, first_priority=True,
                 allowance=allowance
             )
@@ -1792,6 +1907,7 @@ class CuttingChartNode(Node):
 
     def update_size(self, *, start=None, max_len=None, min_size=None):
         if start is None:
+            self.mark_dirty()
             cutting_node, _ = self.parent_cnode()
             if cutting_node is None:
                 return
@@ -1924,9 +2040,14 @@ class Tree:
         # NOTE: костыль
         self.main_kit = Kit(deepcopy(list(root.kit)))
         self._type = 0  # 0 - дерево, 1 - поддерево
+        root.build_index()
 
     # @staticmethod
-    def create_template(self, parent: BinNode, height, cut_thickness=None, direction=0):
+    def create_template(self, parent: BinNode, height, cut_thickness=None, direction=0,
+                        full_level=None):
+        # до уровня full_level направления 3 и 4 дают оба проката
+        if full_level is None:
+            full_level = 7 if self._type == 0 else 3
         nodes = deque([parent])
         parent_children = []
         while nodes:
@@ -1937,7 +2058,6 @@ class Tree:
                     continue
                 if is_cc_node(node):
                     continue
-            full_level = 7 if self._type == 0 else 3
             children = node.create(
                 height, cut_thickness=cut_thickness,
                 direction=direction, level=parent.level + 1,
@@ -1954,14 +2074,16 @@ class Tree:
                 nodes.append(children)
         return parent_children
 
-    def create_template_branches(self, parent: BinNode, height, cut_thickness=None, direction=0, min_size=None):
+    def create_template_branches(self, parent: BinNode, height, cut_thickness=None, direction=0, min_size=None,
+                                 full_level=None):
         if min_size and not is_ingot_node(parent):
             if not (parent.bin.length >= min_size[LENGTH] and parent.bin.width >= min_size[WIDTH]) \
                and not (parent.bin.length >= min_size[WIDTH] and parent.bin.width >= min_size[LENGTH]):
                 return
 
         children = self.create_template(
-            parent, height, cut_thickness=cut_thickness, direction=direction
+            parent, height, cut_thickness=cut_thickness, direction=direction,
+            full_level=full_level
         )
         if not isinstance(children, (list, tuple)):
             children = [children]
@@ -1975,17 +2097,40 @@ class Tree:
         return trees
 
     def node_by_id(self, id_):
-        for node in dfs(self.root):
-            if node._id == id_:
-                return node
-        return None
+        """Получение узла дерева по ID
+
+        Индекс узлов хранится у корня и обновляется при добавлении
+        и удалении узлов, поэтому поиск выполняется за O(1).
+        """
+        index = getattr(self.root, '_index', None)
+        if index is None:
+            index = self.root.build_index()
+        return index.get(id_)
 
     def __copy__(self):
-        obj = self.__class__(deepcopy(self.root))
+        """Копирование дерева
+
+        Части дерева, которые не изменяются после построения (исходный
+        набор заготовок, размещенные на картах раскроя заготовки
+        и поддеревья остатков), разделяются между копиями. Копируется
+        только изменяемая часть: узлы, листы, наборы и результаты.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.root = deepcopy(self.root, self._shared_memo())
+        obj.main_kit = self.main_kit
         obj._type = self._type
-        obj.main_kit = deepcopy(self.main_kit)
         return obj
 
+    def _shared_memo(self):
+        """Словарь deepcopy для разделяемых между копиями объектов"""
+        memo = {id(self.main_kit): self.main_kit}
+        for node in self.root.cc_leaves:
+            for item in chain.from_iterable(node.result.blanks.values()):
+                memo[id(item)] = item
+            for subtree in node.subtree:
+                memo[id(subtree)] = subtree
+        return memo
+
 
 def all_branches(root):
     branches = []
@@ -2247,9 +2392,33 @@ def to_delete(length, width, max_size):
     return max_size and (length > max_size[WIDTH] or width > max_size[LENGTH])
 
 
+def is_descendant(node, root):
+    """Проверка достижимости узла из корня через потомков
+
+    Подъем по предкам вместо полного обхода дерева: узел, удаленный
+    вместе с веткой, теряет связь с корнем.
+
+    :param node: Проверяемый узел
+    :type node: BaseNode
+    :param root: Корень поддерева
+    :type root: BaseNode
+    :return: True, если узел входит в поддерево с корнем root
+    :rtype: bool
+    """
+    while node is not root:
+        parent = node.parent
+        if parent is None:
+            return False
+        if not any(item is node for item in parent.list_of_children()):
+            return False
+        node = parent
+    return True
+
+
 def delete_all_branch(root, max_size, without_root=False):
     for node in dfs(root):
-        if node not in list(dfs(root)):
+        # узел мог быть удален вместе с веткой на предыдущих шагах
+        if not is_descendant(node, root):
             continue
         if without_root and node is root:
             continue
@@ -2296,8 +2465,6 @@ def delete_all_branch(root, max_size, without_root=False):
 
 def to_delete_branch(root, max_size, without_root=False):
     for node in dfs(root):
-        if node not in list(dfs(root)):
-            continue
         if without_root and node is root:
             continue
         is_locked = False
@@ -2342,10 +2509,36 @@ def to_delete_branch(root, max_size, without_root=False):
 
 
 def is_defective_tree(tree, max_size):
+    """Проверка дерева на дефекты (некорректные размеры узлов)
+
+    Результат проверки кэшируется в корне дерева и используется
+    повторно, пока в дереве нет измененных узлов (см.
+    BaseNode.mark_dirty) и не изменились ограничения по размерам.
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :param max_size: Ограничения по максимальным размерам
+    :type max_size: dict или None
+    :return: True, если дерево содержит дефекты
+    :rtype: bool
+    """
     root = tree.root
+    key = _size_key(max_size)
+    cached = getattr(root, '_defect', None)
+    if cached is not None and cached[0] == key and not root.is_dirty():
+        return cached[1]
+    verdict = _is_defective(root, max_size)
+    root._dirty = False
+    root._defect = (key, verdict)
+    return verdict
+
+
+def _size_key(max_size):
+    return tuple(max_size.items()) if max_size else None
+
+
+def _is_defective(root, max_size):
     for node in dfs(root):
-        if node not in list(dfs(root)):
-            continue
         if is_ubin_node(node):
             return False
         is_locked = False
@@ -2393,6 +2586,90 @@ def is_defective_tree(tree, max_size):
     return False
 
 
+def tree_signature(tree, ndigits=4):
+    """Канонический хеш частично построенного дерева
+
+    Учитывает последовательность операций (обход в глубину с числом
+    потомков у каждого узла), направления проката, размеры листов,
+    округленные до ``ndigits`` знаков, результаты упаковки карт и
+    оставшиеся в узлах наборы заготовок (как мультимножества).
+    Деревья с одинаковым хешем раскрываются одинаково. Хеш не зависит
+    от процесса (в отличие от hash для строк), поэтому его можно
+    сохранять в контрольных точках.
+
+    :param tree: Дерево раскроя
+    :type tree: Tree
+    :param ndigits: Точность округления размеров, defaults to 4
+    :type ndigits: int, optional
+    :return: Хеш дерева
+    :rtype: bytes
+    """
+    items = [tree._type]
+    for node in dfs(tree.root):
+        items.append(_node_signature(node, ndigits))
+    return blake2b(repr(items).encode(), digest_size=16).digest()
+
+
+def _node_signature(node, ndigits):
+    children = len(node.list_of_children())
+    if is_op_node(node):
+        direction = getattr(node.direction, 'value', node.direction)
+        return 'O', node.operation.name, direction, children
+    bin_ = node.bin
+    size = tuple(round(value, ndigits) for value in bin_.size)
+    rolldir = getattr(bin_.last_rolldir, 'value', None)
+    bin_items = (
+        type(bin_).__name__, bin_.bin_type.name, size,
+        round(bin_.d_height, ndigits), rolldir, tuple(bin_.deformations)
+    )
+    if is_ubin_node(node):
+        estimator = bin_.estimator
+        bin_items += (
+            bin_.fixed_length, bin_.fixed_width,
+            round(estimator.height, ndigits),
+            round(estimator.rectangle.length, ndigits),
+            round(estimator.rectangle.width, ndigits),
+            tuple(estimator.start), estimator.limits
+        )
+    if is_cc_node(node):
+        result = node.result
+        packed = sorted(
+            (
+                round(item.x, ndigits), round(item.y, ndigits),
+                *_blank_signature(item.rectangle, ndigits)
+            )
+            for item in chain.from_iterable(result.blanks.values())
+        )
+        tailings = sorted(
+            (
+                round(item.x, ndigits), round(item.y, ndigits),
+                round(item.length, ndigits), round(item.width, ndigits),
+                getattr(getattr(item, 'rtype', None), 'name', None)
+            )
+            for item in result.tailings
+        )
+        subtrees = tuple(
+            tree_signature(subtree, ndigits) for subtree in node.subtree
+        )
+        return (
+            'C', bin_items, round(result.length, ndigits),
+            round(result.width, ndigits), tuple(packed), tuple(tailings),
+            subtrees, children
+        )
+    kit = sorted(chain.from_iterable(
+        repeat(_blank_signature(blank, ndigits), count)
+        for blank, count in node.kit.counts()
+    ))
+    return 'B', bin_items, tuple(kit), children
+
+
+def _blank_signature(blank, ndigits):
+    return (
+        round(blank.length, ndigits), round(blank.width, ndigits),
+        round(blank.height, ndigits), blank.priority, blank.direction.value
+    )
+
+
 def get_all_residuals(tree):
     residuals = []
     for leave in tree.root.cc_leaves:
@@ -51,8 +51,9 @@ def rotate_all(rectangles, rolldir):
 def bpp_ts(length, width, height, g_height, rectangles, last_rolldir=None,
            first_priority=False,
            x_hem=(0, 0), y_hem=(0, 0), allowance=0, max_size=None,
-           is_visualize=False):
+           is_visualize=False, packing=ph_bpp):
     # rectangles - список прямоугольников
+    # packing - алгоритм заполнения пустых областей (ph_bpp)
     # rectangles.sort()
     src_rect = Rectangle((0, 0), (width, length))
     min_rect = Rectangle((0, 0), (0, 0))
@@ -213,7 +214,7 @@ def bpp_ts(length, width, height, g_height, rectangles, last_rolldir=None,
                 variants = [0] if soft_type == 0 else [0, soft_type]
                 for v in variants:
                     _usable_square = 0
-                    res, *_, _tailings = ph_bpp(
+                    res, *_, _tailings = packing(
                         empty_rect.length, empty_rect.width,
                         deepcopy(exclude_from_dict(best, rectangles)),
                         *empty_rect.blp, allowance, first_priority=False,
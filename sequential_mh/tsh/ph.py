@@ -16,12 +16,19 @@ https://www.sciencedirect.com/science/article/pii/S0020019015001519?via%3Dihub
 import sys
 import math
 
+from collections import Counter
+from functools import partial
 from itertools import chain, zip_longest
 from operator import attrgetter
 
 from .rect import Rectangle, PackedRectangle, RectangleType
 
 
+# Размещение полос одинаковых прямоугольников за один шаг
+# (см. place_strip)
+BULK_PLACEMENT = True
+
+
 def rotate_all(rectangles):
     for _, group in rectangles.items():
         for blank in group:
@@ -165,7 +172,28 @@ def ph_bpp(length, width, rectangles, x0=0., y0=0., allowance=0,
 
 def recursive_packing(x, y, length, width, rectangles, result, tailings,
                       allowance, first_priority=False, soft_type=None, k=0):
-    """Рекурсивная процедура упаковки
+    """Процедура упаковки
+
+    Области, на которые делится контейнер после размещения
+    прямоугольников, хранятся в стеке и упаковываются в том же
+    порядке, что и при рекурсивном обходе, поэтому количество
+    размещаемых прямоугольников не ограничено глубиной рекурсии.
+    Параметры -- как у :func:`pack_region`.
+    """
+    stack = [(x, y, length, width, first_priority, soft_type, k)]
+    while stack:
+        x, y, length, width, first_priority, soft_type, k = stack.pop()
+        regions = pack_region(
+            x, y, length, width, rectangles, result, tailings, allowance,
+            first_priority=first_priority, soft_type=soft_type, k=k
+        )
+        # первая из областей должна оказаться на вершине стека
+        stack.extend(reversed(regions))
+
+
+def pack_region(x, y, length, width, rectangles, result, tailings, allowance,
+                first_priority=False, soft_type=None, k=0):
+    """Размещение прямоугольника в области
 
     :param x: стартовая координата по оси X
     :type x: int или float
@@ -186,8 +214,16 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
     :type allowance: int или float
     :param first_priority: флаг учета приоритетов, defaults to False
     :type first_priority: bool, optional
+    :param soft_type: тип нестрогих размеров контейнера, defaults to None
+    :type soft_type: int, optional
+    :param k: допустимое увеличение размеров контейнера, defaults to 0
+    :type k: float, optional
+    :return: оставшиеся области в порядке упаковки в виде кортежей
+             (x, y, length, width, first_priority, soft_type, k)
+    :rtype: list[tuple]
     """
     best_rect = []
+    regions = []
     if first_priority:
         variant, best = get_best_fig(length, width, rectangles[first_priority])
         if variant < 5:
@@ -231,7 +267,7 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
         if p not in result:
             result[p] = []
         result[p].append(PackedRectangle(best, x, y))
-        rectangles[p].remove(best)
+        index = pop_rectangle(rectangles[p], best)
         if variant == 2:
             # new_y = y + d
             # new_length = length - d
@@ -240,10 +276,14 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                 new_y += allowance
                 new_length -= allowance
                 tailings.append(dummy)
-            recursive_packing(
-                x, new_y, new_length, width, rectangles, result,
-                tailings, allowance, first_priority=first_priority
+            _, new_y, new_length, _ = place_strip(
+                x, new_y, new_length, width, rectangles, result, tailings,
+                p, index, variant, first_priority,
+                partial(advance_length, allowance=allowance)
             )
+            regions.append((
+                x, new_y, new_length, width, first_priority, None, 0
+            ))
         elif variant == 3:
             # new_x = x + omega
             # new_width = width - omega
@@ -252,10 +292,14 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                 new_x += allowance
                 new_width -= allowance
                 tailings.append(dummy)
-            recursive_packing(
-                new_x, y, length, new_width, rectangles, result,
-                tailings, allowance, first_priority=first_priority
+            new_x, _, _, new_width = place_strip(
+                new_x, y, length, new_width, rectangles, result, tailings,
+                p, index, variant, first_priority,
+                partial(advance_width, allowance=allowance)
             )
+            regions.append((
+                new_x, y, length, new_width, first_priority, None, 0
+            ))
         elif variant == 4:
             min_w = min_l = sys.maxsize
             for _, group in rectangles.items():
@@ -280,10 +324,9 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                     tailings.append(dummy)
                 dummy = create_residual(new_x, y, d, new_width)
                 tailings.append(dummy)
-                recursive_packing(
-                    x, new_y, new_length, width, rectangles, result,
-                    tailings, allowance, first_priority=first_priority
-                )
+                regions.append((
+                    x, new_y, new_length, width, first_priority, None, 0
+                ))
             elif new_length < min_l:
                 if new_length > allowance:
                     dummy = create_allowance(x, new_y, allowance, omega)
@@ -297,10 +340,9 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                     tailings.append(dummy)
                 dummy = create_residual(x, new_y, new_length, omega)
                 tailings.append(dummy)
-                recursive_packing(
-                    new_x, y, length, new_width, rectangles,
-                    result, tailings, allowance, first_priority=first_priority
-                )
+                regions.append((
+                    new_x, y, length, new_width, first_priority, None, 0
+                ))
             elif omega < min_w:
                 if new_length > allowance:
                     dummy = create_allowance(x, new_y, allowance, width)
@@ -312,14 +354,10 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                     new_x += allowance
                     new_width -= allowance
                     tailings.append(dummy)
-                recursive_packing(
-                    new_x, y, d, new_width, rectangles, result,
-                    tailings, allowance
-                )
-                recursive_packing(
-                    x, new_y, new_length, width, rectangles, result,
-                    tailings, allowance, first_priority=first_priority
-                )
+                regions.append((new_x, y, d, new_width, False, None, 0))
+                regions.append((
+                    x, new_y, new_length, width, first_priority, None, 0
+                ))
             else:
                 if new_length > allowance:
                     dummy = create_allowance(x, new_y, allowance, omega)
@@ -331,15 +369,189 @@ def recursive_packing(x, y, length, width, rectangles, result, tailings,
                     new_x += allowance
                     new_width -= allowance
                     tailings.append(dummy)
-                recursive_packing(
-                    x, new_y, new_length, omega, rectangles, result,
-                    tailings, allowance
-                )
-                recursive_packing(
-                    new_x, y, length, new_width, rectangles,
-                    result, tailings, allowance,
-                    first_priority=first_priority
-                )
+                regions.append((x, new_y, new_length, omega, False, None, 0))
+                regions.append((
+                    new_x, y, length, new_width, first_priority, None, 0
+                ))
+    return regions
+
+
+def pop_rectangle(group, rectangle):
+    """Удаление размещенного прямоугольника из группы
+
+    Удаляется первый равный прямоугольник, как в ``list.remove``.
+
+    :return: позиция, с которой удален сам прямоугольник, или None,
+             если удален другой равный ему прямоугольник
+    :rtype: int или None
+    """
+    index = group.index(rectangle)
+    if group.pop(index) is rectangle:
+        return index
+    return None
+
+
+def fit_variant(length, width, rectangle):
+    """Вариант размещения прямоугольника в контейнере
+
+    Варианты те же, что и в :func:`get_best_fig`, для лучшей
+    из допустимых ориентаций прямоугольника.
+
+    :return: вариант и ориентация (1 -- с поворотом)
+    :rtype: tuple[int, int]
+    """
+    variant, orientation = 6, None
+    size = rectangle.size[:-1]
+    for j in range(1 + rectangle.is_rotatable):
+        rect_l = size[(0 + j) % 2]
+        rect_w = size[(1 + j) % 2]
+        if rect_l == length and rect_w == width:
+            current = 1
+        elif rect_l < length and rect_w == width:
+            current = 2
+        elif rect_l == length and rect_w < width:
+            current = 3
+        elif rect_l < length and rect_w < width:
+            current = 4
+        else:
+            current = 5
+        if current < variant:
+            variant, orientation = current, j
+    return variant, orientation
+
+
+def is_same(rectangle, other):
+    """Совпадение прямоугольников с точностью до поворота"""
+    if type(rectangle) is not type(other):
+        return False
+    if vars(rectangle) == vars(other):
+        return True
+    if not rectangle.is_rotatable:
+        return False
+    state = dict(vars(rectangle))
+    state['length'], state['width'] = rectangle.width, rectangle.length
+    return state == vars(other)
+
+
+def strip_sides(rectangle, variant, length, width):
+    """Стороны ориентаций прямоугольника, с которыми он может помешать
+    размещению полосы (см. :func:`place_strip`)"""
+    size = rectangle.size[:-1]
+    for j in range(1 + rectangle.is_rotatable):
+        rect_l = size[(0 + j) % 2]
+        rect_w = size[(1 + j) % 2]
+        if variant == 2 and rect_w == width:
+            yield rect_l
+        elif variant == 3 and rect_l <= length:
+            yield rect_w
+
+
+def advance_length(x, y, length, width, rectangle, tailings, allowance=0):
+    """Область после размещения прямоугольника по варианту 2"""
+    d = rectangle.size[0]
+    new_y, new_length = y + d, length - d
+    if new_length > allowance:
+        tailings.append(create_allowance(x, new_y, allowance, width))
+        new_y += allowance
+        new_length -= allowance
+    return x, new_y, new_length, width
+
+
+def advance_width(x, y, length, width, rectangle, tailings, allowance=0):
+    """Область после размещения прямоугольника по варианту 3"""
+    omega = rectangle.size[1]
+    new_x, new_width = x + omega, width - omega
+    if new_width > allowance:
+        tailings.append(create_allowance(new_x, y, length, allowance))
+        new_x += allowance
+        new_width -= allowance
+    return new_x, y, length, new_width
+
+
+def place_strip(x, y, length, width, rectangles, result, tailings, priority,
+                index, variant, first_priority, advance,
+                packed=PackedRectangle):
+    """Размещение полосы одинаковых прямоугольников
+
+    Вызывается после размещения прямоугольника по варианту 2 (полоса
+    вдоль длины) или 3 (полоса вдоль ширины) для оставшейся области.
+    Пока следующий в группе прямоугольник совпадает с размещенным
+    и наверняка был бы выбран следующим шагом рекурсивной упаковки,
+    он размещается сразу, без перебора всех прямоугольников.
+
+    Прямоугольники перед размещенным в группе при упаковке исходной
+    области имели худший вариант, а при уменьшении области вариант
+    улучшается только при точном совпадении стороны: для полосы вдоль
+    длины -- ориентация (длина области, ширина области), для полосы
+    вдоль ширины -- ориентация с шириной, равной ширине области,
+    и длиной не больше длины области. Если таких прямоугольников в
+    группе нет, а прямоугольники других групп в область не помещаются
+    (если учитываются все группы), рекурсивная упаковка выбрала бы
+    следующий одинаковый прямоугольник в той же ориентации.
+
+    :param x: координата по оси X оставшейся области
+    :type x: int или float
+    :param y: координата по оси Y оставшейся области
+    :type y: int или float
+    :param length: длина оставшейся области
+    :type length: int или float
+    :param width: ширина оставшейся области
+    :type width: int или float
+    :param rectangles: набор прямоугольников
+    :type rectangles: dict[int, list[RectangleProtocol]]
+    :param result: набор размещенных прямоугольников
+    :type result: dict[int, list[PackedRectangle]]
+    :param tailings: список неиспользуемых частей
+    :type tailings: list
+    :param priority: приоритет группы размещенного прямоугольника
+    :type priority: int
+    :param index: позиция, с которой удален размещенный прямоугольник
+                  (см. :func:`pop_rectangle`)
+    :type index: int или None
+    :param variant: вариант размещения прямоугольника
+    :type variant: int
+    :param first_priority: приоритет, которым ограничена упаковка
+    :type first_priority: int или None
+    :param advance: функция, возвращающая область после размещения
+                    прямоугольника (:func:`advance_length`,
+                    :func:`advance_width`)
+    :type advance: Callable
+    :param packed: класс размещенного прямоугольника,
+                   defaults to PackedRectangle
+    :type packed: type, optional
+    :return: область, оставшаяся после размещения полосы
+    :rtype: tuple[Number, Number, Number, Number]
+    """
+    group = rectangles[priority]
+    if not BULK_PLACEMENT or index is None or variant not in (2, 3):
+        return x, y, length, width
+    placed = result[priority][-1].rectangle
+    sides = None
+    while index < len(group) and is_same(group[index], placed):
+        rectangle = group[index]
+        current, orientation = fit_variant(length, width, rectangle)
+        if current != variant:
+            break
+        if sides is None:
+            # прямоугольники других групп не помещаются и в
+            # следующих, меньших, областях полосы
+            if not first_priority and any(
+                    fit_variant(length, width, item)[0] < 5
+                    for p, items in rectangles.items() if p != priority
+                    for item in items):
+                break
+            sides = Counter(chain.from_iterable(
+                strip_sides(item, variant, length, width) for item in group
+            ))
+        if sides[length if variant == 2 else width]:
+            break
+        sides.subtract(strip_sides(rectangle, variant, length, width))
+        if orientation != 0 and rectangle.is_rotatable:
+            rectangle.rotate()
+        result[priority].append(packed(rectangle, x, y))
+        del group[index]
+        x, y, length, width = advance(x, y, length, width, rectangle, tailings)
+    return x, y, length, width
 
 
 def get_best_fig_with_soft_sizes(length, width, max_length, max_width,